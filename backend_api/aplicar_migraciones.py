@@ -0,0 +1,62 @@
+"""
+Aplica en orden los scripts de migraciones/*.sql que aún no se ejecutaron
+sobre la BD MySQL configurada en config.py.
+
+Las migraciones aplicadas se registran en la tabla schema_migraciones.
+
+Uso (desde backend_api/):
+    python aplicar_migraciones.py
+"""
+
+import os
+import sys
+
+from db import get_connection
+
+MIGRACIONES_DIR = os.path.join(os.path.dirname(os.path.abspath(__file__)), "migraciones")
+
+
+def leer_sentencias(ruta):
+    with open(ruta, encoding="utf-8") as archivo:
+        lineas = [l for l in archivo if not l.strip().startswith("--")]
+    return [s.strip() for s in "".join(lineas).split(";") if s.strip()]
+
+
+def main():
+    conn = get_connection()
+    if conn is None:
+        print("❌ No se pudo conectar a MySQL")
+        sys.exit(1)
+
+    try:
+        cursor = conn.cursor()
+        cursor.execute("""
+            CREATE TABLE IF NOT EXISTS schema_migraciones (
+                nombre VARCHAR(255) PRIMARY KEY,
+                aplicado_en TIMESTAMP DEFAULT CURRENT_TIMESTAMP
+            )
+        """)
+        cursor.execute("SELECT nombre FROM schema_migraciones")
+        aplicadas = {fila[0] for fila in cursor.fetchall()}
+
+        pendientes = sorted(
+            f for f in os.listdir(MIGRACIONES_DIR)
+            if f.endswith(".sql") and f not in aplicadas
+        )
+        if not pendientes:
+            print("✅ No hay migraciones pendientes")
+            return
+
+        for nombre in pendientes:
+            print(f"➡ Aplicando {nombre}...")
+            for sentencia in leer_sentencias(os.path.join(MIGRACIONES_DIR, nombre)):
+                cursor.execute(sentencia)
+            cursor.execute("INSERT INTO schema_migraciones (nombre) VALUES (%s)", (nombre,))
+            conn.commit()
+            print(f"✅ {nombre} aplicada")
+    finally:
+        conn.close()
+
+
+if __name__ == "__main__":
+    main()
@@ -1,17 +1,26 @@
 from flask import Flask, jsonify
 from flask_cors import CORS
 
+from utils.logger import configurar_medicion
+from utils.metricas import configurar_metricas
+
 # Importar Blueprints
 from routes.alumnos.alumnos_routes import alumnos_bp
 from routes.cursos.cursos_routes import cursos_bp
 from routes.matriculas.matriculas_routes import matriculas_bp
 from routes.evaluaciones.evaluaciones_routes import evaluaciones_bp
 from routes.reportes.reportes_routes import reportes_bp
+from routes.metricas.metricas_routes import metricas_bp
+from routes.trazas.trazas_routes import trazas_bp
 
 def create_app():
     app = Flask(__name__)
     CORS(app)
 
+    # Medición de tiempo de cada request (before_request / teardown_request)
+    configurar_medicion(app)
+    configurar_metricas(app)
+
     # Ruta raíz
     @app.route('/')
     def home():
@@ -27,7 +36,9 @@ def create_app():
                 "GET /api/cursos - Listar cursos",
                 "GET /api/matriculas - Listar matrículas",
                 "GET /api/evaluaciones - Listar evaluaciones",
-                "GET /api/reportes/general - Reporte general"
+                "GET /api/reportes/general - Reporte general",
+                "GET /metrics - Métricas en formato Prometheus",
+                "GET /api/trazas/<transaction_id> - Traza de una transacción"
             ]
         })
 
@@ -37,9 +48,11 @@ def create_app():
     app.register_blueprint(matriculas_bp)
     app.register_blueprint(evaluaciones_bp)
     app.register_blueprint(reportes_bp)
+    app.register_blueprint(metricas_bp)
+    app.register_blueprint(trazas_bp)
 
     return app
 
 if __name__ == "__main__":
     app = create_app()
-app.run(host="127.0.0.1", port=5000, debug=True, use_reloader=False)
\ No newline at end of file
+    app.run(host="127.0.0.1", port=5000, debug=True, use_reloader=False)
\ No newline at end of file
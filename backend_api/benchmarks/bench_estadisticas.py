@@ -0,0 +1,113 @@
+"""
+Benchmark: estadísticas de notas columnar (NumPy) vs GROUP BY en SQL.
+
+Genera un conjunto sintético de evaluaciones, lo carga en una tabla SQLite
+en memoria y compara, para cada dimensión (curso, ciclo, intento), el
+GROUP BY equivalente con utils.estadisticas.agregar_notas. SQLite no tiene
+mediana, así que el SQL calcula el resto de agregados (cantidad, promedio,
+desviación, mínimo, máximo, tasa de aprobación y distribución) y NumPy
+además la mediana. No requiere BD.
+
+Uso (desde backend_api/):
+    python -m benchmarks.bench_estadisticas [filas] [repeticiones]
+"""
+
+import sqlite3
+import statistics
+import sys
+import time
+
+import numpy as np
+
+from utils.estadisticas import DIMENSIONES, RANGOS_NOTAS, agregar_notas, columnas_desde_filas
+
+
+def generar_filas(n, semilla=42):
+    rng = np.random.default_rng(semilla)
+    id_curso = rng.integers(1, 61, n)
+    creditos = (id_curso % 5) + 1
+    notas = np.clip(np.round(rng.normal(12, 3.5, n), 1), 0, 20)
+    return list(zip(
+        rng.integers(1, 20001, n).tolist(),
+        id_curso.tolist(),
+        rng.integers(1, 11, n).tolist(),
+        rng.choice([1, 2, 3], n, p=[0.8, 0.15, 0.05]).tolist(),
+        creditos.tolist(),
+        notas.tolist(),
+    ))
+
+
+def crear_tabla(filas):
+    conn = sqlite3.connect(":memory:")
+    conn.execute("""
+        CREATE TABLE notas (
+            id_alumno INTEGER, id_curso INTEGER, ciclo INTEGER,
+            intento INTEGER, creditos INTEGER, nota REAL
+        )
+    """)
+    conn.executemany("INSERT INTO notas VALUES (?, ?, ?, ?, ?, ?)", filas)
+    conn.commit()
+    return conn
+
+
+def sql_agregados(columna):
+    limites = list(RANGOS_NOTAS) + [None]
+    rangos = ",\n".join(
+        f"SUM(nota >= {inf}" + (f" AND nota < {sup})" if sup is not None else ")")
+        for inf, sup in zip(limites, limites[1:])
+    )
+    return f"""
+        SELECT {columna}, COUNT(*), AVG(nota),
+               AVG(nota * nota) - AVG(nota) * AVG(nota),
+               MIN(nota), MAX(nota), AVG(nota >= 10.5),
+               {rangos}
+        FROM notas
+        GROUP BY {columna}
+        ORDER BY {columna}
+    """
+
+
+def _medir(funcion, repeticiones):
+    tiempos = []
+    resultado = None
+    for _ in range(repeticiones):
+        inicio = time.perf_counter()
+        resultado = funcion()
+        tiempos.append((time.perf_counter() - inicio) * 1000)
+    return statistics.median(tiempos), resultado
+
+
+def main():
+    n = int(sys.argv[1]) if len(sys.argv) > 1 else 1_000_000
+    repeticiones = int(sys.argv[2]) if len(sys.argv) > 2 else 5
+
+    print(f"Generando {n} evaluaciones sintéticas...")
+    filas = generar_filas(n)
+    conn = crear_tabla(filas)
+    inicio = time.perf_counter()
+    columnas = columnas_desde_filas(filas)
+    carga_ms = (time.perf_counter() - inicio) * 1000
+    del filas
+
+    print(f"Conversión a columnas NumPy: {carga_ms:.0f}ms (una vez, luego se cachea)\n")
+    print(f"{'dimensión':<10} {'grupos':>7} {'SQL GROUP BY':>14} {'NumPy':>10} {'mejora':>8} {'dif. promedio':>14}")
+
+    for dimension, columna in DIMENSIONES.items():
+        sql = sql_agregados(columna)
+        t_sql, filas_sql = _medir(lambda: conn.execute(sql).fetchall(), repeticiones)
+        t_np, agregados = _medir(
+            lambda: agregar_notas(columnas[columna], columnas["nota"], columnas["aprobado"]),
+            repeticiones
+        )
+        diferencia = max(
+            abs(fila[2] - promedio) for fila, promedio in zip(filas_sql, agregados["promedio"])
+        )
+        print(
+            f"{dimension:<10} {len(filas_sql):>7} {t_sql:>12.1f}ms {t_np:>8.1f}ms "
+            f"{t_sql / t_np:>7.1f}x {diferencia:>14.2e}"
+        )
+    conn.close()
+
+
+if __name__ == "__main__":
+    main()
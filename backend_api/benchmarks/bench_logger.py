@@ -0,0 +1,97 @@
+"""
+Benchmark: costo por llamada de registrar_log.
+
+Compara la implementación original (inspect + imports + makedirs y dos
+open/append por línea) con la actual (metadatos del caller cacheados,
+escritura en el hilo de fondo) y con una línea filtrada por nivel.
+No requiere BD; escribe en un directorio temporal.
+
+Uso (desde backend_api/):
+    python -m benchmarks.bench_logger [iteraciones]
+"""
+
+import os
+import sys
+import tempfile
+import time
+from datetime import datetime, timezone
+
+from flask import Flask
+
+from utils import logger
+
+
+def registrar_log_original(modulo, nivel, mensaje, **kwargs):
+    """Copia de registrar_log antes de la optimización, como referencia."""
+    request_data = logger.obtener_datos_request()
+    timestamp = datetime.now(timezone.utc).strftime("%Y-%m-%dT%H:%M:%S.%f")[:-3] + "Z"
+
+    import inspect
+    frame = inspect.currentframe()
+    caller_frame = frame.f_back
+    caller_filename = os.path.basename(caller_frame.f_code.co_filename)
+    caller_lineno = caller_frame.f_lineno
+    caller_function = caller_frame.f_code.co_name
+
+    pid = os.getpid()
+    import threading
+    thread_id = threading.get_ident()
+
+    duracion_str = ""
+    linea_log = (
+        f"[{timestamp}] "
+        f"[{nivel:5}] "
+        f"[{request_data['request_id']}] "
+        f"[{modulo:15}] "
+        f"[{caller_filename}:{caller_lineno:3}] "
+        f"[{caller_function:20}] "
+        f"[PID:{pid}] "
+        f"[Thread:{thread_id}] "
+        f"[IP:{request_data['ip']:15}] "
+        f"[{request_data['metodo']:6} {request_data['uri']:40}] "
+        f"{duracion_str:12} "
+        f"→ {mensaje}\n"
+    )
+
+    ruta_modulo = os.path.join(logger.BASE_LOG_DIR, modulo)
+    os.makedirs(ruta_modulo, exist_ok=True)
+    with open(os.path.join(ruta_modulo, f"{modulo}.log"), "a", encoding="utf-8") as file:
+        file.write(linea_log)
+    with open(os.path.join(logger.BASE_LOG_DIR, "sistema_completo.log"), "a", encoding="utf-8") as file:
+        file.write(linea_log)
+
+
+def _medir(funcion, nivel, iteraciones):
+    inicio = time.perf_counter_ns()
+    for i in range(iteraciones):
+        funcion("bench", nivel, "mensaje de prueba")
+    return (time.perf_counter_ns() - inicio) / iteraciones
+
+
+def main():
+    iteraciones = int(sys.argv[1]) if len(sys.argv) > 1 else 20000
+
+    with tempfile.TemporaryDirectory() as directorio:
+        # Redirigir los logs del benchmark fuera de backend_api/logs
+        logger.BASE_LOG_DIR = directorio
+
+        app = Flask(__name__)
+        with app.test_request_context("/api/bench", environ_base={"REMOTE_ADDR": "127.0.0.1"}):
+            antes = _medir(registrar_log_original, "INFO", iteraciones)
+            despues = _medir(logger.registrar_log, "INFO", iteraciones)
+            logger.vaciar_logs()
+            filtrado = _medir(logger.registrar_log, "DEBUG", iteraciones)
+
+        metricas = logger.obtener_metricas_logs()
+        logger._detener_escritor()
+
+    print(f"Iteraciones: {iteraciones}")
+    print(f"  original (inspect + open por línea): {antes:10.0f} ns/llamada")
+    print(f"  actual   (cache + hilo escritor)   : {despues:10.0f} ns/llamada")
+    print(f"  nivel filtrado (DEBUG < {logger.LOG_CONFIG['nivel_minimo']})    : {filtrado:10.0f} ns/llamada")
+    print(f"  mejora: {antes / despues:.1f}x")
+    print(f"  escritor: {metricas}")
+
+
+if __name__ == "__main__":
+    main()
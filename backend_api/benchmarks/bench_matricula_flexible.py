@@ -0,0 +1,84 @@
+"""
+Benchmark: escritura de la matrícula flexible.
+
+Compara el bucle anterior (SELECT duplicado + SELECT MAX(intento) + INSERT
+por curso) con registrar_matriculas_lote (una consulta agrupada + un INSERT
+multi-fila). Cada iteración se ejecuta dentro de una transacción que se
+revierte, por lo que la BD no se modifica.
+
+Requiere la BD MySQL configurada en config.py con al menos un alumno activo
+y 6 cursos activos.
+
+Uso (desde backend_api/):
+    python -m benchmarks.bench_matricula_flexible [iteraciones]
+"""
+
+import statistics
+import sys
+import time
+
+from db import get_connection
+from routes.matriculas.matriculas_routes import registrar_matriculas_lote
+
+
+def registrar_por_curso(cursor, alumno_id, ciclo_matricula, cursos_seleccionados, cursos_validos):
+    """Implementación anterior: 3 consultas por curso."""
+    for curso_id in cursos_seleccionados:
+        curso = cursos_validos[curso_id]
+        cursor.execute("""
+            SELECT id FROM matriculas 
+            WHERE id_alumno = %s AND id_curso = %s AND ciclo_matricula = %s
+              AND estado = 'MATRICULADO'
+        """, (alumno_id, curso_id, ciclo_matricula))
+        if cursor.fetchone():
+            continue
+        cursor.execute("""
+            SELECT MAX(intento) as ultimo_intento
+            FROM matriculas
+            WHERE id_alumno = %s AND id_curso = %s
+        """, (alumno_id, curso_id))
+        nuevo_intento = (cursor.fetchone()["ultimo_intento"] or 0) + 1
+        cursor.execute("""
+            INSERT INTO matriculas (id_alumno, id_curso, ciclo_original, ciclo_matricula, intento, estado)
+            VALUES (%s, %s, %s, %s, %s, 'MATRICULADO')
+        """, (alumno_id, curso_id, curso["ciclo"], ciclo_matricula, nuevo_intento))
+
+
+def _medir(conn, estrategia, alumno_id, ciclo, cursos, iteraciones):
+    tiempos = []
+    for _ in range(iteraciones):
+        cursor = conn.cursor(dictionary=True)
+        inicio = time.perf_counter()
+        estrategia(cursor, alumno_id, ciclo, list(cursos), cursos)
+        tiempos.append((time.perf_counter() - inicio) * 1000)
+        cursor.close()
+        conn.rollback()
+    return tiempos
+
+
+def main():
+    iteraciones = int(sys.argv[1]) if len(sys.argv) > 1 else 200
+
+    conn = get_connection()
+    cursor = conn.cursor(dictionary=True)
+    cursor.execute("SELECT id, ciclo_actual FROM alumnos WHERE activo = 1 ORDER BY id LIMIT 1")
+    alumno = cursor.fetchone()
+    cursor.execute("SELECT id, codigo, nombre, ciclo, creditos FROM cursos WHERE activo = 1 ORDER BY id LIMIT 6")
+    cursos = {c["id"]: c for c in cursor.fetchall()}
+    cursor.close()
+
+    # Ciclo ficticio para no chocar con matrículas reales
+    ciclo = 99
+
+    anterior = _medir(conn, registrar_por_curso, alumno["id"], ciclo, cursos, iteraciones)
+    lote = _medir(conn, registrar_matriculas_lote, alumno["id"], ciclo, cursos, iteraciones)
+    conn.close()
+
+    print(f"Iteraciones: {iteraciones}, cursos por matrícula: {len(cursos)}")
+    print(f"Bucle por curso  ({3 * len(cursos)} consultas): p50={statistics.median(anterior):.3f}ms media={statistics.mean(anterior):.3f}ms")
+    print(f"Lote             (2 consultas):  p50={statistics.median(lote):.3f}ms media={statistics.mean(lote):.3f}ms")
+    print(f"Mejora p50: {statistics.median(anterior) / statistics.median(lote):.1f}x")
+
+
+if __name__ == "__main__":
+    main()
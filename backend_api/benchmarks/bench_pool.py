@@ -0,0 +1,61 @@
+"""
+Benchmark: conexión directa (handshake por request) vs. pool de conexiones.
+
+Simula el patrón de cada endpoint: obtener conexión, ejecutar una consulta
+corta y cerrar. Requiere la BD MySQL configurada en config.py.
+
+Uso (desde backend_api/):
+    python -m benchmarks.bench_pool [iteraciones]
+"""
+
+import statistics
+import sys
+import time
+
+import mysql.connector
+
+from config import DB_CONFIG
+from db import get_connection, obtener_metricas_pool
+
+
+def _percentil(valores, p):
+    ordenados = sorted(valores)
+    return ordenados[min(len(ordenados) - 1, int(len(ordenados) * p))]
+
+
+def _medir(obtener_conexion, iteraciones):
+    tiempos = []
+    for _ in range(iteraciones):
+        inicio = time.perf_counter()
+        conn = obtener_conexion()
+        cursor = conn.cursor()
+        cursor.execute("SELECT 1")
+        cursor.fetchall()
+        cursor.close()
+        conn.close()
+        tiempos.append((time.perf_counter() - inicio) * 1000)
+    return tiempos
+
+
+def _reportar(nombre, tiempos):
+    print(f"{nombre:25} p50={statistics.median(tiempos):8.3f}ms "
+          f"p95={_percentil(tiempos, 0.95):8.3f}ms "
+          f"media={statistics.mean(tiempos):8.3f}ms")
+
+
+def main():
+    iteraciones = int(sys.argv[1]) if len(sys.argv) > 1 else 500
+
+    directo = _medir(lambda: mysql.connector.connect(**DB_CONFIG), iteraciones)
+    get_connection().close()  # calentar el pool
+    pool = _medir(get_connection, iteraciones)
+
+    print(f"Iteraciones: {iteraciones}")
+    _reportar("Conexión directa", directo)
+    _reportar("Pool (get_connection)", pool)
+    print(f"Mejora p50: {statistics.median(directo) / statistics.median(pool):.1f}x")
+    print("Métricas del pool:", obtener_metricas_pool())
+
+
+if __name__ == "__main__":
+    main()
@@ -8,6 +8,84 @@ DB_CONFIG = {
     "port": 3306
 }
 
+# Pool de conexiones usado por db.get_connection()
+POOL_CONFIG = {
+    "tamano": 10,              # conexiones que se mantienen abiertas
+    "overflow": 5,             # conexiones extra permitidas en picos
+    "idle_timeout": 300,       # segundos antes de descartar una conexión ociosa
+    "espera_maxima": 5,        # segundos esperando una conexión libre
+    "health_check": True       # ping a la conexión antes de entregarla
+}
+
+# Comunicación entre servicios (utils/service_client.py)
+#   "local":  los servicios corren en el mismo proceso Flask y se invocan
+#             directamente, sin HTTP ni re-codificación JSON.
+#   "remoto": cada servicio se consulta por HTTP en su URL (despliegue separado).
+SERVICIOS_CONFIG = {
+    "modo": "local",
+    "timeout": 5,
+    "pool_maxsize": 20,        # conexiones keep-alive por host destino
+    "reintentos": 2,           # reintentos ante errores de conexión / 502-504
+    "backoff": 0.2,            # factor de espera exponencial entre reintentos (s)
+    "urls": {
+        "alumnos": "http://127.0.0.1:5000/api/alumnos",
+        "cursos": "http://127.0.0.1:5000/api/cursos",
+        "matriculas": "http://127.0.0.1:5000/api/matriculas"
+    }
+}
+
+# Paginación por cursor de los endpoints de listado (utils/paginacion.py)
+PAGINACION_CONFIG = {
+    "limite_defecto": 50,
+    "limite_maximo": 500
+}
+
+# Escritura de logs (utils/logger.py)
+LOG_CONFIG = {
+    "asincrono": True,                  # escribir desde un hilo dedicado, fuera de la request
+    "nivel_minimo": "INFO",             # DEBUG | INFO | WARN | ERROR; se filtra antes de formatear
+    "formato": "texto",                 # "texto" (columnas fijas) | "json" (un objeto por línea)
+    "muestreo_info": {},                # fracción de requests cuyos INFO se escriben, por módulo
+                                        # p. ej. {"alumnos": 0.1, "cursos": 0.1}; WARN/ERROR siempre
+    "tam_cola": 10000,                  # líneas pendientes máximas en memoria
+    "politica_cola_llena": "descartar", # "descartar" | "bloquear"
+    "espera_bloqueo": 0.5,              # segundos máximos de bloqueo con "bloquear"
+    "flush_lineas": 200,                # volcar a disco al acumular estas líneas...
+    "flush_intervalo": 1.0,             # ...o tras estos segundos
+    "rotacion_max_mb": 50,              # rotar cada archivo al superar este tamaño...
+    "rotacion_diaria": True,            # ...y al cambiar el día
+    "comprimir_rotados": True,          # gzip de los segmentos rotados (en otro hilo)
+    "max_segmentos": 30                 # segmentos rotados conservados por archivo
+}
+
+# Versiones de tablas (utils/versiones.py) y cachés en memoria (utils/cache.py)
+VERSIONES_CONFIG = {
+    "intervalo_lectura": 2      # segundos que se reutiliza la lectura de versiones
+}
+
+CACHE_CONFIG = {
+    "catalogo_ttl": 300,        # segundos máximos de vida del catálogo de cursos
+    "alumnos_ttl": 10,          # segundos de vida de una validación de alumno
+    "alumnos_max": 1000,        # alumnos validados que se conservan (LRU)
+    "rendimiento_ttl": 600,     # segundos de vida del historial académico de un alumno
+    "rendimiento_max": 2000,    # historiales que se conservan (LRU)
+    "estadisticas_ttl": 600,    # segundos de vida de las columnas de notas (reportes/estadisticas)
+    "promedios_max": 32         # cálculos de promedio ponderado (uno por ciclo) que se conservan
+}
+
+# Reconstrucción de trazas (utils/trazas.py)
+TRAZAS_CONFIG = {
+    # Directorios de logs de otros servicios (otros procesos/servidores montados)
+    # que se consultan además de backend_api/logs
+    "directorios_logs": []
+}
+
+# Validaciones concurrentes de utils/service_validator.py
+VALIDACION_CONFIG = {
+    "max_workers": 8,          # hilos compartidos por todas las validaciones
+    "plazo_total": 5           # segundos máximos para el conjunto de validaciones
+}
+
 def get_connection():
     try:
         conn = mysql.connector.connect(**DB_CONFIG)
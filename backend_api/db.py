@@ -1,26 +1,294 @@
 # backend_api/db.py
 
+import threading
+import time
+from collections import deque
+
 import mysql.connector
 from mysql.connector import Error
-from config import DB_CONFIG
+from config import DB_CONFIG, POOL_CONFIG
+from utils.metricas import registrar_consulta
+
+
+class PoolAgotado(Exception):
+    """No hubo conexión libre dentro del tiempo de espera configurado."""
+
+
+class PoolConexiones:
+    """
+    Pool de conexiones MySQL.
+
+    Mantiene hasta `tamano` conexiones abiertas y permite `overflow`
+    conexiones adicionales en picos de carga; estas se cierran al devolverse.
+    Las conexiones ociosas por más de `idle_timeout` segundos se descartan y,
+    si `health_check` está activo, cada conexión se valida con un ping antes
+    de entregarla.
+    """
+
+    def __init__(self, config_bd, tamano=10, overflow=5, idle_timeout=300,
+                 espera_maxima=5, health_check=True):
+        self.config_bd = config_bd
+        self.tamano = tamano
+        self.overflow = overflow
+        self.idle_timeout = idle_timeout
+        self.espera_maxima = espera_maxima
+        self.health_check = health_check
+
+        self._libres = deque()          # (conexion, instante de devolución)
+        self._abiertas = 0
+        self._en_uso = 0
+        self._cond = threading.Condition()
+
+        # Métricas
+        self._entregadas = 0
+        self._creadas = 0
+        self._descartadas = 0
+        self._agotamientos = 0
+        self._esperas = 0
+        self._tiempo_espera = 0.0
+
+    # ----------------------------
+    # Creación / cierre
+    # ----------------------------
+    def _crear(self):
+        return mysql.connector.connect(
+            host=self.config_bd["host"],
+            user=self.config_bd["user"],
+            password=self.config_bd["password"],
+            database=self.config_bd["database"],
+            port=self.config_bd.get("port", 3306)
+        )
+
+    def _cerrar(self, conn):
+        try:
+            conn.close()
+        except Error:
+            pass
+
+    def _purgar_ociosas(self, ahora):
+        # Las conexiones más antiguas quedan al inicio de la cola
+        while self._libres and ahora - self._libres[0][1] > self.idle_timeout:
+            conn, _ = self._libres.popleft()
+            self._abiertas -= 1
+            self._descartadas += 1
+            self._cerrar(conn)
+
+    def _conexion_sana(self, conn):
+        if not self.health_check:
+            return True
+        try:
+            conn.ping(reconnect=False)
+            return True
+        except Error:
+            return False
+
+    # ----------------------------
+    # Checkout / devolución
+    # ----------------------------
+    def obtener(self):
+        """
+        Entrega una conexión del pool (envuelta en ConexionPool).
+        Lanza PoolAgotado si no hay conexión disponible a tiempo.
+        """
+        inicio = time.monotonic()
+        limite = inicio + self.espera_maxima
+
+        while True:
+            conn = None
+            crear = False
+
+            with self._cond:
+                esperando = False
+                while True:
+                    ahora = time.monotonic()
+                    self._purgar_ociosas(ahora)
+
+                    if self._libres:
+                        # LIFO: se reutiliza la conexión usada más recientemente
+                        conn, _ = self._libres.pop()
+                        break
+
+                    if self._abiertas < self.tamano + self.overflow:
+                        self._abiertas += 1
+                        crear = True
+                        break
+
+                    restante = limite - ahora
+                    if restante <= 0:
+                        self._agotamientos += 1
+                        raise PoolAgotado(
+                            f"Pool agotado: {self._abiertas} conexiones en uso "
+                            f"tras esperar {self.espera_maxima}s"
+                        )
+                    if not esperando:
+                        esperando = True
+                        self._esperas += 1
+                    self._cond.wait(restante)
+
+                self._en_uso += 1
+                self._tiempo_espera += time.monotonic() - inicio
+
+            if crear:
+                try:
+                    conn = self._crear()
+                except Exception:
+                    with self._cond:
+                        self._abiertas -= 1
+                        self._en_uso -= 1
+                        self._cond.notify()
+                    raise
+                with self._cond:
+                    self._creadas += 1
+                    self._entregadas += 1
+                return ConexionPool(self, conn)
+
+            if self._conexion_sana(conn):
+                with self._cond:
+                    self._entregadas += 1
+                return ConexionPool(self, conn)
+
+            # Conexión rota: se descarta y se vuelve a intentar
+            self._cerrar(conn)
+            with self._cond:
+                self._abiertas -= 1
+                self._en_uso -= 1
+                self._descartadas += 1
+
+    def devolver(self, conn):
+        """
+        Devuelve una conexión al pool, descartando transacciones pendientes.
+        Una conexión con resultados sin leer (p. ej. un streaming cortado) se
+        cierra: leer el resto podría traer a memoria una exportación completa.
+        """
+        reutilizable = not conn.unread_result
+        if reutilizable:
+            try:
+                if conn.in_transaction:
+                    conn.rollback()
+            except Error:
+                reutilizable = False
+
+        with self._cond:
+            self._en_uso -= 1
+            if reutilizable and len(self._libres) < self.tamano:
+                self._libres.append((conn, time.monotonic()))
+                conn = None
+            else:
+                self._abiertas -= 1
+                self._descartadas += 1
+            self._cond.notify()
+
+        if conn is not None:
+            self._cerrar(conn)
+
+    def metricas(self):
+        with self._cond:
+            return {
+                "tamano": self.tamano,
+                "overflow": self.overflow,
+                "abiertas": self._abiertas,
+                "en_uso": self._en_uso,
+                "libres": len(self._libres),
+                "entregadas": self._entregadas,
+                "creadas": self._creadas,
+                "descartadas": self._descartadas,
+                "esperas": self._esperas,
+                "agotamientos": self._agotamientos,
+                "tiempo_espera_total_ms": round(self._tiempo_espera * 1000, 2)
+            }
+
+    def cerrar_todas(self):
+        with self._cond:
+            libres = list(self._libres)
+            self._libres.clear()
+            self._abiertas -= len(libres)
+        for conn, _ in libres:
+            self._cerrar(conn)
+
+
+class ConexionPool:
+    """
+    Envoltura sobre una conexión MySQL del pool.
+    Delega todo a la conexión real excepto close(), que la devuelve al pool.
+    """
+
+    def __init__(self, pool, conn):
+        self._pool = pool
+        self._conn = conn
+
+    def close(self):
+        if self._conn is not None:
+            conn, self._conn = self._conn, None
+            self._pool.devolver(conn)
+
+    def cursor(self, *args, **kwargs):
+        if self._conn is None:
+            raise Error("La conexión ya fue devuelta al pool")
+        return CursorMedido(self._conn.cursor(*args, **kwargs))
+
+    def __getattr__(self, nombre):
+        if self._conn is None:
+            raise Error("La conexión ya fue devuelta al pool")
+        return getattr(self._conn, nombre)
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        self.close()
+
+
+class CursorMedido:
+    """
+    Envoltura sobre un cursor MySQL que registra cuántas consultas se
+    ejecutan y cuánto tardan (ver utils/metricas.py).
+    """
+
+    def __init__(self, cursor):
+        self._cursor = cursor
+
+    def execute(self, *args, **kwargs):
+        inicio = time.perf_counter()
+        try:
+            return self._cursor.execute(*args, **kwargs)
+        finally:
+            registrar_consulta(time.perf_counter() - inicio)
+
+    def executemany(self, *args, **kwargs):
+        inicio = time.perf_counter()
+        try:
+            return self._cursor.executemany(*args, **kwargs)
+        finally:
+            registrar_consulta(time.perf_counter() - inicio)
+
+    def __getattr__(self, nombre):
+        return getattr(self._cursor, nombre)
+
+    def __iter__(self):
+        return iter(self._cursor)
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        self._cursor.close()
+
+
+pool = PoolConexiones(DB_CONFIG, **POOL_CONFIG)
+
 
 def get_connection():
     try:
-        conn = mysql.connector.connect(
-            host=DB_CONFIG["host"],
-            user=DB_CONFIG["user"],
-            password=DB_CONFIG["password"],
-            database=DB_CONFIG["database"],
-            port=DB_CONFIG.get("port", 3306)
-        )
+        return pool.obtener()
 
-        if conn.is_connected():
-            print("✔ Conexión MySQL establecida")
-            return conn
-        else:
-            print("❌ No se pudo conectar a MySQL")
-            return None
+    except PoolAgotado as e:
+        print("🔥 POOL DE CONEXIONES AGOTADO:", e)
+        return None
 
     except Error as e:
         print("🔥 ERROR DE CONEXIÓN MYSQL:", e)
         return None
+
+
+def obtener_metricas_pool():
+    return pool.metricas()
@@ -0,0 +1,16 @@
+-- ═══════════════════════════════════════════════════════════════════════
+-- Índices para /api/matriculas/cursos-disponibles y la matrícula flexible
+-- ═══════════════════════════════════════════════════════════════════════
+
+-- Historial de un alumno por curso (anti-joins de cursos jalados,
+-- anti-duplicado y MAX(intento) de la matrícula flexible)
+CREATE INDEX idx_matriculas_alumno_curso_ciclo_estado
+    ON matriculas (id_alumno, id_curso, ciclo_matricula, estado);
+
+-- Evaluación de una matrícula filtrando por aprobado
+CREATE INDEX idx_evaluaciones_matricula_aprobado
+    ON evaluaciones (id_matricula, aprobado);
+
+-- Catálogo de cursos activos por ciclo
+CREATE INDEX idx_cursos_ciclo_activo
+    ON cursos (ciclo, activo);
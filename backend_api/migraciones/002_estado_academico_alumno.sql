@@ -0,0 +1,19 @@
+-- ═══════════════════════════════════════════════════════════════════════
+-- Proyección del estado académico por alumno y curso
+-- ═══════════════════════════════════════════════════════════════════════
+-- Una fila por (alumno, curso) evaluado al menos una vez:
+--   ultimo_intento / ultima_nota: último intento evaluado
+--   aprobado: 1 si aprobó el curso en algún intento
+-- Se mantiene desde utils/estado_academico.py al crear, editar o eliminar
+-- evaluaciones. Carga inicial: python -m utils.estado_academico
+
+CREATE TABLE estado_academico_alumno (
+    id_alumno INT NOT NULL,
+    id_curso INT NOT NULL,
+    ultimo_intento INT NOT NULL,
+    ultima_nota DECIMAL(4,2) NOT NULL,
+    aprobado TINYINT(1) NOT NULL,
+    actualizado_en TIMESTAMP DEFAULT CURRENT_TIMESTAMP ON UPDATE CURRENT_TIMESTAMP,
+    PRIMARY KEY (id_alumno, id_curso),
+    KEY idx_estado_academico_alumno_aprobado (id_alumno, aprobado)
+);
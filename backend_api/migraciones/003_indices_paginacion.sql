@@ -0,0 +1,15 @@
+-- ═══════════════════════════════════════════════════════════════════════
+-- Índices para la paginación por cursor de los listados
+-- ═══════════════════════════════════════════════════════════════════════
+-- InnoDB agrega la clave primaria (id) a cada índice secundario, por lo que
+-- estos índices cubren el orden (fecha DESC, id DESC) usado por el cursor.
+
+CREATE INDEX idx_matriculas_fecha_matricula
+    ON matriculas (fecha_matricula);
+
+CREATE INDEX idx_evaluaciones_fecha_evaluacion
+    ON evaluaciones (fecha_evaluacion);
+
+-- Orden del catálogo de cursos (ciclo, codigo)
+CREATE INDEX idx_cursos_ciclo_codigo
+    ON cursos (ciclo, codigo);
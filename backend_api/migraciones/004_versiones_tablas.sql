@@ -0,0 +1,18 @@
+-- ═══════════════════════════════════════════════════════════════════════
+-- Contador de versión por tabla
+-- ═══════════════════════════════════════════════════════════════════════
+-- Cada escritura sobre una tabla incrementa su versión en la misma
+-- transacción (utils/versiones.py). Los procesos comparan la versión leída
+-- con la de sus cachés para detectar datos desactualizados.
+
+CREATE TABLE versiones_tablas (
+    tabla VARCHAR(64) NOT NULL PRIMARY KEY,
+    version BIGINT UNSIGNED NOT NULL DEFAULT 0,
+    actualizado_en TIMESTAMP DEFAULT CURRENT_TIMESTAMP ON UPDATE CURRENT_TIMESTAMP
+);
+
+INSERT INTO versiones_tablas (tabla, version) VALUES
+    ('alumnos', 0),
+    ('cursos', 0),
+    ('matriculas', 0),
+    ('evaluaciones', 0);
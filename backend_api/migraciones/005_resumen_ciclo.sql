@@ -0,0 +1,34 @@
+-- ═══════════════════════════════════════════════════════════════════════
+-- Resumen materializado por ciclo de matrícula
+-- ═══════════════════════════════════════════════════════════════════════
+-- Una fila por ciclo_matricula con los totales del reporte alumnos_ciclo:
+--   total_alumnos: alumnos distintos matriculados en el ciclo
+--   total_matriculas / creditos: matrículas y créditos matriculados
+--   aprobados / desaprobados: matrículas evaluadas según su nota
+-- Se mantiene con deltas desde utils/resumen_ciclo.py en las mismas
+-- transacciones que registran matrículas y evaluaciones.
+-- Verificación / reconstrucción: python -m utils.resumen_ciclo [--reconstruir]
+
+CREATE TABLE resumen_ciclo (
+    ciclo INT NOT NULL PRIMARY KEY,
+    total_alumnos INT NOT NULL DEFAULT 0,
+    total_matriculas INT NOT NULL DEFAULT 0,
+    aprobados INT NOT NULL DEFAULT 0,
+    desaprobados INT NOT NULL DEFAULT 0,
+    creditos INT NOT NULL DEFAULT 0,
+    actualizado_en TIMESTAMP DEFAULT CURRENT_TIMESTAMP ON UPDATE CURRENT_TIMESTAMP
+);
+
+INSERT INTO resumen_ciclo (ciclo, total_alumnos, total_matriculas, aprobados, desaprobados, creditos)
+SELECT m.ciclo_matricula,
+       COUNT(DISTINCT m.id_alumno),
+       COUNT(*),
+       COALESCE(SUM(e.aprobado = 1), 0),
+       COALESCE(SUM(e.aprobado = 0), 0),
+       COALESCE(SUM(c.creditos), 0)
+FROM matriculas m
+JOIN cursos c ON c.id = m.id_curso
+LEFT JOIN evaluaciones e ON e.id_matricula = m.id
+GROUP BY m.ciclo_matricula;
+
+INSERT INTO versiones_tablas (tabla, version) VALUES ('resumen_ciclo', 0);
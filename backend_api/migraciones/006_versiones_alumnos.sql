@@ -0,0 +1,14 @@
+-- ═══════════════════════════════════════════════════════════════════════
+-- Versión de los datos académicos por alumno
+-- ═══════════════════════════════════════════════════════════════════════
+-- Cada escritura de matrículas o evaluaciones incrementa la versión del
+-- alumno afectado en la misma transacción (utils/versiones.py). La caché
+-- del historial académico (reporte rendimiento_alumno) compara esta
+-- versión para descartar solo los historiales que cambiaron.
+-- Un alumno sin fila tiene versión 0.
+
+CREATE TABLE versiones_alumnos (
+    id_alumno INT NOT NULL PRIMARY KEY,
+    version BIGINT UNSIGNED NOT NULL DEFAULT 0,
+    actualizado_en TIMESTAMP DEFAULT CURRENT_TIMESTAMP ON UPDATE CURRENT_TIMESTAMP
+);
@@ -1,6 +1,14 @@
 from flask import Blueprint, request, jsonify
+from config import CACHE_CONFIG
 from db import get_connection
-from utils.logger import registrar_log, iniciar_medicion, finalizar_medicion
+from utils.cache import Cache
+from utils.condicional import condicional
+from utils.logger import registrar_log
+from utils.service_client import registrar_servicio_local
+from utils.versiones import confirmar, incrementar_version
+from utils.paginacion import (
+    ErrorPaginacion, paginacion_solicitada, leer_parametros, condicion_keyset, armar_pagina
+)
 
 alumnos_bp = Blueprint("alumnos_bp", __name__, url_prefix="/api/alumnos")
 print("⚡ CARGANDO ARCHIVO DE ALUMNOS DESDE ESTE BACKEND ⚡")
@@ -88,33 +96,144 @@ def validar_alumno(data):
     return errores
 
 
+# ============================
+# SERVICIOS (consumidos por otros módulos)
+# ============================
+def servicio_obtener_alumno(alumno_id):
+    """
+    Retorna el alumno activo con ese ID, o None si no existe.
+    """
+    conn = get_connection()
+    if conn is None:
+        raise ConnectionError("Error de conexión a la base de datos")
+    try:
+        cursor = conn.cursor(dictionary=True)
+        cursor.execute("SELECT * FROM alumnos WHERE id = %s AND activo = 1", (alumno_id,))
+        alumno = cursor.fetchone()
+        cursor.close()
+        return alumno
+    finally:
+        conn.close()
+
+
+# ============================
+# CACHÉ DE VALIDACIONES
+# ============================
+# Matrícula y evaluaciones validan al mismo alumno una y otra vez; el
+# resultado (también "no existe") se reutiliza unos segundos. Las escrituras
+# de este proceso invalidan la entrada y las de otros procesos se detectan
+# por la versión de la tabla alumnos.
+cache_validacion = Cache(
+    "validacion_alumnos", CACHE_CONFIG["alumnos_ttl"],
+    tabla="alumnos", max_entradas=CACHE_CONFIG["alumnos_max"]
+)
+
+
+def _consultar_alumno_validacion(alumno_id):
+    conn = get_connection()
+    if conn is None:
+        raise ConnectionError("Error de conexión a la base de datos")
+    try:
+        cursor = conn.cursor(dictionary=True)
+        cursor.execute("SELECT id, nombre, apellido, ciclo_actual FROM alumnos WHERE id=%s AND activo=1", (alumno_id,))
+        alumno = cursor.fetchone()
+        cursor.close()
+        return alumno
+    finally:
+        conn.close()
+
+
+def servicio_validar_alumno(alumno_id):
+    """
+    Retorna {"existe": True, "alumno": {...}} si el alumno está activo,
+    o None si no existe.
+    """
+    alumno = cache_validacion.obtener(alumno_id, lambda: _consultar_alumno_validacion(alumno_id))
+    # Copia: el llamador puede modificar el dict sin alterar la caché
+    return {"existe": True, "alumno": dict(alumno)} if alumno else None
+
+
+def servicio_validar_alumnos(ids):
+    """
+    Valida varios alumnos con una sola consulta (WHERE id IN (...)).
+    Retorna {"alumnos": [...], "no_encontrados": [ids inexistentes o inactivos]}.
+    """
+    ids = list(dict.fromkeys(ids))
+    if not ids:
+        return {"alumnos": [], "no_encontrados": []}
+
+    conn = get_connection()
+    if conn is None:
+        raise ConnectionError("Error de conexión a la base de datos")
+    try:
+        cursor = conn.cursor(dictionary=True)
+        placeholders = ','.join(['%s'] * len(ids))
+        cursor.execute(
+            f"SELECT id, nombre, apellido, ciclo_actual FROM alumnos WHERE id IN ({placeholders}) AND activo=1",
+            tuple(ids)
+        )
+        encontrados = cursor.fetchall()
+        cursor.close()
+    finally:
+        conn.close()
+
+    ids_encontrados = {fila["id"] for fila in encontrados}
+    return {
+        "alumnos": encontrados,
+        "no_encontrados": [i for i in ids if i not in ids_encontrados]
+    }
+
+
+registrar_servicio_local("alumnos", "obtener", servicio_obtener_alumno)
+registrar_servicio_local("alumnos", "validar", servicio_validar_alumno)
+registrar_servicio_local("alumnos", "validar_lote", servicio_validar_alumnos)
+
+
 # ============================
 # GET: LISTAR ALUMNOS
 # ============================
 @alumnos_bp.route("", methods=["GET"])
+@condicional("alumnos")
 def listar_alumnos():
-    iniciar_medicion()
     registrar_log("alumnos", "INFO", "=== INICIO: Listar alumnos activos ===")
 
+    paginar = paginacion_solicitada()
+    if paginar:
+        try:
+            limite, despues = leer_parametros(1)
+        except ErrorPaginacion as e:
+            registrar_log("alumnos", "WARN", f"Parámetros de paginación inválidos: {str(e)}")
+            return jsonify({"error": str(e)}), 400
+
     conn = get_connection()
     if conn is None:
         registrar_log("alumnos", "ERROR", "No se pudo conectar a la BD")
-        finalizar_medicion()
         return jsonify({"error": "Error de conexión a la base de datos"}), 500
 
     try:
         cursor = conn.cursor(dictionary=True)
-        cursor.execute("SELECT * FROM alumnos WHERE activo = 1")
+        sql = "SELECT * FROM alumnos WHERE activo = 1"
+        params = []
+        if paginar and despues:
+            condicion, params = condicion_keyset(["id"], despues)
+            sql += f" AND {condicion}"
+        sql += " ORDER BY id"
+        if paginar:
+            sql += " LIMIT %s"
+            params.append(limite + 1)
+        cursor.execute(sql, tuple(params))
         data = cursor.fetchall()
 
-        registrar_log("alumnos", "INFO", f"Alumnos recuperados exitosamente: {len(data)} registros")
+        if paginar:
+            data = armar_pagina(data, limite, ["id"])
+            registrar_log("alumnos", "INFO", f"Página de alumnos recuperada: {len(data['data'])} registros")
+        else:
+            registrar_log("alumnos", "INFO", f"Alumnos recuperados exitosamente: {len(data)} registros")
         registrar_log("alumnos", "INFO", "=== FIN: Listar alumnos activos ===")
-        finalizar_medicion()
         return jsonify(data), 200
 
     except Exception as e:
         registrar_log("alumnos", "ERROR", f"Excepción al listar alumnos: {str(e)}")
-        finalizar_medicion()
         return jsonify({"error": "Error interno al listar alumnos", "detalle": str(e)}), 500
 
     finally:
@@ -126,65 +245,46 @@ def listar_alumnos():
 # GET: OBTENER ALUMNO POR ID
 # ============================
 @alumnos_bp.route("/<int:alumno_id>", methods=["GET"])
+@condicional("alumnos")
 def obtener_alumno(alumno_id):
-    iniciar_medicion()
     registrar_log("alumnos", "INFO", f"=== INICIO: Obtener alumno ID={alumno_id} ===")
 
-    conn = get_connection()
-    if conn is None:
-        registrar_log("alumnos", "ERROR", "Error de conexión a BD")
-        finalizar_medicion()
-        return jsonify({"error": "Error en BD"}), 500
-
     try:
-        cursor = conn.cursor(dictionary=True)
-        cursor.execute("SELECT * FROM alumnos WHERE id = %s AND activo = 1", (alumno_id,))
-        alumno = cursor.fetchone()
+        alumno = servicio_obtener_alumno(alumno_id)
 
         if alumno is None:
             registrar_log("alumnos", "WARN", f"Alumno ID={alumno_id} no encontrado o inactivo")
-            finalizar_medicion()
             return jsonify({"error": "Alumno no encontrado"}), 404
 
         registrar_log("alumnos", "INFO", f"Alumno ID={alumno_id} recuperado: {alumno['nombre']} {alumno['apellido']}")
         registrar_log("alumnos", "INFO", f"=== FIN: Obtener alumno ID={alumno_id} ===")
-        finalizar_medicion()
         return jsonify(alumno), 200
 
     except Exception as e:
         registrar_log("alumnos", "ERROR", f"Excepción al obtener alumno: {str(e)}")
-        finalizar_medicion()
         return jsonify({"error": "Error interno", "detalle": str(e)}), 500
 
-    finally:
-        cursor.close()
-        conn.close()
-
 
 # ============================
 # POST: CREAR ALUMNO
 # ============================
 @alumnos_bp.route("", methods=["POST"])
 def crear_alumno():
-    iniciar_medicion()
     registrar_log("alumnos", "INFO", "=== INICIO: Crear nuevo alumno ===")
 
     data = request.get_json()
     if not data:
         registrar_log("alumnos", "WARN", "Request sin datos JSON o datos inválidos")
-        finalizar_medicion()
         return jsonify({"error": "Datos inválidos"}), 400
 
     errores = validar_alumno(data)
     if errores:
         registrar_log("alumnos", "WARN", f"Validación fallida al crear alumno: {', '.join(errores)}")
-        finalizar_medicion()
         return jsonify({"errores": errores}), 400
 
     conn = get_connection()
     if conn is None:
         registrar_log("alumnos", "ERROR", "Error al conectar a BD")
-        finalizar_medicion()
         return jsonify({"error": "Error en BD"}), 500
 
     try:
@@ -196,18 +296,19 @@ def crear_alumno():
             data["nombre"], data["apellido"], data.get("edad"), data["dni"],
             data.get("correo"), data.get("telefono"), data.get("ciclo_actual", 1)
         ))
-        conn.commit()
-
         nuevo_id = cursor.lastrowid
+        incrementar_version(cursor, "alumnos")
+        confirmar(conn)
+        # Puede haber un "no existe" guardado para este ID
+        cache_validacion.invalidar(nuevo_id)
+
         registrar_log("alumnos", "INFO", f"Alumno creado exitosamente - ID={nuevo_id}, DNI={data['dni']}, Nombre={data['nombre']} {data['apellido']}")
         registrar_log("alumnos", "INFO", "=== FIN: Crear nuevo alumno ===")
-        finalizar_medicion()
 
         return jsonify({"mensaje": "Alumno creado", "id": nuevo_id}), 201
 
     except Exception as e:
         registrar_log("alumnos", "ERROR", f"Excepción al crear alumno: {str(e)}")
-        finalizar_medicion()
         return jsonify({"error": "Error en BD", "detalle": str(e)}), 500
 
     finally:
@@ -220,25 +321,21 @@ def crear_alumno():
 # ============================
 @alumnos_bp.route("/<int:alumno_id>", methods=["PUT"])
 def actualizar_alumno(alumno_id):
-    iniciar_medicion()
     registrar_log("alumnos", "INFO", f"=== INICIO: Actualizar alumno ID={alumno_id} ===")
 
     data = request.get_json()
     if not data:
         registrar_log("alumnos", "WARN", "Request sin datos JSON")
-        finalizar_medicion()
         return jsonify({"error": "Datos inválidos"}), 400
 
     errores = validar_alumno(data)
     if errores:
         registrar_log("alumnos", "WARN", f"Validación fallida al actualizar alumno: {', '.join(errores)}")
-        finalizar_medicion()
         return jsonify({"errores": errores}), 400
 
     conn = get_connection()
     if conn is None:
         registrar_log("alumnos", "ERROR", "Error de conexión a BD")
-        finalizar_medicion()
         return jsonify({"error": "Error en BD"}), 500
 
     try:
@@ -252,22 +349,23 @@ def actualizar_alumno(alumno_id):
             data.get("correo"), data.get("telefono"), data.get("ciclo_actual", 1),
             alumno_id
         ))
-        conn.commit()
 
         if cursor.rowcount == 0:
+            conn.rollback()
             registrar_log("alumnos", "WARN", f"Alumno ID={alumno_id} no encontrado para actualización")
-            finalizar_medicion()
             return jsonify({"error": "Alumno no encontrado"}), 404
 
+        incrementar_version(cursor, "alumnos")
+        confirmar(conn)
+        cache_validacion.invalidar(alumno_id)
+
         registrar_log("alumnos", "INFO", f"Alumno actualizado exitosamente - ID={alumno_id}, Nombre={data['nombre']} {data['apellido']}")
         registrar_log("alumnos", "INFO", f"=== FIN: Actualizar alumno ID={alumno_id} ===")
-        finalizar_medicion()
 
         return jsonify({"mensaje": "Alumno actualizado"}), 200
 
     except Exception as e:
         registrar_log("alumnos", "ERROR", f"Excepción al actualizar alumno: {str(e)}")
-        finalizar_medicion()
         return jsonify({"error": "Error en BD", "detalle": str(e)}), 500
 
     finally:
@@ -280,34 +378,33 @@ def actualizar_alumno(alumno_id):
 # ============================
 @alumnos_bp.route("/<int:alumno_id>", methods=["DELETE"])
 def eliminar_alumno(alumno_id):
-    iniciar_medicion()
     registrar_log("alumnos", "INFO", f"=== INICIO: Eliminar alumno ID={alumno_id} ===")
 
     conn = get_connection()
     if conn is None:
         registrar_log("alumnos", "ERROR", "Error de conexión a BD")
-        finalizar_medicion()
         return jsonify({"error": "Error en BD"}), 500
 
     try:
         cursor = conn.cursor()
         cursor.execute("UPDATE alumnos SET activo = 0 WHERE id = %s", (alumno_id,))
-        conn.commit()
 
         if cursor.rowcount == 0:
+            conn.rollback()
             registrar_log("alumnos", "WARN", f"Alumno ID={alumno_id} no encontrado para eliminación")
-            finalizar_medicion()
             return jsonify({"error": "Alumno no encontrado"}), 404
 
+        incrementar_version(cursor, "alumnos")
+        confirmar(conn)
+        cache_validacion.invalidar(alumno_id)
+
         registrar_log("alumnos", "INFO", f"Alumno marcado como inactivo exitosamente - ID={alumno_id}")
         registrar_log("alumnos", "INFO", f"=== FIN: Eliminar alumno ID={alumno_id} ===")
-        finalizar_medicion()
 
         return jsonify({"mensaje": "Alumno eliminado correctamente"}), 200
 
     except Exception as e:
         registrar_log("alumnos", "ERROR", f"Excepción al eliminar alumno: {str(e)}")
-        finalizar_medicion()
         return jsonify({"error": "Error al eliminar alumno", "detalle": str(e)}), 500
 
     finally:
@@ -324,30 +421,16 @@ def validar_alumno_existe(alumno_id):
     Servicio simple para validar si un alumno existe.
     Usado por otros servicios (matrícula, evaluación).
     """
-    iniciar_medicion()
     registrar_log("alumnos", "INFO", f"=== VALIDAR: Alumno ID={alumno_id} ===")
     
-    conn = get_connection()
-    if conn is None:
-        registrar_log("alumnos", "ERROR", "Error de conexión a BD")
-        finalizar_medicion()
-        return jsonify({"error": "Error en BD"}), 500
-    
     try:
-        cursor = conn.cursor(dictionary=True)
-        cursor.execute("SELECT id, nombre, apellido, ciclo_actual FROM alumnos WHERE id=%s AND activo=1", (alumno_id,))
-        alumno = cursor.fetchone()
+        resultado = servicio_validar_alumno(alumno_id)
         
-        if alumno:
+        if resultado:
             registrar_log("alumnos", "INFO", f"Alumno ID={alumno_id} existe y está activo")
-            finalizar_medicion()
-            return jsonify({
-                "existe": True,
-                "alumno": alumno
-            }), 200
+            return jsonify(resultado), 200
         else:
             registrar_log("alumnos", "WARN", f"Alumno ID={alumno_id} no encontrado")
-            finalizar_medicion()
             return jsonify({
                 "existe": False,
                 "mensaje": "Alumno no encontrado"
@@ -355,9 +438,35 @@ def validar_alumno_existe(alumno_id):
             
     except Exception as e:
         registrar_log("alumnos", "ERROR", f"Error al validar alumno: {str(e)}")
-        finalizar_medicion()
         return jsonify({"error": str(e)}), 500
-        
-    finally:
-        cursor.close()
-        conn.close()
\ No newline at end of file
+
+
+# ============================
+# VALIDAR VARIOS ALUMNOS (LOTE)
+# ============================
+@alumnos_bp.route("/validar", methods=["GET"])
+def validar_alumnos_lote():
+    """
+    Valida varios alumnos en una sola consulta: /api/alumnos/validar?ids=1,2,3
+    Usado por otros servicios (matrícula) para no validar uno por uno.
+    """
+    registrar_log("alumnos", "INFO", "=== VALIDAR LOTE: Alumnos ===")
+
+    try:
+        ids = [int(x) for x in request.args.get("ids", "").split(",") if x.strip()]
+    except ValueError:
+        registrar_log("alumnos", "WARN", f"Parámetro ids inválido: {request.args.get('ids')}")
+        return jsonify({"error": "El parámetro ids debe ser una lista de números separados por comas"}), 400
+
+    if not ids:
+        registrar_log("alumnos", "WARN", "Validación en lote sin ids")
+        return jsonify({"error": "Debe indicar al menos un id"}), 400
+
+    try:
+        resultado = servicio_validar_alumnos(ids)
+        registrar_log("alumnos", "INFO", f"Lote validado: {len(resultado['alumnos'])} encontrados, {len(resultado['no_encontrados'])} no encontrados")
+        return jsonify(resultado), 200
+
+    except Exception as e:
+        registrar_log("alumnos", "ERROR", f"Error al validar lote de alumnos: {str(e)}")
+        return jsonify({"error": str(e)}), 500
\ No newline at end of file
@@ -1,6 +1,15 @@
 from flask import Blueprint, request, jsonify
 from db import get_connection
-from utils.logger import registrar_log, iniciar_medicion, finalizar_medicion
+from utils.logger import registrar_log
+from utils.service_client import registrar_servicio_local
+from utils.paginacion import (
+    ErrorPaginacion, paginacion_solicitada, leer_parametros, armar_pagina
+)
+from utils.cache import Cache
+from utils.condicional import condicional
+from utils.resumen_ciclo import ajustar_creditos_en_resumen
+from utils.versiones import confirmar, incrementar_version
+from config import CACHE_CONFIG
 
 cursos_bp = Blueprint("cursos_bp", __name__, url_prefix="/api/cursos")
 
@@ -27,102 +36,159 @@ def validar_curso(data):
 
 
 # ============================
-# GET: LISTAR CURSOS
+# CATÁLOGO EN CACHÉ
 # ============================
-@cursos_bp.route("", methods=["GET"])
-def listar_cursos():
-    iniciar_medicion()
-    registrar_log("cursos", "INFO", "=== INICIO: Listar cursos activos ===")
+# El catálogo de cursos activos se lee de la BD una vez y se reutiliza hasta
+# que vence el TTL, cambia la versión de la tabla cursos (escritura de otro
+# proceso) o se invalida tras crear/actualizar/eliminar un curso.
+cache_catalogo = Cache("catalogo_cursos", CACHE_CONFIG["catalogo_ttl"], tabla="cursos")
+
+CAMPOS_VALIDACION = ("id", "codigo", "nombre", "ciclo", "creditos")
+
 
+def _cargar_catalogo():
     conn = get_connection()
     if conn is None:
-        registrar_log("cursos", "ERROR", "No se pudo conectar a la BD")
-        finalizar_medicion()
-        return jsonify({"error": "Error de conexión a la base de datos"}), 500
-
+        raise ConnectionError("Error de conexión a la base de datos")
     try:
         cursor = conn.cursor(dictionary=True)
         cursor.execute("SELECT * FROM cursos WHERE activo = 1 ORDER BY ciclo, codigo")
-        data = cursor.fetchall()
+        cursos = cursor.fetchall()
+        cursor.close()
+    finally:
+        conn.close()
+    return {"lista": cursos, "por_id": {curso["id"]: curso for curso in cursos}}
+
+
+def obtener_catalogo():
+    """Retorna {"lista": [cursos activos por ciclo y código], "por_id": {id: curso}}."""
+    return cache_catalogo.obtener("activos", _cargar_catalogo)
+
+
+def _datos_validacion(curso):
+    return {campo: curso[campo] for campo in CAMPOS_VALIDACION}
+
+
+# ============================
+# SERVICIOS (consumidos por otros módulos)
+# ============================
+def servicio_obtener_curso(curso_id):
+    """
+    Retorna el curso activo con ese ID, o None si no existe.
+    """
+    return obtener_catalogo()["por_id"].get(curso_id)
+
 
-        registrar_log("cursos", "INFO", f"Cursos recuperados exitosamente: {len(data)} registros")
+def servicio_validar_curso(curso_id):
+    """
+    Retorna {"existe": True, "curso": {...}} si el curso está activo,
+    o None si no existe.
+    """
+    curso = obtener_catalogo()["por_id"].get(curso_id)
+    return {"existe": True, "curso": _datos_validacion(curso)} if curso else None
+
+
+def servicio_validar_cursos(ids):
+    """
+    Valida varios cursos contra el catálogo.
+    Retorna {"cursos": [...], "no_encontrados": [ids inexistentes o inactivos]}.
+    """
+    ids = list(dict.fromkeys(ids))
+    por_id = obtener_catalogo()["por_id"] if ids else {}
+    return {
+        "cursos": [_datos_validacion(por_id[i]) for i in ids if i in por_id],
+        "no_encontrados": [i for i in ids if i not in por_id]
+    }
+
+
+registrar_servicio_local("cursos", "obtener", servicio_obtener_curso)
+registrar_servicio_local("cursos", "validar", servicio_validar_curso)
+registrar_servicio_local("cursos", "validar_lote", servicio_validar_cursos)
+
+
+# ============================
+# GET: LISTAR CURSOS
+# ============================
+@cursos_bp.route("", methods=["GET"])
+@condicional("cursos")
+def listar_cursos():
+    registrar_log("cursos", "INFO", "=== INICIO: Listar cursos activos ===")
+
+    paginar = paginacion_solicitada()
+    if paginar:
+        try:
+            limite, despues = leer_parametros(2)
+        except ErrorPaginacion as e:
+            registrar_log("cursos", "WARN", f"Parámetros de paginación inválidos: {str(e)}")
+            return jsonify({"error": str(e)}), 400
+
+    try:
+        data = obtener_catalogo()["lista"]
+
+        if paginar:
+            if despues:
+                clave = tuple(despues)
+                data = [c for c in data if (c["ciclo"], c["codigo"]) > clave]
+            data = armar_pagina(data[:limite + 1], limite, ["ciclo", "codigo"])
+            registrar_log("cursos", "INFO", f"Página de cursos recuperada: {len(data['data'])} registros")
+        else:
+            registrar_log("cursos", "INFO", f"Cursos recuperados exitosamente: {len(data)} registros")
         registrar_log("cursos", "INFO", "=== FIN: Listar cursos activos ===")
-        finalizar_medicion()
         return jsonify(data), 200
 
+    except ConnectionError:
+        registrar_log("cursos", "ERROR", "No se pudo conectar a la BD")
+        return jsonify({"error": "Error de conexión a la base de datos"}), 500
+
     except Exception as e:
         registrar_log("cursos", "ERROR", f"Excepción al listar cursos: {str(e)}")
-        finalizar_medicion()
         return jsonify({"error": "Error interno al listar cursos"}), 500
 
-    finally:
-        cursor.close()
-        conn.close()
-
 
 # ============================
 # GET: OBTENER CURSO POR ID
 # ============================
 @cursos_bp.route("/<int:curso_id>", methods=["GET"])
+@condicional("cursos")
 def obtener_curso(curso_id):
-    iniciar_medicion()
     registrar_log("cursos", "INFO", f"=== INICIO: Obtener curso ID={curso_id} ===")
 
-    conn = get_connection()
-    if conn is None:
-        registrar_log("cursos", "ERROR", "Error de conexión a BD")
-        finalizar_medicion()
-        return jsonify({"error": "Error de BD"}), 500
-
     try:
-        cursor = conn.cursor(dictionary=True)
-        cursor.execute("SELECT * FROM cursos WHERE id = %s AND activo = 1", (curso_id,))
-        curso = cursor.fetchone()
+        curso = servicio_obtener_curso(curso_id)
 
         if curso is None:
             registrar_log("cursos", "WARN", f"Curso ID={curso_id} no encontrado o inactivo")
-            finalizar_medicion()
             return jsonify({"error": "Curso no encontrado"}), 404
 
         registrar_log("cursos", "INFO", f"Curso ID={curso_id} recuperado: {curso['codigo']} - {curso['nombre']}")
         registrar_log("cursos", "INFO", f"=== FIN: Obtener curso ID={curso_id} ===")
-        finalizar_medicion()
         return jsonify(curso), 200
 
     except Exception as e:
         registrar_log("cursos", "ERROR", f"Excepción al obtener curso: {str(e)}")
-        finalizar_medicion()
         return jsonify({"error": "Error interno"}), 500
 
-    finally:
-        cursor.close()
-        conn.close()
-
 
 # ============================
 # POST: CREAR CURSO
 # ============================
 @cursos_bp.route("", methods=["POST"])
 def crear_curso():
-    iniciar_medicion()
     registrar_log("cursos", "INFO", "=== INICIO: Crear nuevo curso ===")
 
     data = request.get_json()
     if not data:
         registrar_log("cursos", "WARN", "Request sin datos JSON o datos inválidos")
-        finalizar_medicion()
         return jsonify({"error": "Datos inválidos"}), 400
 
     errores = validar_curso(data)
     if errores:
         registrar_log("cursos", "WARN", f"Validación fallida al crear curso: {', '.join(errores)}")
-        finalizar_medicion()
         return jsonify({"errores": errores}), 400
 
     conn = get_connection()
     if conn is None:
         registrar_log("cursos", "ERROR", "Error al conectar a BD")
-        finalizar_medicion()
         return jsonify({"error": "Error al conectar BD"}), 500
 
     try:
@@ -133,18 +199,18 @@ def crear_curso():
         """, (
             data["codigo"], data["nombre"], data["creditos"], data["ciclo"]
         ))
-        conn.commit()
-
         nuevo_id = cursor.lastrowid
+        incrementar_version(cursor, "cursos")
+        confirmar(conn)
+        cache_catalogo.invalidar()
+
         registrar_log("cursos", "INFO", f"Curso creado exitosamente - ID={nuevo_id}, Código={data['codigo']}, Nombre={data['nombre']}")
         registrar_log("cursos", "INFO", "=== FIN: Crear nuevo curso ===")
-        finalizar_medicion()
 
         return jsonify({"mensaje": "Curso creado", "id": nuevo_id}), 201
 
     except Exception as e:
         registrar_log("cursos", "ERROR", f"Excepción al crear curso: {str(e)}")
-        finalizar_medicion()
         return jsonify({"error": "Error en BD"}), 500
 
     finally:
@@ -157,29 +223,35 @@ def crear_curso():
 # ============================
 @cursos_bp.route("/<int:curso_id>", methods=["PUT"])
 def actualizar_curso(curso_id):
-    iniciar_medicion()
     registrar_log("cursos", "INFO", f"=== INICIO: Actualizar curso ID={curso_id} ===")
 
     data = request.get_json()
     if not data:
         registrar_log("cursos", "WARN", "Request sin datos JSON")
-        finalizar_medicion()
         return jsonify({"error": "Datos inválidos"}), 400
 
     errores = validar_curso(data)
     if errores:
         registrar_log("cursos", "WARN", f"Validación fallida al actualizar: {', '.join(errores)}")
-        finalizar_medicion()
         return jsonify({"errores": errores}), 400
 
     conn = get_connection()
     if conn is None:
         registrar_log("cursos", "ERROR", "Error de conexión a BD")
-        finalizar_medicion()
         return jsonify({"error": "Error BD"}), 500
 
     try:
         cursor = conn.cursor()
+        # La fila del curso se bloquea antes de tocar resumen_ciclo: las
+        # matrículas leen sus créditos con FOR SHARE en el mismo orden
+        cursor.execute("SELECT id FROM cursos WHERE id=%s FOR UPDATE", (curso_id,))
+        if cursor.fetchone() is None:
+            conn.rollback()
+            registrar_log("cursos", "WARN", f"Curso ID={curso_id} no encontrado para actualización")
+            return jsonify({"error": "Curso no encontrado"}), 404
+
+        # Antes del UPDATE: el ajuste usa los créditos anteriores del curso
+        ajustar_creditos_en_resumen(conn, curso_id, data["creditos"])
         cursor.execute("""
             UPDATE cursos 
             SET codigo=%s, nombre=%s, creditos=%s, ciclo=%s
@@ -188,22 +260,23 @@ def actualizar_curso(curso_id):
             data["codigo"], data["nombre"], data["creditos"], data["ciclo"],
             curso_id
         ))
-        conn.commit()
 
         if cursor.rowcount == 0:
+            conn.rollback()
             registrar_log("cursos", "WARN", f"Curso ID={curso_id} no encontrado para actualización")
-            finalizar_medicion()
             return jsonify({"error": "Curso no encontrado"}), 404
 
+        incrementar_version(cursor, "cursos")
+        confirmar(conn)
+        cache_catalogo.invalidar()
+
         registrar_log("cursos", "INFO", f"Curso actualizado exitosamente - ID={curso_id}, Código={data['codigo']}")
         registrar_log("cursos", "INFO", f"=== FIN: Actualizar curso ID={curso_id} ===")
-        finalizar_medicion()
 
         return jsonify({"mensaje": "Curso actualizado"}), 200
 
     except Exception as e:
         registrar_log("cursos", "ERROR", f"Excepción al actualizar curso: {str(e)}")
-        finalizar_medicion()
         return jsonify({"error": "Error en BD"}), 500
 
     finally:
@@ -216,34 +289,33 @@ def actualizar_curso(curso_id):
 # ============================
 @cursos_bp.route("/<int:curso_id>", methods=["DELETE"])
 def eliminar_curso(curso_id):
-    iniciar_medicion()
     registrar_log("cursos", "INFO", f"=== INICIO: Eliminar curso ID={curso_id} ===")
 
     conn = get_connection()
     if conn is None:
         registrar_log("cursos", "ERROR", "Error de conexión a BD")
-        finalizar_medicion()
         return jsonify({"error": "Error BD"}), 500
 
     try:
         cursor = conn.cursor()
         cursor.execute("UPDATE cursos SET activo = 0 WHERE id = %s", (curso_id,))
-        conn.commit()
 
         if cursor.rowcount == 0:
+            conn.rollback()
             registrar_log("cursos", "WARN", f"Curso ID={curso_id} no encontrado para eliminación")
-            finalizar_medicion()
             return jsonify({"error": "Curso no encontrado"}), 404
 
+        incrementar_version(cursor, "cursos")
+        confirmar(conn)
+        cache_catalogo.invalidar()
+
         registrar_log("cursos", "INFO", f"Curso marcado como inactivo exitosamente - ID={curso_id}")
         registrar_log("cursos", "INFO", f"=== FIN: Eliminar curso ID={curso_id} ===")
-        finalizar_medicion()
 
         return jsonify({"mensaje": "Curso eliminado correctamente"}), 200
 
     except Exception as e:
         registrar_log("cursos", "ERROR", f"Excepción al eliminar curso: {str(e)}")
-        finalizar_medicion()
         return jsonify({"error": "Error al eliminar curso"}), 500
 
     finally:
@@ -260,30 +332,16 @@ def validar_curso_existe(curso_id):
     Servicio simple para validar si un curso existe.
     Usado por otros servicios (matrícula, evaluación).
     """
-    iniciar_medicion()
     registrar_log("cursos", "INFO", f"=== VALIDAR: Curso ID={curso_id} ===")
     
-    conn = get_connection()
-    if conn is None:
-        registrar_log("cursos", "ERROR", "Error de conexión a BD")
-        finalizar_medicion()
-        return jsonify({"error": "Error en BD"}), 500
-    
     try:
-        cursor = conn.cursor(dictionary=True)
-        cursor.execute("SELECT id, codigo, nombre, ciclo, creditos FROM cursos WHERE id=%s AND activo=1", (curso_id,))
-        curso = cursor.fetchone()
+        resultado = servicio_validar_curso(curso_id)
         
-        if curso:
+        if resultado:
             registrar_log("cursos", "INFO", f"Curso ID={curso_id} existe y está activo")
-            finalizar_medicion()
-            return jsonify({
-                "existe": True,
-                "curso": curso
-            }), 200
+            return jsonify(resultado), 200
         else:
             registrar_log("cursos", "WARN", f"Curso ID={curso_id} no encontrado")
-            finalizar_medicion()
             return jsonify({
                 "existe": False,
                 "mensaje": "Curso no encontrado"
@@ -291,9 +349,35 @@ def validar_curso_existe(curso_id):
             
     except Exception as e:
         registrar_log("cursos", "ERROR", f"Error al validar curso: {str(e)}")
-        finalizar_medicion()
         return jsonify({"error": str(e)}), 500
-        
-    finally:
-        cursor.close()
-        conn.close()
\ No newline at end of file
+
+
+# ============================
+# VALIDAR VARIOS CURSOS (LOTE)
+# ============================
+@cursos_bp.route("/validar", methods=["GET"])
+def validar_cursos_lote():
+    """
+    Valida varios cursos en una sola consulta: /api/cursos/validar?ids=1,2,3
+    Usado por otros servicios (matrícula) para no validar uno por uno.
+    """
+    registrar_log("cursos", "INFO", "=== VALIDAR LOTE: Cursos ===")
+
+    try:
+        ids = [int(x) for x in request.args.get("ids", "").split(",") if x.strip()]
+    except ValueError:
+        registrar_log("cursos", "WARN", f"Parámetro ids inválido: {request.args.get('ids')}")
+        return jsonify({"error": "El parámetro ids debe ser una lista de números separados por comas"}), 400
+
+    if not ids:
+        registrar_log("cursos", "WARN", "Validación en lote sin ids")
+        return jsonify({"error": "Debe indicar al menos un id"}), 400
+
+    try:
+        resultado = servicio_validar_cursos(ids)
+        registrar_log("cursos", "INFO", f"Lote validado: {len(resultado['cursos'])} encontrados, {len(resultado['no_encontrados'])} no encontrados")
+        return jsonify(resultado), 200
+
+    except Exception as e:
+        registrar_log("cursos", "ERROR", f"Error al validar lote de cursos: {str(e)}")
+        return jsonify({"error": str(e)}), 500
\ No newline at end of file
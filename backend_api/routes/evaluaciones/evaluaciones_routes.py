@@ -1,6 +1,16 @@
 from flask import Blueprint, request, jsonify
 from db import get_connection
-from utils.logger import generar_transaction_id, registrar_log, iniciar_medicion, finalizar_medicion
+from utils.logger import obtener_transaction_id, registrar_log
+from utils.service_client import llamar_servicio
+from utils.estado_academico import actualizar_estado_academico
+from utils.resumen_ciclo import registrar_evaluacion_en_resumen
+from utils.condicional import condicional
+from utils.ranking import registrar_cambio_nota
+from utils.versiones import confirmar, incrementar_version, incrementar_version_alumno, leer_version
+from utils.streaming import formato_streaming_solicitado, respuesta_streaming
+from utils.paginacion import (
+    ErrorPaginacion, paginacion_solicitada, leer_parametros, condicion_keyset, armar_pagina
+)
 import requests
 
 evaluaciones_bp = Blueprint("evaluaciones_bp", __name__, url_prefix="/api/evaluaciones")
@@ -15,14 +25,10 @@ def validar_matricula_con_servicio(id_matricula, transaction_id):
     transaction_id: ID para rastrear la transacción
     """
     try:
-        url = f"http://127.0.0.1:5000/api/matriculas/{id_matricula}"
-        headers = {"X-Transaction-ID": transaction_id}
-        
-        respuesta = requests.get(url, headers=headers, timeout=5)
+        respuesta = llamar_servicio("matriculas", "obtener", id_matricula, transaction_id)
         
         if respuesta.status_code == 200:
-            datos = respuesta.json()
-            return {"valido": True, "datos": datos}
+            return {"valido": True, "datos": respuesta.datos}
         elif respuesta.status_code == 404:
             return {"valido": False, "mensaje": "Matrícula no encontrada"}
         else:
@@ -37,37 +43,68 @@ def validar_matricula_con_servicio(id_matricula, transaction_id):
 # LISTAR EVALUACIONES
 # ============================
 @evaluaciones_bp.route("", methods=["GET"])
+@condicional("evaluaciones", "matriculas", "alumnos", "cursos")
 def listar():
-    iniciar_medicion()
     registrar_log("evaluaciones", "INFO", "=== INICIO: Listar evaluaciones ===")
     
+    try:
+        formato_stream = formato_streaming_solicitado()
+    except ValueError as e:
+        registrar_log("evaluaciones", "WARN", str(e))
+        return jsonify({"error": str(e)}), 400
+    
+    # La exportación en streaming devuelve todas las filas sin paginar
+    paginar = paginacion_solicitada() and formato_stream is None
+    if paginar:
+        try:
+            limite, despues = leer_parametros(2)
+        except ErrorPaginacion as e:
+            registrar_log("evaluaciones", "WARN", f"Parámetros de paginación inválidos: {str(e)}")
+            return jsonify({"error": str(e)}), 400
+    
+    sql = """
+        SELECT e.*, 
+               CONCAT(a.nombre,' ',a.apellido) as alumno, 
+               c.nombre as curso, 
+               c.codigo,
+               m.ciclo_original,
+               m.ciclo_matricula,
+               m.intento
+        FROM evaluaciones e
+        JOIN matriculas m ON e.id_matricula = m.id
+        JOIN alumnos a ON m.id_alumno = a.id
+        JOIN cursos c ON m.id_curso = c.id
+    """
+    
     conn = get_connection()
+    
+    if formato_stream:
+        registrar_log("evaluaciones", "INFO", f"Exportando evaluaciones en streaming ({formato_stream})")
+        return respuesta_streaming(conn, sql + " ORDER BY e.fecha_evaluacion DESC, e.id DESC", (), formato_stream)
+    
     try:
         cursor = conn.cursor(dictionary=True)
-        cursor.execute("""
-            SELECT e.*, 
-                   CONCAT(a.nombre,' ',a.apellido) as alumno, 
-                   c.nombre as curso, 
-                   c.codigo,
-                   m.ciclo_original,
-                   m.ciclo_matricula,
-                   m.intento
-            FROM evaluaciones e
-            JOIN matriculas m ON e.id_matricula = m.id
-            JOIN alumnos a ON m.id_alumno = a.id
-            JOIN cursos c ON m.id_curso = c.id
-            ORDER BY e.fecha_evaluacion DESC
-        """)
+        params = []
+        if paginar and despues:
+            condicion, params = condicion_keyset(["e.fecha_evaluacion", "e.id"], despues, descendente=True)
+            sql += f" WHERE {condicion}"
+        sql += " ORDER BY e.fecha_evaluacion DESC, e.id DESC"
+        if paginar:
+            sql += " LIMIT %s"
+            params.append(limite + 1)
+        cursor.execute(sql, tuple(params))
         
         evaluaciones = cursor.fetchall()
-        registrar_log("evaluaciones", "INFO", f"Evaluaciones recuperadas: {len(evaluaciones)} registros")
+        if paginar:
+            evaluaciones = armar_pagina(evaluaciones, limite, ["fecha_evaluacion", "id"])
+            registrar_log("evaluaciones", "INFO", f"Página de evaluaciones recuperada: {len(evaluaciones['data'])} registros")
+        else:
+            registrar_log("evaluaciones", "INFO", f"Evaluaciones recuperadas: {len(evaluaciones)} registros")
         registrar_log("evaluaciones", "INFO", "=== FIN: Listar evaluaciones ===")
-        finalizar_medicion()
         
         return jsonify(evaluaciones)
     except Exception as e:
         registrar_log("evaluaciones", "ERROR", f"Error al listar evaluaciones: {str(e)}")
-        finalizar_medicion()
         return jsonify({"error": str(e)}), 500
     finally:
         if conn: conn.close()
@@ -76,8 +113,8 @@ def listar():
 # LISTAR MATRÍCULAS PENDIENTES DE EVALUACIÓN
 # ============================
 @evaluaciones_bp.route("/pendientes", methods=["GET"])
+@condicional("evaluaciones", "matriculas", "alumnos", "cursos")
 def pendientes():
-    iniciar_medicion()
     registrar_log("evaluaciones", "INFO", "=== INICIO: Listar matrículas pendientes ===")
     
     conn = get_connection()
@@ -102,12 +139,10 @@ def pendientes():
         pendientes = cursor.fetchall()
         registrar_log("evaluaciones", "INFO", f"Matrículas pendientes: {len(pendientes)} registros")
         registrar_log("evaluaciones", "INFO", "=== FIN: Listar matrículas pendientes ===")
-        finalizar_medicion()
         
         return jsonify(pendientes)
     except Exception as e:
         registrar_log("evaluaciones", "ERROR", f"Error al listar pendientes: {str(e)}")
-        finalizar_medicion()
         return jsonify({"error": str(e)}), 500
     finally:
         if conn: conn.close()
@@ -116,9 +151,9 @@ def pendientes():
 # OBTENER EVALUACIÓN POR ID
 # ============================
 @evaluaciones_bp.route("/<int:id>", methods=["GET"])
+@condicional("evaluaciones", "matriculas", "alumnos", "cursos")
 def obtener(id):
     """Obtener una evaluación específica por ID"""
-    iniciar_medicion()
     registrar_log("evaluaciones", "INFO", f"=== INICIO: Obtener evaluación ID={id} ===")
     
     conn = get_connection()
@@ -142,17 +177,14 @@ def obtener(id):
         
         if not evaluacion:
             registrar_log("evaluaciones", "WARN", f"Evaluación ID={id} no encontrada")
-            finalizar_medicion()
             return jsonify({"error": "Evaluación no encontrada"}), 404
         
         registrar_log("evaluaciones", "INFO", f"Evaluación ID={id} recuperada exitosamente")
         registrar_log("evaluaciones", "INFO", f"=== FIN: Obtener evaluación ID={id} ===")
-        finalizar_medicion()
         
         return jsonify(evaluacion), 200
     except Exception as e:
         registrar_log("evaluaciones", "ERROR", f"Error al obtener evaluación: {str(e)}")
-        finalizar_medicion()
         return jsonify({"error": str(e)}), 500
     finally:
         if conn: conn.close()
@@ -177,10 +209,9 @@ def crear():
         return jsonify({"error": "La nota debe estar entre 0 y 20"}), 400
     
     # Generar Transaction ID y iniciar logging
-    transaction_id = generar_transaction_id()
-    iniciar_medicion()
+    transaction_id = obtener_transaction_id()
     registrar_log("evaluaciones", "INFO", "=== INICIO: Crear evaluación ===")
-    registrar_log("evaluaciones", "INFO", f"Transaction ID generado: {transaction_id}")
+    registrar_log("evaluaciones", "INFO", f"Transaction ID: {transaction_id}")
     registrar_log("evaluaciones", "INFO", f"Matrícula ID={data['id_matricula']}, Nota={nota}")
     
     # Validar matrícula con servicio
@@ -189,7 +220,6 @@ def crear():
     
     if not validacion["valido"]:
         registrar_log("evaluaciones", "ERROR", f"Matrícula ID={data['id_matricula']} no válida: {validacion['mensaje']}")
-        finalizar_medicion()
         return jsonify({"error": validacion["mensaje"]}), 404
     
     registrar_log("evaluaciones", "INFO", f"[{transaction_id}] Matrícula ID={data['id_matricula']} validada exitosamente")
@@ -205,7 +235,6 @@ def crear():
         cursor.execute("SELECT id FROM evaluaciones WHERE id_matricula=%s", (data['id_matricula'],))
         if cursor.fetchone():
             registrar_log("evaluaciones", "WARN", f"Matrícula ID={data['id_matricula']} ya tiene evaluación")
-            finalizar_medicion()
             return jsonify({"error": "Esta matrícula ya tiene nota registrada"}), 400
 
         # Insertar evaluación
@@ -215,18 +244,34 @@ def crear():
         # Actualizar estado de matrícula
         cursor.execute("UPDATE matriculas SET estado=%s WHERE id=%s", (estado, data['id_matricula']))
         
-        conn.commit()
+        # Actualizar proyección de estado académico
+        matricula = validacion["datos"]
+        actualizar_estado_academico(conn, matricula["id_alumno"], matricula["id_curso"])
+        registrar_evaluacion_en_resumen(conn, matricula["ciclo_matricula"], None, 1 if nota >= 10.5 else 0)
+        
+        cursor.execute(
+            "SELECT c.creditos, a.activo FROM cursos c JOIN alumnos a ON a.id = %s WHERE c.id = %s",
+            (matricula["id_alumno"], matricula["id_curso"])
+        )
+        creditos, activo = cursor.fetchone()
+        
+        # También cambia el estado de la matrícula
+        incrementar_version(cursor, "evaluaciones", "matriculas")
+        incrementar_version_alumno(cursor, matricula["id_alumno"])
+        version = leer_version(cursor, "evaluaciones")
+        confirmar(conn)
+        
+        # Orden de mérito del ciclo: el alumno suma esta nota
+        registrar_cambio_nota(matricula["ciclo_matricula"], matricula["id_alumno"], round(nota, 2) * creditos, creditos, version, activo)
         
         registrar_log("evaluaciones", "INFO", f"✅ Evaluación creada: Matrícula={data['id_matricula']}, Nota={nota}, Estado={estado}")
         registrar_log("evaluaciones", "INFO", "=== FIN: Crear evaluación ===")
-        finalizar_medicion()
         
         return jsonify({"mensaje": "Evaluación guardada correctamente"}), 201
         
     except Exception as e:
         conn.rollback()
         registrar_log("evaluaciones", "ERROR", f"Excepción al crear evaluación: {str(e)}")
-        finalizar_medicion()
         return jsonify({"error": f"Error al guardar evaluación: {str(e)}"}), 500
     finally:
         if conn: conn.close()
@@ -249,7 +294,6 @@ def editar(id):
     if nota < 0 or nota > 20:
         return jsonify({"error": "La nota debe estar entre 0 y 20"}), 400
     
-    iniciar_medicion()
     registrar_log("evaluaciones", "INFO", f"=== INICIO: Actualizar evaluación ID={id} ===")
     registrar_log("evaluaciones", "INFO", f"Nueva nota={nota}")
     
@@ -260,16 +304,26 @@ def editar(id):
     try:
         cursor = conn.cursor()
         
-        # Obtener id_matricula de esta evaluación
-        cursor.execute("SELECT id_matricula FROM evaluaciones WHERE id=%s", (id,))
+        # Obtener matrícula (y alumno/curso) de esta evaluación. La fila queda
+        # bloqueada: otra edición concurrente espera y lee la nota ya cambiada,
+        # así los deltas del resumen y del orden de mérito no se duplican
+        cursor.execute("""
+            SELECT e.id_matricula, m.id_alumno, m.id_curso, m.ciclo_matricula, e.aprobado,
+                   e.nota, c.creditos, a.activo
+            FROM evaluaciones e
+            JOIN matriculas m ON e.id_matricula = m.id
+            JOIN cursos c ON m.id_curso = c.id
+            JOIN alumnos a ON m.id_alumno = a.id
+            WHERE e.id=%s
+            FOR UPDATE OF e
+        """, (id,))
         row = cursor.fetchone()
         
         if not row:
             registrar_log("evaluaciones", "WARN", f"Evaluación ID={id} no encontrada")
-            finalizar_medicion()
             return jsonify({"error": "Evaluación no encontrada"}), 404
         
-        id_matricula = row[0]
+        id_matricula, id_alumno, id_curso, ciclo_matricula, aprobado_anterior, nota_anterior, creditos, activo = row
         
         # Actualizar Evaluación
         cursor.execute(
@@ -283,18 +337,26 @@ def editar(id):
             (estado, id_matricula)
         )
         
-        conn.commit()
+        # Actualizar proyección de estado académico y resumen del ciclo
+        actualizar_estado_academico(conn, id_alumno, id_curso)
+        registrar_evaluacion_en_resumen(conn, ciclo_matricula, aprobado_anterior, aprobado)
+        
+        incrementar_version(cursor, "evaluaciones", "matriculas")
+        incrementar_version_alumno(cursor, id_alumno)
+        version = leer_version(cursor, "evaluaciones")
+        confirmar(conn)
+        
+        # Orden de mérito del ciclo: cambia solo la nota
+        registrar_cambio_nota(ciclo_matricula, id_alumno, (round(nota, 2) - float(nota_anterior)) * creditos, 0, version, activo)
         
         registrar_log("evaluaciones", "INFO", f"✅ Evaluación ID={id} actualizada: Nota={nota}, Estado={estado}")
         registrar_log("evaluaciones", "INFO", f"=== FIN: Actualizar evaluación ID={id} ===")
-        finalizar_medicion()
         
         return jsonify({"mensaje": "Nota actualizada correctamente"}), 200
         
     except Exception as e:
         conn.rollback()
         registrar_log("evaluaciones", "ERROR", f"Error al actualizar evaluación: {str(e)}")
-        finalizar_medicion()
         return jsonify({"error": f"Error al actualizar evaluación: {str(e)}"}), 500
     finally:
         if conn: conn.close()
@@ -304,40 +366,60 @@ def editar(id):
 # ============================
 @evaluaciones_bp.route("/<int:id>", methods=["DELETE"])
 def eliminar(id):
-    iniciar_medicion()
     registrar_log("evaluaciones", "INFO", f"=== INICIO: Eliminar evaluación ID={id} ===")
     
     conn = get_connection()
     try:
         cursor = conn.cursor()
-        cursor.execute("SELECT id_matricula FROM evaluaciones WHERE id=%s", (id,))
+        # Fila bloqueada hasta el commit (ver editar)
+        cursor.execute("""
+            SELECT e.id_matricula, m.id_alumno, m.id_curso, m.ciclo_matricula, e.aprobado,
+                   e.nota, c.creditos, a.activo
+            FROM evaluaciones e
+            JOIN matriculas m ON e.id_matricula = m.id
+            JOIN cursos c ON m.id_curso = c.id
+            JOIN alumnos a ON m.id_alumno = a.id
+            WHERE e.id=%s
+            FOR UPDATE OF e
+        """, (id,))
         row = cursor.fetchone()
         
         if not row:
             registrar_log("evaluaciones", "WARN", f"Evaluación ID={id} no encontrada")
-            finalizar_medicion()
             return jsonify({"error": "Evaluación no encontrada"}), 404
         
-        id_matricula = row[0]
+        id_matricula, id_alumno, id_curso, ciclo_matricula, aprobado_anterior, nota_anterior, creditos, activo = row
+        
+        # Eliminar evaluación
+        cursor.execute("DELETE FROM evaluaciones WHERE id=%s", (id,))
+        if cursor.rowcount == 0:
+            conn.rollback()
+            registrar_log("evaluaciones", "WARN", f"Evaluación ID={id} ya fue eliminada")
+            return jsonify({"error": "Evaluación no encontrada"}), 404
         
         # Restaurar estado de matrícula
         cursor.execute("UPDATE matriculas SET estado='MATRICULADO' WHERE id=%s", (id_matricula,))
         
-        # Eliminar evaluación
-        cursor.execute("DELETE FROM evaluaciones WHERE id=%s", (id,))
+        # Actualizar proyección de estado académico y resumen del ciclo
+        actualizar_estado_academico(conn, id_alumno, id_curso)
+        registrar_evaluacion_en_resumen(conn, ciclo_matricula, aprobado_anterior, None)
+        
+        incrementar_version(cursor, "evaluaciones", "matriculas")
+        incrementar_version_alumno(cursor, id_alumno)
+        version = leer_version(cursor, "evaluaciones")
+        confirmar(conn)
         
-        conn.commit()
+        # Orden de mérito del ciclo: el alumno deja de sumar esta nota
+        registrar_cambio_nota(ciclo_matricula, id_alumno, -float(nota_anterior) * creditos, -creditos, version, activo)
         
         registrar_log("evaluaciones", "INFO", f"✅ Evaluación ID={id} eliminada, matrícula ID={id_matricula} restaurada")
         registrar_log("evaluaciones", "INFO", f"=== FIN: Eliminar evaluación ID={id} ===")
-        finalizar_medicion()
         
         return jsonify({"mensaje": "Evaluación eliminada correctamente"}), 200
         
     except Exception as e:
         conn.rollback()
         registrar_log("evaluaciones", "ERROR", f"Error al eliminar evaluación: {str(e)}")
-        finalizar_medicion()
         return jsonify({"error": f"Error al eliminar evaluación: {str(e)}"}), 500
     finally:
         if conn: conn.close()
\ No newline at end of file
@@ -1,5 +1,20 @@
 from flask import Blueprint, request, jsonify
+from config import CACHE_CONFIG
 from db import get_connection
+from utils.service_client import llamar_servicio, registrar_servicio_local
+from utils.estado_academico import actualizar_estado_academico
+from utils.resumen_ciclo import (
+    obtener_resumen_ciclos, registrar_matriculas_en_resumen, quitar_matricula_de_resumen
+)
+from utils.condicional import condicional
+from utils.versiones import (
+    bloquear_alumno, confirmar, incrementar_version, incrementar_version_alumno, obtener_version_alumno
+)
+from utils.cache import Cache
+from utils.streaming import formato_streaming_solicitado, respuesta_streaming
+from utils.paginacion import (
+    ErrorPaginacion, paginacion_solicitada, leer_parametros, condicion_keyset, armar_pagina
+)
 import requests
 
 matriculas_bp = Blueprint("matriculas_bp", __name__, url_prefix="/api/matriculas")
@@ -15,14 +30,10 @@ def validar_con_servicio(tipo, id_entidad, transaction_id):
     transaction_id: ID para rastrear la transacción
     """
     try:
-        url = f"http://127.0.0.1:5000/api/{tipo}s/validar/{id_entidad}"
-        headers = {"X-Transaction-ID": transaction_id}
-        
-        respuesta = requests.get(url, headers=headers, timeout=5)
+        respuesta = llamar_servicio(f"{tipo}s", "validar", id_entidad, transaction_id)
         
         if respuesta.status_code == 200:
-            datos = respuesta.json()
-            return {"valido": True, "datos": datos}
+            return {"valido": True, "datos": respuesta.datos}
         elif respuesta.status_code == 404:
             return {"valido": False, "mensaje": f"{tipo.capitalize()} no encontrado"}
         else:
@@ -33,35 +44,51 @@ def validar_con_servicio(tipo, id_entidad, transaction_id):
     except Exception as e:
         return {"valido": False, "mensaje": f"Error de conexión: {str(e)}"}
 
+def validar_lote_con_servicio(tipo, ids, transaction_id):
+    """
+    Valida varias entidades con una sola llamada al servicio de validación en lote
+    tipo: 'alumno' o 'curso'
+    ids: lista de IDs
+    Retorna {"valido": True, "datos": {id: entidad}, "no_encontrados": [ids]}
+    """
+    try:
+        respuesta = llamar_servicio(f"{tipo}s", "validar_lote", list(ids), transaction_id)
+        
+        if respuesta.status_code == 200:
+            entidades = {fila["id"]: fila for fila in respuesta.datos[f"{tipo}s"]}
+            return {
+                "valido": True,
+                "datos": entidades,
+                "no_encontrados": respuesta.datos["no_encontrados"]
+            }
+        else:
+            return {"valido": False, "mensaje": f"Error al validar {tipo}s"}
+            
+    except requests.exceptions.Timeout:
+        return {"valido": False, "mensaje": f"Timeout al validar {tipo}s"}
+    except Exception as e:
+        return {"valido": False, "mensaje": f"Error de conexión: {str(e)}"}
+
 # ============================
 # SERVICIOS PARA REPORTES
 # ============================
-def servicio_rendimiento_alumno(alumno_id, filtro="TODOS"):
-    """
-    Retorna el historial académico del alumno agrupado por ciclo_matricula
-    Incluye información de ciclo_original para detectar arrastres
-    filtro: TODOS | ULTIMO | ULTIMOS_3
-    """
+# El historial completo del alumno se carga una vez y se guarda en caché;
+# los filtros se derivan de él. La entrada se descarta cuando cambia la
+# versión del alumno (escrituras de matrículas/evaluaciones) o la de cursos.
+cache_rendimiento = Cache(
+    "rendimiento_alumnos", CACHE_CONFIG["rendimiento_ttl"],
+    tabla="cursos", max_entradas=CACHE_CONFIG["rendimiento_max"]
+)
+
+
+def _cargar_historial_alumno(alumno_id):
+    """Todas las matrículas del alumno con su curso y nota, por ciclo DESC y código."""
     conn = get_connection()
+    if conn is None:
+        raise ConnectionError("Error de conexión a la base de datos")
     try:
         cursor = conn.cursor(dictionary=True)
-        ciclos_filtrar = []
-        params = [alumno_id]
-        
-        if filtro != "TODOS":
-            limit = 1 if filtro == "ULTIMO" else 3
-            cursor.execute("""
-                SELECT DISTINCT ciclo_matricula 
-                FROM matriculas 
-                WHERE id_alumno=%s 
-                ORDER BY ciclo_matricula DESC 
-                LIMIT %s
-            """, (alumno_id, limit))
-            ciclos_filtrar = [r['ciclo_matricula'] for r in cursor.fetchall()]
-            if not ciclos_filtrar: 
-                return {}
-
-        query = """
+        cursor.execute("""
             SELECT 
                 m.ciclo_matricula as ciclo,
                 m.ciclo_original,
@@ -81,43 +108,48 @@ def servicio_rendimiento_alumno(alumno_id, filtro="TODOS"):
             JOIN cursos c ON m.id_curso = c.id
             LEFT JOIN evaluaciones e ON m.id = e.id_matricula
             WHERE m.id_alumno = %s
-        """
-        
-        if ciclos_filtrar:
-            placeholders = ','.join(['%s']*len(ciclos_filtrar))
-            query += f" AND m.ciclo_matricula IN ({placeholders})"
-            params.extend(ciclos_filtrar)
-        
-        query += " ORDER BY m.ciclo_matricula DESC, c.codigo ASC"
-        cursor.execute(query, tuple(params))
-        
-        data = cursor.fetchall()
-        agrupado = {}
-        for row in data:
-            c = row['ciclo']
-            if c not in agrupado: 
-                agrupado[c] = []
-            agrupado[c].append(row)
-        return agrupado
+            ORDER BY m.ciclo_matricula DESC, c.codigo ASC
+        """, (alumno_id,))
+        return cursor.fetchall()
     finally:
-        if conn: conn.close()
+        conn.close()
+
+
+def servicio_rendimiento_alumno(alumno_id, filtro="TODOS"):
+    """
+    Retorna el historial académico del alumno agrupado por ciclo_matricula
+    Incluye información de ciclo_original para detectar arrastres
+    filtro: TODOS | ULTIMO | ULTIMOS_3
+    """
+    historial = cache_rendimiento.obtener(
+        alumno_id, lambda: _cargar_historial_alumno(alumno_id),
+        version=obtener_version_alumno(alumno_id)
+    )
+
+    ciclos_filtrar = None
+    if filtro != "TODOS":
+        limit = 1 if filtro == "ULTIMO" else 3
+        # El historial viene ordenado por ciclo descendente
+        ciclos_filtrar = set(list(dict.fromkeys(row['ciclo'] for row in historial))[:limit])
+
+    agrupado = {}
+    for row in historial:
+        c = row['ciclo']
+        if ciclos_filtrar is not None and c not in ciclos_filtrar:
+            continue
+        if c not in agrupado: 
+            agrupado[c] = []
+        agrupado[c].append(row)
+    return agrupado
 
 def servicio_reporte_alumnos_ciclo():
     """
-    Retorna cantidad de alumnos y matrículas por ciclo_matricula
+    Retorna por ciclo_matricula la cantidad de alumnos, matrículas,
+    aprobados, desaprobados y créditos (desde la tabla resumen_ciclo)
     """
     conn = get_connection()
     try:
-        cursor = conn.cursor(dictionary=True)
-        cursor.execute("""
-            SELECT m.ciclo_matricula as ciclo, 
-                   COUNT(DISTINCT m.id_alumno) as total_alumnos, 
-                   COUNT(m.id) as total_matriculas 
-            FROM matriculas m 
-            GROUP BY m.ciclo_matricula 
-            ORDER BY m.ciclo_matricula
-        """)
-        return cursor.fetchall()
+        return obtener_resumen_ciclos(conn)
     finally:
         if conn: conn.close()
 
@@ -125,21 +157,52 @@ def servicio_reporte_alumnos_ciclo():
 # LISTAR MATRÍCULAS
 # ============================
 @matriculas_bp.route("", methods=["GET"])
+@condicional("matriculas", "alumnos", "cursos")
 def listar_matriculas():
+    try:
+        formato_stream = formato_streaming_solicitado()
+    except ValueError as e:
+        return jsonify({"error": str(e)}), 400
+
+    # La exportación en streaming devuelve todas las filas sin paginar
+    paginar = paginacion_solicitada() and formato_stream is None
+    if paginar:
+        try:
+            limite, despues = leer_parametros(2)
+        except ErrorPaginacion as e:
+            return jsonify({"error": str(e)}), 400
+
+    sql = """
+        SELECT m.id, m.id_alumno, m.id_curso, 
+               m.ciclo_original, m.ciclo_matricula, m.estado, m.intento,
+               m.fecha_matricula,
+               CONCAT(a.nombre, ' ', a.apellido) as alumno, 
+               c.nombre as curso,
+               c.codigo
+        FROM matriculas m
+        JOIN alumnos a ON m.id_alumno = a.id
+        JOIN cursos c ON m.id_curso = c.id
+    """
+
     conn = get_connection()
+
+    if formato_stream:
+        return respuesta_streaming(conn, sql + " ORDER BY m.fecha_matricula DESC, m.id DESC", (), formato_stream)
+
     try:
         cursor = conn.cursor(dictionary=True)
-        cursor.execute("""
-            SELECT m.id, m.id_alumno, m.id_curso, 
-                   m.ciclo_original, m.ciclo_matricula, m.estado, m.intento,
-                   CONCAT(a.nombre, ' ', a.apellido) as alumno, 
-                   c.nombre as curso,
-                   c.codigo
-            FROM matriculas m
-            JOIN alumnos a ON m.id_alumno = a.id
-            JOIN cursos c ON m.id_curso = c.id
-            ORDER BY m.fecha_matricula DESC
-        """)
+        params = []
+        if paginar and despues:
+            condicion, params = condicion_keyset(["m.fecha_matricula", "m.id"], despues, descendente=True)
+            sql += f" WHERE {condicion}"
+        sql += " ORDER BY m.fecha_matricula DESC, m.id DESC"
+        if paginar:
+            sql += " LIMIT %s"
+            params.append(limite + 1)
+        cursor.execute(sql, tuple(params))
+        
+        if paginar:
+            return jsonify(armar_pagina(cursor.fetchall(), limite, ["fecha_matricula", "id"])), 200
         return jsonify(cursor.fetchall()), 200
     finally:
         if conn: conn.close()
@@ -147,21 +210,63 @@ def listar_matriculas():
 # ============================
 # OBTENER UNA MATRÍCULA
 # ============================
-@matriculas_bp.route("/<int:id>", methods=["GET"])
-def obtener_matricula(id):
+def servicio_obtener_matricula(id):
+    """
+    Retorna la matrícula con ese ID, o None si no existe.
+    """
     conn = get_connection()
     try:
         cursor = conn.cursor(dictionary=True)
         cursor.execute("SELECT * FROM matriculas WHERE id=%s", (id,))
-        row = cursor.fetchone()
-        return jsonify(row) if row else (jsonify({"error": "No encontrado"}), 404)
+        return cursor.fetchone()
     finally:
         if conn: conn.close()
 
+registrar_servicio_local("matriculas", "obtener", servicio_obtener_matricula)
+
+@matriculas_bp.route("/<int:id>", methods=["GET"])
+@condicional("matriculas")
+def obtener_matricula(id):
+    row = servicio_obtener_matricula(id)
+    return jsonify(row) if row else (jsonify({"error": "No encontrado"}), 404)
+
 # ============================
 # OBTENER CURSOS DISPONIBLES PARA MATRÍCULA
 # ============================
+# Cursos jalados: búsqueda indexada sobre la proyección estado_academico_alumno
+# (utils/estado_academico.py). Cursos disponibles: anti-join LEFT JOIN ... IS NULL
+# sobre los índices de migraciones/001_indices_cursos_disponibles.sql.
+# verificar_indices.py comprueba con EXPLAIN que se usan esos índices.
+
+# Último intento de cada curso evaluado que el alumno aún no aprobó
+SQL_CURSOS_JALADOS = """
+    SELECT
+        c.id, c.codigo, c.nombre, c.creditos, c.ciclo as ciclo_original,
+        ea.ultimo_intento,
+        ea.ultima_nota
+    FROM estado_academico_alumno ea
+    JOIN cursos c ON c.id = ea.id_curso
+    WHERE ea.id_alumno = %s
+      AND ea.aprobado = 0
+    ORDER BY c.ciclo, c.codigo
+"""
+
+# Cursos activos del ciclo en los que el alumno no está matriculado actualmente
+SQL_CURSOS_DISPONIBLES = """
+    SELECT c.id, c.codigo, c.nombre, c.creditos, c.ciclo as ciclo_original
+    FROM cursos c
+    LEFT JOIN matriculas m
+           ON m.id_alumno = %s
+          AND m.id_curso = c.id
+          AND m.estado = 'MATRICULADO'
+    WHERE c.ciclo = %s
+      AND c.activo = 1
+      AND m.id IS NULL
+    ORDER BY c.codigo
+"""
+
 @matriculas_bp.route("/cursos-disponibles/<int:alumno_id>", methods=["GET"])
+@condicional("matriculas", "evaluaciones", "alumnos", "cursos")
 def obtener_cursos_disponibles(alumno_id):
     """
     Retorna:
@@ -174,8 +279,8 @@ def obtener_cursos_disponibles(alumno_id):
         cursor = conn.cursor(dictionary=True)
         
         # 1. Validar alumno con servicio
-        from utils.logger import generar_transaction_id
-        transaction_id = generar_transaction_id()
+        from utils.logger import obtener_transaction_id
+        transaction_id = obtener_transaction_id()
         validacion = validar_con_servicio("alumno", alumno_id, transaction_id)
 
         if not validacion["valido"]:
@@ -184,25 +289,7 @@ def obtener_cursos_disponibles(alumno_id):
         ciclo_actual = validacion["datos"]["alumno"]["ciclo_actual"]
         
         # 2. Buscar cursos DESAPROBADOS (OBLIGATORIOS)
-        cursor.execute("""
-            SELECT DISTINCT
-                c.id, c.codigo, c.nombre, c.creditos, c.ciclo as ciclo_original,
-                m.intento as ultimo_intento,
-                e.nota as ultima_nota
-            FROM matriculas m
-            JOIN cursos c ON m.id_curso = c.id
-            JOIN evaluaciones e ON m.id = e.id_matricula
-            WHERE m.id_alumno = %s 
-              AND e.aprobado = 0
-              AND m.id NOT IN (
-                  SELECT m2.id FROM matriculas m2
-                  JOIN evaluaciones e2 ON m2.id = e2.id_matricula
-                  WHERE m2.id_alumno = %s 
-                    AND m2.id_curso = c.id
-                    AND e2.aprobado = 1
-              )
-            ORDER BY c.ciclo, c.codigo
-        """, (alumno_id, alumno_id))
+        cursor.execute(SQL_CURSOS_JALADOS, (alumno_id,))
         
         cursos_jalados = cursor.fetchall()
         
@@ -211,19 +298,7 @@ def obtener_cursos_disponibles(alumno_id):
         cursos_disponibles_max = 6 - total_jalados
         
         # 4. Obtener cursos del ciclo actual que NO ha llevado o que aprobó
-        cursor.execute("""
-            SELECT c.id, c.codigo, c.nombre, c.creditos, c.ciclo as ciclo_original
-            FROM cursos c
-            WHERE c.ciclo = %s 
-              AND c.activo = 1
-              AND c.id NOT IN (
-                  SELECT m.id_curso 
-                  FROM matriculas m
-                  WHERE m.id_alumno = %s 
-                    AND m.estado = 'MATRICULADO'
-              )
-            ORDER BY c.codigo
-        """, (ciclo_actual, alumno_id))
+        cursor.execute(SQL_CURSOS_DISPONIBLES, (alumno_id, ciclo_actual))
         
         cursos_disponibles = cursor.fetchall()
         
@@ -251,6 +326,86 @@ def obtener_cursos_disponibles(alumno_id):
 # ============================
 # CREAR MATRÍCULA FLEXIBLE
 # ============================
+def registrar_matriculas_lote(cursor, alumno_id, ciclo_matricula, cursos_seleccionados, cursos_validos):
+    """
+    Registra en bloque las matrículas del alumno (no hace commit).
+    
+    Una sola consulta agrupada obtiene, para todos los cursos seleccionados,
+    si ya está matriculado en el ciclo actual y su último intento; luego
+    todas las filas se insertan con un único executemany (INSERT multi-fila).
+    
+    cursos_validos: {id_curso: curso} devuelto por el servicio de cursos
+    Retorna (cursos_matriculados, cursos_rechazados)
+    """
+    cursos_matriculados = []
+    cursos_rechazados = []
+    
+    ids_validos = [c for c in dict.fromkeys(cursos_seleccionados) if c in cursos_validos]
+    historial = {}
+    
+    if ids_validos:
+        placeholders = ','.join(['%s'] * len(ids_validos))
+        cursor.execute(f"""
+            SELECT id_curso,
+                   MAX(intento) as ultimo_intento,
+                   MAX(ciclo_matricula = %s AND estado = 'MATRICULADO') as duplicado
+            FROM matriculas
+            WHERE id_alumno = %s AND id_curso IN ({placeholders})
+            GROUP BY id_curso
+        """, (ciclo_matricula, alumno_id, *ids_validos))
+        historial = {fila["id_curso"]: fila for fila in cursor.fetchall()}
+    
+    filas = []
+    procesados = set()
+    
+    for curso_id in cursos_seleccionados:
+        curso = cursos_validos.get(curso_id)
+        
+        if curso is None:
+            cursos_rechazados.append({
+                "curso_id": curso_id,
+                "motivo": "Curso no encontrado"
+            })
+            continue
+        
+        previo = historial.get(curso_id) or {}
+        
+        # ===================================
+        # VALIDACIÓN ANTI-DUPLICADO CRÍTICA
+        # ===================================
+        if previo.get("duplicado") or curso_id in procesados:
+            cursos_rechazados.append({
+                "curso_id": curso_id,
+                "codigo": curso["codigo"],
+                "nombre": curso["nombre"],
+                "motivo": "Ya está matriculado en este curso en el ciclo actual"
+            })
+            continue
+        
+        procesados.add(curso_id)
+        ciclo_original = curso["ciclo"]
+        nuevo_intento = (previo.get("ultimo_intento") or 0) + 1
+        
+        filas.append((alumno_id, curso_id, ciclo_original, ciclo_matricula, nuevo_intento, 'MATRICULADO'))
+        cursos_matriculados.append({
+            "id_curso": curso_id,
+            "codigo": curso["codigo"],
+            "nombre": curso["nombre"],
+            "ciclo_original": ciclo_original,
+            "intento": nuevo_intento,
+            "creditos": curso["creditos"],
+            "es_arrastre": ciclo_original != ciclo_matricula
+        })
+    
+    if filas:
+        # El estado va como parámetro para que el conector agrupe todo en un INSERT multi-fila
+        cursor.executemany("""
+            INSERT INTO matriculas (id_alumno, id_curso, ciclo_original, ciclo_matricula, intento, estado)
+            VALUES (%s, %s, %s, %s, %s, %s)
+        """, filas)
+    
+    return cursos_matriculados, cursos_rechazados
+
 @matriculas_bp.route("/flexible", methods=["POST"])
 def crear_matricula_flexible():
     """
@@ -273,99 +428,53 @@ def crear_matricula_flexible():
             return jsonify({"error": "No puede matricularse en más de 6 cursos"}), 400
         
         # Validar alumno con servicio
-        from utils.logger import generar_transaction_id, registrar_log, iniciar_medicion, finalizar_medicion
+        from utils.logger import obtener_transaction_id, registrar_log
         
-        transaction_id = generar_transaction_id()
-        iniciar_medicion()
+        transaction_id = obtener_transaction_id()
         registrar_log("matriculas", "INFO", f"=== INICIO: Crear matrícula flexible ===")
-        registrar_log("matriculas", "INFO", f"Transaction ID generado: {transaction_id}")
+        registrar_log("matriculas", "INFO", f"Transaction ID: {transaction_id}")
         registrar_log("matriculas", "INFO", f"Alumno ID={alumno_id}, Cursos seleccionados: {len(cursos_seleccionados)}")
         
         validacion_alumno = validar_con_servicio("alumno", alumno_id, transaction_id)
 
         if not validacion_alumno["valido"]:
             registrar_log("matriculas", "ERROR", f"Alumno ID={alumno_id} no válido: {validacion_alumno['mensaje']}")
-            finalizar_medicion()
             return jsonify({"error": validacion_alumno["mensaje"]}), 404
 
         ciclo_matricula = validacion_alumno["datos"]["alumno"]["ciclo_actual"]
         registrar_log("matriculas", "INFO", f"Alumno ID={alumno_id} validado. Ciclo actual: {ciclo_matricula}")
         
-        # Insertar matrículas
-        cursos_matriculados = []
-        cursos_rechazados = []
+        # Validar todos los cursos con una sola llamada al servicio
+        registrar_log("matriculas", "INFO", f"[{transaction_id}] Validando {len(cursos_seleccionados)} cursos en lote")
+        validacion_cursos = validar_lote_con_servicio("curso", cursos_seleccionados, transaction_id)
         
-        for curso_id in cursos_seleccionados:
-            # Validar curso con servicio
-            registrar_log("matriculas", "INFO", f"[{transaction_id}] Validando curso ID={curso_id}")
-            validacion_curso = validar_con_servicio("curso", curso_id, transaction_id)
-            
-            if not validacion_curso["valido"]:
-                cursos_rechazados.append({
-                    "curso_id": curso_id,
-                    "motivo": "Curso no encontrado"
-                })
-                registrar_log("matriculas", "WARN", f"Curso ID={curso_id} no encontrado")
-                continue
-            
-            curso = validacion_curso["datos"]["curso"]
-            ciclo_original = curso["ciclo"]
-            registrar_log("matriculas", "INFO", f"[{transaction_id}] Curso {curso['codigo']} validado")
-            
-            # ===================================
-            # VALIDACIÓN ANTI-DUPLICADO CRÍTICA
-            # ===================================
-            cursor.execute("""
-                SELECT id FROM matriculas 
-                WHERE id_alumno = %s 
-                  AND id_curso = %s 
-                  AND ciclo_matricula = %s
-                  AND estado = 'MATRICULADO'
-            """, (alumno_id, curso_id, ciclo_matricula))
-            
-            duplicado = cursor.fetchone()
-            
-            if duplicado:
-                cursos_rechazados.append({
-                    "curso_id": curso_id,
-                    "codigo": curso["codigo"],
-                    "nombre": curso["nombre"],
-                    "motivo": "Ya está matriculado en este curso en el ciclo actual"
-                })
-                registrar_log("matriculas", "WARN", f"Curso {curso['codigo']} rechazado: ya matriculado")
-                continue
-            
-            # Verificar si es repetición (obtener último intento)
-            cursor.execute("""
-                SELECT MAX(intento) as ultimo_intento
-                FROM matriculas
-                WHERE id_alumno = %s AND id_curso = %s
-            """, (alumno_id, curso_id))
-            
-            resultado = cursor.fetchone()
-            nuevo_intento = (resultado["ultimo_intento"] or 0) + 1
-            
-            # Insertar matrícula
-            cursor.execute("""
-                INSERT INTO matriculas (id_alumno, id_curso, ciclo_original, ciclo_matricula, intento, estado)
-                VALUES (%s, %s, %s, %s, %s, 'MATRICULADO')
-            """, (alumno_id, curso_id, ciclo_original, ciclo_matricula, nuevo_intento))
-            
-            cursos_matriculados.append({
-                "codigo": curso["codigo"],
-                "nombre": curso["nombre"],
-                "ciclo_original": ciclo_original,
-                "intento": nuevo_intento,
-                "es_arrastre": ciclo_original != ciclo_matricula
-            })
-            
-            registrar_log("matriculas", "INFO", f"Curso {curso['codigo']} matriculado - Intento {nuevo_intento}")
+        if not validacion_cursos["valido"]:
+            registrar_log("matriculas", "ERROR", f"No se pudo validar los cursos: {validacion_cursos['mensaje']}")
+            return jsonify({"error": validacion_cursos["mensaje"]}), 502
+        
+        cursos_validos = validacion_cursos["datos"]
         
-        conn.commit()
+        # Insertar matrículas (una consulta agrupada + un INSERT en bloque)
+        bloquear_alumno(cursor, alumno_id)
+        cursos_matriculados, cursos_rechazados = registrar_matriculas_lote(
+            cursor, alumno_id, ciclo_matricula, cursos_seleccionados, cursos_validos
+        )
+        
+        for rechazado in cursos_rechazados:
+            registrar_log("matriculas", "WARN", f"Curso ID={rechazado['curso_id']} rechazado: {rechazado['motivo']}")
+        for matriculado in cursos_matriculados:
+            registrar_log("matriculas", "INFO", f"Curso {matriculado['codigo']} matriculado - Intento {matriculado['intento']}")
+        
+        if cursos_matriculados:
+            registrar_matriculas_en_resumen(
+                conn, alumno_id, ciclo_matricula, [c["id_curso"] for c in cursos_matriculados]
+            )
+            incrementar_version(cursor, "matriculas")
+            incrementar_version_alumno(cursor, alumno_id)
+        confirmar(conn)
         
         registrar_log("matriculas", "INFO", f"✅ Matrícula completada: {len(cursos_matriculados)} cursos matriculados, {len(cursos_rechazados)} rechazados")
         registrar_log("matriculas", "INFO", f"=== FIN: Crear matrícula flexible ===")
-        finalizar_medicion()
         
         respuesta = {
             "mensaje": f"✅ Matrícula procesada: {len(cursos_matriculados)} cursos matriculados",
@@ -381,7 +490,6 @@ def crear_matricula_flexible():
         
     except Exception as e:
         registrar_log("matriculas", "ERROR", f"Excepción en crear_matricula_flexible: {str(e)}")
-        finalizar_medicion()
         conn.rollback()
         return jsonify({"error": str(e)}), 500
     finally:
@@ -405,7 +513,8 @@ def actualizar_matricula(id):
         if cursor.rowcount == 0:
             return jsonify({"error": "No encontrado"}), 404
 
-        conn.commit()
+        incrementar_version(cursor, "matriculas")
+        confirmar(conn)
         return jsonify({"mensaje": "Actualizado correctamente"}), 200
     except Exception as e:
         return jsonify({"error": str(e)}), 500
@@ -420,8 +529,31 @@ def eliminar_matricula(id):
     conn = get_connection()
     try:
         cursor = conn.cursor()
+        cursor.execute("SELECT id_alumno FROM matriculas WHERE id=%s", (id,))
+        alumno = cursor.fetchone()
+        row = None
+        if alumno:
+            bloquear_alumno(cursor, alumno[0])
+            # Relectura con bloqueo, ya serializada con las demás escrituras del alumno
+            cursor.execute("""
+                SELECT m.id_alumno, m.id_curso, m.ciclo_matricula, c.creditos, e.aprobado
+                FROM matriculas m
+                JOIN cursos c ON c.id = m.id_curso
+                LEFT JOIN evaluaciones e ON e.id_matricula = m.id
+                WHERE m.id=%s
+                FOR UPDATE OF m, e FOR SHARE OF c
+            """, (id,))
+            row = cursor.fetchone()
         cursor.execute("DELETE FROM matriculas WHERE id=%s", (id,))
-        conn.commit()
+        # Otra eliminación concurrente pudo borrarla: sin fila borrada no hay deltas
+        if row and cursor.rowcount == 1:
+            # Si la matrícula tenía evaluación, el estado académico cambia
+            actualizar_estado_academico(conn, row[0], row[1])
+            quitar_matricula_de_resumen(conn, row[0], row[2], row[3], row[4])
+            # La evaluación de la matrícula se borra en cascada
+            incrementar_version(cursor, "matriculas", "evaluaciones")
+            incrementar_version_alumno(cursor, row[0])
+        confirmar(conn)
         return jsonify({"mensaje": "Eliminado"}), 200
     finally:
         if conn: conn.close()
\ No newline at end of file
@@ -0,0 +1,20 @@
+from flask import Blueprint, Response
+from db import obtener_metricas_pool
+from utils.cache import obtener_metricas_caches
+from utils.logger import obtener_metricas_logs
+from utils.metricas import exportar_prometheus
+
+metricas_bp = Blueprint("metricas_bp", __name__)
+
+
+# ============================
+# MÉTRICAS EN FORMATO PROMETHEUS
+# ============================
+@metricas_bp.route("/metrics", methods=["GET"])
+def metrics():
+    texto = exportar_prometheus(
+        metricas_pool=obtener_metricas_pool(),
+        metricas_logs=obtener_metricas_logs(),
+        metricas_caches=obtener_metricas_caches()
+    )
+    return Response(texto, content_type="text/plain; version=0.0.4; charset=utf-8")
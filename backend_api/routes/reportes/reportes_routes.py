@@ -1,4 +1,15 @@
 from flask import Blueprint, jsonify, request
+import numpy as np
+from config import CACHE_CONFIG
+from db import get_connection
+from utils.cache import Cache
+from utils.condicional import condicional
+from utils.estadisticas import (
+    DIMENSIONES, ORDENES_PROMEDIO, cargar_columnas, estadisticas_por, filtrar,
+    promedios_ponderados, ordenar_promedios
+)
+from utils.ranking import posicion_alumno, top_ciclo
+from utils.versiones import obtener_version
 # Solo importamos los servicios que vamos a usar
 from routes.matriculas.matriculas_routes import servicio_rendimiento_alumno, servicio_reporte_alumnos_ciclo
 
@@ -8,6 +19,7 @@ reportes_bp = Blueprint("reportes_bp", __name__, url_prefix="/api/reportes")
 # REPORTE 1: RENDIMIENTO POR ALUMNO (Inteligente)
 # ============================
 @reportes_bp.route("/rendimiento_alumno/<int:alumno_id>", methods=["GET"])
+@condicional("matriculas", "evaluaciones", "cursos")
 def rendimiento_alumno(alumno_id):
     filtro = request.args.get('filtro', 'TODOS')
     try:
@@ -20,8 +32,226 @@ def rendimiento_alumno(alumno_id):
 # REPORTE 2: ALUMNOS POR CICLO
 # ============================
 @reportes_bp.route("/alumnos_ciclo", methods=["GET"])
+@condicional("matriculas", "evaluaciones", "cursos", "resumen_ciclo")
 def alumnos_ciclo():
     try:
         return jsonify(servicio_reporte_alumnos_ciclo()), 200
     except Exception as e:
-        return jsonify({"error": str(e)}), 500
\ No newline at end of file
+        return jsonify({"error": str(e)}), 500
+# ============================
+# REPORTE 3: ESTADÍSTICAS DE NOTAS (columnar)
+# ============================
+# Las columnas se cargan una vez y se reutilizan hasta la próxima escritura
+# de evaluaciones, matrículas o cursos (versiones de tabla).
+cache_estadisticas = Cache("columnas_estadisticas", CACHE_CONFIG["estadisticas_ttl"], tabla="evaluaciones")
+
+# Parámetro de filtro -> columna
+FILTROS_ESTADISTICAS = {"ciclo": "ciclo", "id_curso": "id_curso", "intento": "intento"}
+
+
+def _cargar_columnas():
+    conn = get_connection()
+    if conn is None:
+        raise ConnectionError("Error de conexión a la base de datos")
+    try:
+        return cargar_columnas(conn)
+    finally:
+        conn.close()
+
+
+def obtener_columnas():
+    return cache_estadisticas.obtener(
+        "evaluaciones", _cargar_columnas,
+        version=(obtener_version("matriculas"), obtener_version("cursos"))
+    )
+
+
+def _parametro_entero(nombre):
+    """Valor entero del query param `nombre`, o None si no vino. ValueError si no es entero."""
+    valor = request.args.get(nombre)
+    if valor is None:
+        return None
+    try:
+        return int(valor)
+    except ValueError:
+        raise ValueError(f"El parámetro '{nombre}' debe ser un número entero")
+
+
+def _columnas_filtradas(columnas):
+    """Aplica los filtros ?ciclo=, ?id_curso= e ?intento=. ValueError si alguno no es entero."""
+    mascara = None
+    for parametro, columna in FILTROS_ESTADISTICAS.items():
+        valor = _parametro_entero(parametro)
+        if valor is None:
+            continue
+        condicion = columnas[columna] == valor
+        mascara = condicion if mascara is None else mascara & condicion
+    return columnas if mascara is None else filtrar(columnas, mascara)
+
+
+def _estadisticas(dimension, datos, columnas):
+    resultado = estadisticas_por(columnas, dimension)
+    if dimension == "curso":
+        for fila in resultado:
+            fila.update(datos["cursos"].get(fila["curso"], {"codigo": None, "nombre": None}))
+    return resultado
+
+
+@reportes_bp.route("/estadisticas", methods=["GET"])
+@reportes_bp.route("/estadisticas/<dimension>", methods=["GET"])
+@condicional("evaluaciones", "matriculas", "cursos")
+def estadisticas(dimension=None):
+    """
+    Promedio, mediana, desviación, tasa de aprobación y distribución de
+    notas por curso, ciclo e intento (o solo por `dimension`).
+    """
+    if dimension is not None and dimension not in DIMENSIONES:
+        return jsonify({"error": f"Dimensión inválida. Use: {', '.join(DIMENSIONES)}"}), 404
+    try:
+        datos = obtener_columnas()
+        columnas = _columnas_filtradas(datos["columnas"])
+    except ValueError as e:
+        return jsonify({"error": str(e)}), 400
+    except Exception as e:
+        return jsonify({"error": str(e)}), 500
+
+    if dimension is not None:
+        return jsonify(_estadisticas(dimension, datos, columnas)), 200
+    return jsonify({
+        "total_evaluaciones": len(columnas["nota"]),
+        **{f"por_{d}": _estadisticas(d, datos, columnas) for d in DIMENSIONES}
+    }), 200
+
+
+# ============================
+# REPORTE 4: PROMEDIO PONDERADO DE TODOS LOS ALUMNOS
+# ============================
+cache_alumnos_activos = Cache("alumnos_activos", CACHE_CONFIG["estadisticas_ttl"], tabla="alumnos")
+
+# Un cálculo por ciclo (None = todos los ciclos); se descarta con la
+# siguiente escritura de evaluaciones, matrículas, cursos o alumnos
+cache_promedios = Cache(
+    "promedios_ponderados", CACHE_CONFIG["estadisticas_ttl"],
+    tabla="evaluaciones", max_entradas=CACHE_CONFIG["promedios_max"]
+)
+
+
+def _cargar_alumnos_activos():
+    conn = get_connection()
+    if conn is None:
+        raise ConnectionError("Error de conexión a la base de datos")
+    try:
+        cursor = conn.cursor(dictionary=True)
+        cursor.execute("SELECT id, nombre, apellido, ciclo_actual FROM alumnos WHERE activo = 1 ORDER BY id")
+        filas = cursor.fetchall()
+        cursor.close()
+    finally:
+        conn.close()
+    return {
+        "ids": np.fromiter((f["id"] for f in filas), dtype=np.int32, count=len(filas)),
+        "filas": filas,
+        "por_id": {f["id"]: f for f in filas}
+    }
+
+
+def _calcular_promedios(ciclo):
+    columnas = obtener_columnas()["columnas"]
+    if ciclo is not None:
+        columnas = filtrar(columnas, columnas["ciclo"] == ciclo)
+    alumnos = cache_alumnos_activos.obtener("activos", _cargar_alumnos_activos)
+    return {"alumnos": alumnos, **promedios_ponderados(columnas, alumnos["ids"])}
+
+
+def obtener_promedios(ciclo=None):
+    return cache_promedios.obtener(
+        ciclo, lambda: _calcular_promedios(ciclo),
+        version=(obtener_version("matriculas"), obtener_version("cursos"), obtener_version("alumnos"))
+    )
+
+
+@reportes_bp.route("/promedios_ponderados", methods=["GET"])
+@condicional("evaluaciones", "matriculas", "cursos", "alumnos")
+def promedios():
+    """
+    Promedio ponderado por créditos, créditos aprobados y créditos llevados
+    de cada alumno activo. ?ciclo= limita a un ciclo de matrícula,
+    ?orden=promedio|creditos_aprobados|creditos_llevados|id y ?limite=N.
+    """
+    orden = request.args.get("orden", "promedio")
+    if orden not in ORDENES_PROMEDIO:
+        return jsonify({"error": f"Orden inválido. Use: {', '.join(ORDENES_PROMEDIO)}"}), 400
+    try:
+        ciclo = _parametro_entero("ciclo")
+        limite = _parametro_entero("limite")
+        if limite is not None and limite < 1:
+            raise ValueError("El parámetro 'limite' debe ser mayor que 0")
+    except ValueError as e:
+        return jsonify({"error": str(e)}), 400
+
+    try:
+        datos = obtener_promedios(ciclo)
+    except Exception as e:
+        return jsonify({"error": str(e)}), 500
+
+    alumnos = datos["alumnos"]
+    indices = ordenar_promedios(datos, alumnos["ids"], orden)[:limite]
+
+    resultado = []
+    for i in indices.tolist():
+        promedio = datos["promedio"][i]
+        resultado.append({
+            **alumnos["filas"][i],
+            "promedio_ponderado": None if np.isnan(promedio) else round(float(promedio), 2),
+            "creditos_aprobados": int(datos["creditos_aprobados"][i]),
+            "creditos_llevados": int(datos["creditos_llevados"][i]),
+        })
+    return jsonify({
+        "ciclo": ciclo,
+        "orden": orden,
+        "total_alumnos": len(alumnos["filas"]),
+        "data": resultado
+    }), 200
+
+
+# ============================
+# REPORTE 5: ORDEN DE MÉRITO POR CICLO
+# ============================
+def _con_nombres(filas):
+    por_id = cache_alumnos_activos.obtener("activos", _cargar_alumnos_activos)["por_id"]
+    for fila in filas:
+        alumno = por_id.get(fila["id_alumno"], {})
+        fila["nombre"] = alumno.get("nombre")
+        fila["apellido"] = alumno.get("apellido")
+    return filas
+
+
+@reportes_bp.route("/ranking/<int:ciclo>", methods=["GET"])
+@condicional("evaluaciones", "cursos", "alumnos")
+def ranking_ciclo(ciclo):
+    """Primeros ?top=N (por defecto 10) del orden de mérito del ciclo."""
+    try:
+        k = _parametro_entero("top")
+        if k is not None and k < 1:
+            raise ValueError("El parámetro 'top' debe ser mayor que 0")
+    except ValueError as e:
+        return jsonify({"error": str(e)}), 400
+
+    try:
+        resultado = top_ciclo(ciclo, k or 10)
+        _con_nombres(resultado["data"])
+        return jsonify(resultado), 200
+    except Exception as e:
+        return jsonify({"error": str(e)}), 500
+
+
+@reportes_bp.route("/ranking/<int:ciclo>/alumno/<int:alumno_id>", methods=["GET"])
+@condicional("evaluaciones", "cursos", "alumnos")
+def ranking_alumno(ciclo, alumno_id):
+    """Posición del alumno en el orden de mérito del ciclo."""
+    try:
+        fila = posicion_alumno(ciclo, alumno_id)
+    except Exception as e:
+        return jsonify({"error": str(e)}), 500
+    if fila is None:
+        return jsonify({"error": "El alumno no tiene notas en este ciclo"}), 404
+    return jsonify(_con_nombres([fila])[0]), 200
@@ -0,0 +1,20 @@
+from flask import Blueprint, jsonify, request
+from utils.trazas import reconstruir_traza
+
+trazas_bp = Blueprint("trazas_bp", __name__, url_prefix="/api/trazas")
+
+
+# ============================
+# TRAZA DE UNA TRANSACCIÓN
+# ============================
+@trazas_bp.route("/<transaction_id>", methods=["GET"])
+def obtener_traza(transaction_id):
+    incluir_lineas = request.args.get("lineas") == "1"
+    try:
+        traza = reconstruir_traza(transaction_id, incluir_lineas=incluir_lineas)
+    except Exception as e:
+        return jsonify({"error": f"Error al reconstruir la traza: {str(e)}"}), 500
+
+    if traza is None:
+        return jsonify({"error": f"No se encontraron logs de la transacción {transaction_id}"}), 404
+    return jsonify(traza), 200
@@ -0,0 +1,94 @@
+"""
+Cachés en memoria del proceso
+
+Cache guarda valores calculados por una función de carga durante `ttl`
+segundos. Si se indica `tabla`, cada entrada recuerda la versión de esa
+tabla con la que se cargó (utils/versiones.py) y se descarta en cuanto la
+versión cambia, aunque el cambio lo haya hecho otro proceso. obtener()
+acepta además una versión propia de la entrada (p. ej. la versión de un
+alumno en versiones_alumnos), que se compara de la misma forma. Con
+`max_entradas` la caché queda acotada: al llenarse descarta la entrada
+usada hace más tiempo (LRU).
+
+Las escrituras del propio proceso llaman a invalidar() después del commit.
+Cada caché cuenta aciertos, fallos, invalidaciones y expulsiones por LRU
+(expuestos en /metrics).
+"""
+
+import threading
+import time
+from collections import OrderedDict
+
+from utils.versiones import obtener_version
+
+_caches = []
+
+
+class Cache:
+
+    def __init__(self, nombre, ttl, tabla=None, max_entradas=None):
+        self.nombre = nombre
+        self.ttl = ttl
+        self.tabla = tabla
+        self.max_entradas = max_entradas
+
+        # clave -> (valor, expira_en, version), de la menos a la más usada
+        self._entradas = OrderedDict()
+        self._lock = threading.Lock()
+
+        # Métricas
+        self.aciertos = 0
+        self.fallos = 0
+        self.invalidaciones = 0
+        self.expulsiones = 0
+
+        _caches.append(self)
+
+    def obtener(self, clave, cargar, version=None):
+        """
+        Retorna el valor de `clave`; si no está vigente lo obtiene con
+        cargar() y lo guarda. Las excepciones de cargar() se propagan.
+        """
+        version = (obtener_version(self.tabla) if self.tabla else None, version)
+        ahora = time.monotonic()
+
+        with self._lock:
+            entrada = self._entradas.get(clave)
+            if entrada is not None and entrada[1] > ahora and entrada[2] == version:
+                self._entradas.move_to_end(clave)
+                self.aciertos += 1
+                return entrada[0]
+            self.fallos += 1
+
+        valor = cargar()
+        with self._lock:
+            self._entradas[clave] = (valor, time.monotonic() + self.ttl, version)
+            self._entradas.move_to_end(clave)
+            if self.max_entradas is not None:
+                while len(self._entradas) > self.max_entradas:
+                    self._entradas.popitem(last=False)
+                    self.expulsiones += 1
+        return valor
+
+    def invalidar(self, clave=None):
+        """Descarta una entrada, o todas si no se indica clave."""
+        with self._lock:
+            if clave is None:
+                self._entradas.clear()
+            else:
+                self._entradas.pop(clave, None)
+            self.invalidaciones += 1
+
+    def metricas(self):
+        with self._lock:
+            return {
+                "entradas": len(self._entradas),
+                "aciertos": self.aciertos,
+                "fallos": self.fallos,
+                "invalidaciones": self.invalidaciones,
+                "expulsiones": self.expulsiones
+            }
+
+
+def obtener_metricas_caches():
+    return {cache.nombre: cache.metricas() for cache in _caches}
@@ -0,0 +1,59 @@
+"""
+Peticiones HTTP condicionales (ETag / If-None-Match)
+
+El ETag de una vista GET se arma con las versiones (utils/versiones.py) de
+las tablas que lee, p. ej. W/"alumnos.12-cursos.4". Si el cliente envía
+If-None-Match con ese valor se responde 304 sin ejecutar la vista: ni la
+consulta ni la serialización a JSON.
+
+Las versiones se leen con el mismo intervalo que usan las cachés, así que
+un cambio hecho por otro proceso puede tardar hasta
+VERSIONES_CONFIG["intervalo_lectura"] segundos en cambiar el ETag. Si las
+versiones no se pueden leer, la vista responde normalmente y sin ETag.
+"""
+
+from functools import wraps
+
+from flask import make_response, request
+
+from utils.versiones import obtener_version
+
+
+def etag_tablas(tablas):
+    """Retorna el ETag de las versiones actuales de `tablas`, o None si alguna no se pudo leer."""
+    partes = []
+    for tabla in tablas:
+        version = obtener_version(tabla)
+        if version is None:
+            return None
+        partes.append(f"{tabla}.{version}")
+    return "-".join(partes)
+
+
+def condicional(*tablas):
+    """
+    Decorador para vistas GET que dependen solo del contenido de `tablas`
+    (y de la URL). Debe ir debajo de @bp.route.
+    """
+    def decorador(vista):
+        @wraps(vista)
+        def envoltura(*args, **kwargs):
+            # Se calcula antes de consultar: si hay una escritura durante la
+            # consulta, el ETag queda viejo y el cliente vuelve a pedir
+            etag = etag_tablas(tablas)
+            if etag is None:
+                return vista(*args, **kwargs)
+
+            if request.if_none_match.contains_weak(etag):
+                respuesta = make_response("", 304)
+            else:
+                respuesta = make_response(vista(*args, **kwargs))
+                if respuesta.status_code != 200:
+                    return respuesta
+
+            respuesta.set_etag(etag, weak=True)
+            # El navegador guarda la respuesta pero revalida en cada uso
+            respuesta.headers["Cache-Control"] = "no-cache"
+            return respuesta
+        return envoltura
+    return decorador
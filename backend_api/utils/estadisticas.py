@@ -0,0 +1,215 @@
+"""
+Estadísticas de notas por cohorte con arreglos columnares (NumPy).
+
+cargar_columnas() lee una vez todas las evaluaciones (con su matrícula y
+curso) y las guarda como columnas NumPy: ids y ciclos en int32, notas en
+float32. estadisticas_por() agrupa por curso, ciclo_matricula o intento y
+calcula en forma vectorizada, sin recorrer filas en Python:
+
+    cantidad, promedio, mediana, desviación estándar (poblacional),
+    mínimo, máximo, tasa de aprobación y distribución por rangos de nota.
+
+Los grupos se numeran con np.bincount sobre las claves (enteros pequeños)
+y los conteos, sumas y la distribución salen de np.bincount en O(n). La
+mediana, el mínimo y el máximo se leen de un único np.sort sobre la clave
+compuesta grupo * 32 + nota (la nota está en [0, 20]), que deja las notas
+de cada grupo contiguas y ordenadas.
+"""
+
+import numpy as np
+
+NOTA_APROBATORIA = 10.5
+
+# Límites inferiores de los rangos de la distribución (el último llega a 20)
+RANGOS_NOTAS = (0.0, 5.0, 10.5, 14.0, 17.0)
+ETIQUETAS_RANGOS = ("0-5", "5-10.5", "10.5-14", "14-17", "17-20")
+
+# Dimensión -> columna por la que se agrupa
+DIMENSIONES = {
+    "curso": "id_curso",
+    "ciclo": "ciclo",
+    "intento": "intento",
+}
+
+SQL_COLUMNAS = """
+    SELECT m.id_alumno, m.id_curso, m.ciclo_matricula, m.intento, c.creditos, e.nota
+    FROM evaluaciones e
+    JOIN matriculas m ON m.id = e.id_matricula
+    JOIN cursos c ON c.id = m.id_curso
+"""
+
+
+# ============================
+# CARGA COLUMNAR
+# ============================
+def columnas_desde_filas(filas):
+    """
+    Convierte filas (id_alumno, id_curso, ciclo, intento, creditos, nota)
+    en el dict de columnas que usan las funciones de este módulo.
+    """
+    n = len(filas)
+    columnas = {}
+    for i, (nombre, tipo) in enumerate((
+        ("id_alumno", np.int32), ("id_curso", np.int32), ("ciclo", np.int32),
+        ("intento", np.int32), ("creditos", np.int32), ("nota", np.float32)
+    )):
+        columnas[nombre] = np.fromiter((fila[i] for fila in filas), dtype=tipo, count=n)
+    columnas["aprobado"] = columnas["nota"] >= NOTA_APROBATORIA
+    return columnas
+
+
+def cargar_columnas(conn):
+    """
+    Lee evaluaciones + matrículas + cursos y retorna
+    {"columnas": {...}, "cursos": {id: {"codigo", "nombre"}}}.
+    """
+    cursor = conn.cursor()
+    try:
+        cursor.execute(SQL_COLUMNAS)
+        columnas = columnas_desde_filas(cursor.fetchall())
+        cursor.execute("SELECT id, codigo, nombre FROM cursos")
+        cursos = {fila[0]: {"codigo": fila[1], "nombre": fila[2]} for fila in cursor.fetchall()}
+    finally:
+        cursor.close()
+    return {"columnas": columnas, "cursos": cursos}
+
+
+def filtrar(columnas, mascara):
+    """Columnas restringidas a las filas donde `mascara` es True."""
+    return {nombre: valores[mascara] for nombre, valores in columnas.items()}
+
+
+# ============================
+# AGREGADOS POR GRUPO
+# ============================
+def _numerar_grupos(claves):
+    """Retorna (claves únicas ordenadas, número de grupo de cada fila)."""
+    minima = int(claves.min())
+    desplazadas = claves.astype(np.int64) - minima
+    if int(desplazadas.max()) > 4 * len(claves):
+        # Claves muy dispersas: np.unique ordena, pero no reserva un
+        # arreglo del tamaño del rango
+        return np.unique(claves, return_inverse=True)
+    presentes = np.bincount(desplazadas) > 0
+    numero = np.cumsum(presentes) - 1
+    return np.flatnonzero(presentes) + minima, numero[desplazadas]
+
+
+def agregar_notas(claves, notas, aprobado):
+    """
+    Agregados de `notas` agrupadas por `claves` (arreglos de igual largo).
+    Retorna un dict de arreglos alineados con "clave" (claves únicas ordenadas).
+    """
+    if len(claves) == 0:
+        vacio = np.array([], dtype=np.float64)
+        return {
+            "clave": np.array([], dtype=np.int32), "cantidad": np.array([], dtype=np.int64),
+            "promedio": vacio, "mediana": vacio, "desviacion": vacio,
+            "minimo": vacio, "maximo": vacio, "tasa_aprobacion": vacio,
+            "distribucion": np.zeros((0, len(RANGOS_NOTAS)), dtype=np.int64)
+        }
+
+    unicas, grupo = _numerar_grupos(claves)
+    grupos = len(unicas)
+    notas64 = notas.astype(np.float64)
+
+    conteo = np.bincount(grupo, minlength=grupos)
+    promedio = np.bincount(grupo, weights=notas64, minlength=grupos) / conteo
+    cuadrados = np.bincount(grupo, weights=notas64 * notas64, minlength=grupos) / conteo
+    desviacion = np.sqrt(np.maximum(cuadrados - promedio * promedio, 0.0))
+    aprobados = np.bincount(grupo, weights=aprobado, minlength=grupos)
+
+    # Notas de cada grupo contiguas y ordenadas; se restan el desplazamiento
+    base = grupo.astype(np.float64) * 32
+    ordenadas = np.sort(base + notas64)
+    ordenadas -= np.repeat(np.arange(grupos, dtype=np.float64) * 32, conteo)
+    inicios = np.concatenate(([0], np.cumsum(conteo)[:-1]))
+    mediana = (ordenadas[inicios + (conteo - 1) // 2] + ordenadas[inicios + conteo // 2]) / 2
+
+    rango = np.searchsorted(RANGOS_NOTAS, notas, side="right") - 1
+    distribucion = np.bincount(
+        grupo * len(RANGOS_NOTAS) + rango, minlength=grupos * len(RANGOS_NOTAS)
+    ).reshape(grupos, len(RANGOS_NOTAS))
+
+    return {
+        "clave": unicas,
+        "cantidad": conteo,
+        "promedio": promedio,
+        "mediana": mediana,
+        "desviacion": desviacion,
+        "minimo": ordenadas[inicios],
+        "maximo": ordenadas[inicios + conteo - 1],
+        "tasa_aprobacion": aprobados / conteo,
+        "distribucion": distribucion,
+    }
+
+
+def estadisticas_por(columnas, dimension):
+    """Lista de dicts (serializable a JSON) con los agregados de `dimension`."""
+    agregados = agregar_notas(columnas[DIMENSIONES[dimension]], columnas["nota"], columnas["aprobado"])
+
+    resultado = []
+    for i, clave in enumerate(agregados["clave"].tolist()):
+        resultado.append({
+            dimension: clave,
+            "cantidad": int(agregados["cantidad"][i]),
+            "promedio": round(float(agregados["promedio"][i]), 2),
+            "mediana": round(float(agregados["mediana"][i]), 2),
+            "desviacion": round(float(agregados["desviacion"][i]), 2),
+            "minimo": round(float(agregados["minimo"][i]), 2),
+            "maximo": round(float(agregados["maximo"][i]), 2),
+            "tasa_aprobacion": round(float(agregados["tasa_aprobacion"][i]), 4),
+            "distribucion": dict(zip(ETIQUETAS_RANGOS, agregados["distribucion"][i].tolist())),
+        })
+    return resultado
+
+
+# ============================
+# PROMEDIO PONDERADO POR ALUMNO
+# ============================
+ORDENES_PROMEDIO = ("promedio", "creditos_aprobados", "creditos_llevados", "id")
+
+
+def promedios_ponderados(columnas, ids_alumnos):
+    """
+    Promedio ponderado por créditos, créditos aprobados y créditos llevados
+    (evaluados) de cada alumno de `ids_alumnos` (arreglo ordenado), en una
+    sola pasada con np.bincount. Los arreglos resultantes están alineados
+    con `ids_alumnos`; el promedio es NaN para alumnos sin evaluaciones.
+    """
+    n = len(ids_alumnos)
+    resultado = {
+        "promedio": np.full(n, np.nan),
+        "creditos_aprobados": np.zeros(n, dtype=np.int64),
+        "creditos_llevados": np.zeros(n, dtype=np.int64),
+    }
+    if n == 0 or len(columnas["id_alumno"]) == 0:
+        return resultado
+
+    unicas, grupo = _numerar_grupos(columnas["id_alumno"])
+    creditos = columnas["creditos"].astype(np.float64)
+    llevados = np.bincount(grupo, weights=creditos, minlength=len(unicas))
+    aprobados = np.bincount(grupo, weights=creditos * columnas["aprobado"], minlength=len(unicas))
+    ponderada = np.bincount(grupo, weights=creditos * columnas["nota"], minlength=len(unicas))
+
+    # Posición de cada alumno pedido entre los alumnos con evaluaciones
+    posicion = np.minimum(np.searchsorted(unicas, ids_alumnos), len(unicas) - 1)
+    encontrados = unicas[posicion] == ids_alumnos
+    posicion = posicion[encontrados]
+
+    resultado["promedio"][encontrados] = ponderada[posicion] / llevados[posicion]
+    resultado["creditos_aprobados"][encontrados] = aprobados[posicion].astype(np.int64)
+    resultado["creditos_llevados"][encontrados] = llevados[posicion].astype(np.int64)
+    return resultado
+
+
+def ordenar_promedios(promedios, ids_alumnos, orden="promedio"):
+    """
+    Índices de los alumnos ordenados por `orden` (de mayor a menor; "id"
+    ascendente). Los empates se resuelven por id y los alumnos sin promedio
+    van al final.
+    """
+    if orden == "id":
+        return np.arange(len(ids_alumnos))
+    # lexsort ordena por la última clave; NaN queda al final
+    return np.lexsort((ids_alumnos, -promedios[orden]))
@@ -0,0 +1,103 @@
+"""
+Proyección del estado académico (tabla estado_academico_alumno).
+
+Guarda, por alumno y curso, el último intento evaluado, su nota y si el curso
+ya fue aprobado, de modo que los cursos jalados de un alumno se obtienen con
+una búsqueda indexada en vez de recorrer matrículas y evaluaciones.
+
+- actualizar_estado_academico(): actualización incremental de un par
+  (alumno, curso); se llama dentro de la transacción que modifica la
+  evaluación, antes del commit.
+- reconstruir_estado_academico(): recalcula toda la tabla (carga inicial o
+  corrección). Uso desde backend_api/:
+      python -m utils.estado_academico
+"""
+
+import sys
+
+
+def actualizar_estado_academico(conn, id_alumno, id_curso):
+    """
+    Recalcula la fila (id_alumno, id_curso) a partir de sus evaluaciones.
+    No hace commit: forma parte de la transacción del llamador.
+    """
+    cursor = conn.cursor()
+    try:
+        cursor.execute("""
+            SELECT m.intento, e.nota, e.aprobado
+            FROM matriculas m
+            JOIN evaluaciones e ON e.id_matricula = m.id
+            WHERE m.id_alumno = %s AND m.id_curso = %s
+            ORDER BY m.intento DESC
+        """, (id_alumno, id_curso))
+        evaluadas = cursor.fetchall()
+
+        if not evaluadas:
+            cursor.execute(
+                "DELETE FROM estado_academico_alumno WHERE id_alumno = %s AND id_curso = %s",
+                (id_alumno, id_curso)
+            )
+            return
+
+        ultimo_intento, ultima_nota, _ = evaluadas[0]
+        aprobado = 1 if any(fila[2] for fila in evaluadas) else 0
+
+        cursor.execute("""
+            INSERT INTO estado_academico_alumno (id_alumno, id_curso, ultimo_intento, ultima_nota, aprobado)
+            VALUES (%s, %s, %s, %s, %s)
+            ON DUPLICATE KEY UPDATE
+                ultimo_intento = VALUES(ultimo_intento),
+                ultima_nota = VALUES(ultima_nota),
+                aprobado = VALUES(aprobado)
+        """, (id_alumno, id_curso, ultimo_intento, ultima_nota, aprobado))
+    finally:
+        cursor.close()
+
+
+def reconstruir_estado_academico(conn):
+    """
+    Recalcula toda la proyección en una transacción.
+    Retorna la cantidad de filas generadas.
+    """
+    cursor = conn.cursor()
+    try:
+        cursor.execute("DELETE FROM estado_academico_alumno")
+        cursor.execute("""
+            INSERT INTO estado_academico_alumno (id_alumno, id_curso, ultimo_intento, ultima_nota, aprobado)
+            SELECT m.id_alumno, m.id_curso, m.intento, e.nota, agg.aprobado
+            FROM (
+                SELECT m.id_alumno, m.id_curso,
+                       MAX(m.intento) as ultimo_intento,
+                       MAX(e.aprobado) as aprobado
+                FROM matriculas m
+                JOIN evaluaciones e ON e.id_matricula = m.id
+                GROUP BY m.id_alumno, m.id_curso
+            ) agg
+            JOIN matriculas m
+              ON m.id_alumno = agg.id_alumno
+             AND m.id_curso = agg.id_curso
+             AND m.intento = agg.ultimo_intento
+            JOIN evaluaciones e ON e.id_matricula = m.id
+        """)
+        filas = cursor.rowcount
+        conn.commit()
+        return filas
+    except Exception:
+        conn.rollback()
+        raise
+    finally:
+        cursor.close()
+
+
+if __name__ == "__main__":
+    from db import get_connection
+
+    conn = get_connection()
+    if conn is None:
+        print("❌ No se pudo conectar a MySQL")
+        sys.exit(1)
+    try:
+        print("Reconstruyendo estado_academico_alumno...")
+        print(f"✅ {reconstruir_estado_academico(conn)} filas generadas")
+    finally:
+        conn.close()
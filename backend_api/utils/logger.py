@@ -20,12 +20,23 @@ Atributos implementados:
 """
 
 import os
+import re
+import sys
+import json
+import zlib
+import atexit
 import logging
+import queue
+import threading
 import time
 import uuid
 from datetime import datetime, timezone
-from flask import request, g
+from flask import request, g, has_request_context
 from functools import wraps
+from config import LOG_CONFIG
+from utils.rotacion_logs import (
+    ArchivoRotativo, CompresorLogs, buscar_lineas_transaccion, reservar_ranura, ruta_de_ranura
+)
 
 # Configuración de rutas
 BASE_DIR = os.path.dirname(os.path.abspath(__file__))
@@ -35,8 +46,264 @@ BASE_LOG_DIR = os.path.abspath(BASE_LOG_DIR)
 # Crear directorio de logs si no existe
 os.makedirs(BASE_LOG_DIR, exist_ok=True)
 
-# Diccionario para almacenar tiempos de inicio de requests
-tiempos_inicio = {}
+# Niveles aceptados y umbral mínimo: lo que esté por debajo no se formatea
+NIVELES = {"DEBUG": 10, "INFO": 20, "WARN": 30, "WARNING": 30, "ERROR": 40, "CRITICAL": 50}
+_NIVEL_MINIMO = NIVELES[LOG_CONFIG.get("nivel_minimo", "INFO")]
+
+# Muestreo de INFO por módulo: umbral sobre 10000 para comparar con el hash
+_UMBRALES_MUESTREO = {
+    modulo: int(fraccion * 10000) for modulo, fraccion in LOG_CONFIG.get("muestreo_info", {}).items()
+}
+_FORMATO_JSON = LOG_CONFIG.get("formato", "texto") == "json"
+
+# Módulo de los spans (registrar_span): no pasa por el nivel mínimo ni por
+# el muestreo, porque una traza sin sus spans pierde los tiempos
+MODULO_TRAZAS = "trazas"
+
+# Líneas INFO omitidas por muestreo (aproximado, sin lock)
+_omitidas_muestreo = 0
+
+# Transaction IDs aceptados desde el header X-Transaction-ID
+_PATRON_TRANSACCION = re.compile(r"^[A-Za-z0-9._:-]{1,64}$")
+
+# ============================
+# ESCRITOR ASÍNCRONO DE LOGS
+# ============================
+_FIN = object()
+
+
+class EscritorLogs:
+    """
+    Escribe las líneas de log desde un hilo dedicado.
+
+    registrar_log solo encola la línea; el hilo mantiene los archivos
+    abiertos y vuelca a disco por lotes cuando se acumulan `flush_lineas`
+    líneas o pasan `flush_intervalo` segundos. La cola es acotada: si se
+    llena, la política "descartar" pierde la línea (y la cuenta) y
+    "bloquear" espera hasta `espera_bloqueo` segundos antes de descartarla.
+
+    Los archivos rotan por tamaño y por día; los segmentos rotados se
+    comprimen en un hilo aparte y el log centralizado se indexa por
+    transaction id (ver utils/rotacion_logs.py). Cada escritor reserva una
+    ranura del directorio, de modo que dos procesos nunca escriben ni rotan
+    el mismo archivo.
+    """
+
+    def __init__(self, directorio, tam_cola=10000, politica_cola_llena="descartar",
+                 espera_bloqueo=0.5, flush_lineas=200, flush_intervalo=1.0,
+                 rotacion_max_mb=50, rotacion_diaria=True, comprimir_rotados=True,
+                 max_segmentos=30):
+        self.directorio = directorio
+        self.ranura, self._lock_ranura = reservar_ranura(directorio)
+        self.ruta_central = ruta_de_ranura(os.path.join(directorio, "sistema_completo.log"), self.ranura)
+        self.rotacion_max_mb = rotacion_max_mb
+        self.rotacion_diaria = rotacion_diaria
+        self._compresor = CompresorLogs(max_segmentos=max_segmentos, comprimir=comprimir_rotados)
+        self.politica = politica_cola_llena
+        self.espera_bloqueo = espera_bloqueo
+        self.flush_lineas = flush_lineas
+        self.flush_intervalo = flush_intervalo
+
+        self._cola = queue.Queue(maxsize=tam_cola)
+        self._archivos = {}
+        self._lock = threading.Lock()
+        self._detenido = False
+
+        # Métricas
+        self.encoladas = 0
+        self.descartadas = 0
+        self.volcados = 0
+
+        self._hilo = threading.Thread(target=self._ejecutar, name="escritor-logs", daemon=True)
+        self._hilo.start()
+
+    # ----------------------------
+    # Lado productor (requests)
+    # ----------------------------
+    def encolar(self, modulo, linea, transaction_id=None):
+        try:
+            if self.politica == "bloquear":
+                self._cola.put((modulo, linea, transaction_id), timeout=self.espera_bloqueo)
+            else:
+                self._cola.put_nowait((modulo, linea, transaction_id))
+        except queue.Full:
+            with self._lock:
+                self.descartadas += 1
+            return False
+        with self._lock:
+            self.encoladas += 1
+        return True
+
+    def vaciar(self, timeout=5):
+        """Bloquea hasta que todo lo encolado hasta ahora esté en disco."""
+        listo = threading.Event()
+        self._cola.put(listo)
+        return listo.wait(timeout)
+
+    def detener(self, timeout=5):
+        """Vuelca lo pendiente, cierra los archivos y termina el hilo."""
+        if self._detenido:
+            return
+        self._detenido = True
+        self._cola.put(_FIN)
+        self._hilo.join(timeout)
+        self._compresor.detener(timeout)
+        self._lock_ranura.close()
+
+    def metricas(self):
+        with self._lock:
+            return {
+                "encoladas": self.encoladas,
+                "descartadas": self.descartadas,
+                "en_cola": self._cola.qsize(),
+                "volcados": self.volcados,
+                "archivos_abiertos": len(self._archivos),
+                "ranura": self.ranura
+            }
+
+    # ----------------------------
+    # Lado consumidor (hilo escritor)
+    # ----------------------------
+    def _archivo(self, ruta):
+        archivo = self._archivos.get(ruta)
+        if archivo is None:
+            archivo = ArchivoRotativo(
+                ruta,
+                max_mb=self.rotacion_max_mb,
+                rotacion_diaria=self.rotacion_diaria,
+                indexar=ruta == self.ruta_central,
+                compresor=self._compresor
+            )
+            self._archivos[ruta] = archivo
+        return archivo
+
+    def _rutas(self, modulo):
+        return (
+            ruta_de_ranura(os.path.join(self.directorio, modulo, f"{modulo}.log"), self.ranura),
+            self.ruta_central
+        )
+
+    def _volcar(self, pendientes):
+        for ruta, lineas in pendientes.items():
+            if not lineas:
+                continue
+            try:
+                self._archivo(ruta).escribir(lineas)
+            except OSError as e:
+                print(f"🔥 ERROR ESCRIBIENDO LOG {ruta}: {e}")
+        pendientes.clear()
+        with self._lock:
+            self.volcados += 1
+
+    def _ejecutar(self):
+        pendientes = {}          # ruta -> [(línea, transaction_id)]
+        acumuladas = 0
+        ultimo_volcado = time.monotonic()
+
+        while True:
+            restante = self.flush_intervalo - (time.monotonic() - ultimo_volcado)
+            try:
+                item = self._cola.get(timeout=max(restante, 0.001))
+            except queue.Empty:
+                item = None
+
+            if item is _FIN or isinstance(item, threading.Event):
+                self._volcar(pendientes)
+                acumuladas = 0
+                ultimo_volcado = time.monotonic()
+                if item is _FIN:
+                    for archivo in self._archivos.values():
+                        archivo.cerrar()
+                    self._archivos.clear()
+                    return
+                item.set()
+                continue
+
+            if item is not None:
+                modulo, linea, transaction_id = item
+                for ruta in self._rutas(modulo):
+                    pendientes.setdefault(ruta, []).append((linea, transaction_id))
+                acumuladas += 1
+
+            if acumuladas >= self.flush_lineas or \
+                    time.monotonic() - ultimo_volcado >= self.flush_intervalo:
+                if acumuladas:
+                    self._volcar(pendientes)
+                acumuladas = 0
+                ultimo_volcado = time.monotonic()
+
+
+_escritor = None
+_escritor_pid = None
+_escritor_lock = threading.Lock()
+
+
+def obtener_escritor():
+    """
+    Devuelve el escritor del proceso actual, creándolo en el primer uso.
+    Tras un fork el hilo del padre no existe, así que se crea uno nuevo.
+    """
+    global _escritor, _escritor_pid
+    pid = os.getpid()
+    if _escritor is None or _escritor_pid != pid:
+        with _escritor_lock:
+            if _escritor is None or _escritor_pid != pid:
+                escritor = EscritorLogs(
+                    BASE_LOG_DIR,
+                    tam_cola=LOG_CONFIG["tam_cola"],
+                    politica_cola_llena=LOG_CONFIG["politica_cola_llena"],
+                    espera_bloqueo=LOG_CONFIG["espera_bloqueo"],
+                    flush_lineas=LOG_CONFIG["flush_lineas"],
+                    flush_intervalo=LOG_CONFIG["flush_intervalo"],
+                    rotacion_max_mb=LOG_CONFIG["rotacion_max_mb"],
+                    rotacion_diaria=LOG_CONFIG["rotacion_diaria"],
+                    comprimir_rotados=LOG_CONFIG["comprimir_rotados"],
+                    max_segmentos=LOG_CONFIG["max_segmentos"]
+                )
+                _escritor, _escritor_pid = escritor, pid
+    return _escritor
+
+
+_directorios_creados = set()
+
+
+def _escribir_sincrono(modulo, linea):
+    ruta_modulo = os.path.join(BASE_LOG_DIR, modulo)
+    if ruta_modulo not in _directorios_creados:
+        os.makedirs(ruta_modulo, exist_ok=True)
+        _directorios_creados.add(ruta_modulo)
+    with open(os.path.join(ruta_modulo, f"{modulo}.log"), "a", encoding="utf-8") as file:
+        file.write(linea)
+    with open(os.path.join(BASE_LOG_DIR, "sistema_completo.log"), "a", encoding="utf-8") as file:
+        file.write(linea)
+
+
+def vaciar_logs(timeout=5):
+    """Fuerza el volcado a disco de las líneas pendientes."""
+    if LOG_CONFIG["asincrono"] and _escritor is not None and _escritor_pid == os.getpid():
+        return _escritor.vaciar(timeout)
+    return True
+
+
+def buscar_transaccion(transaction_id):
+    """
+    Retorna las líneas del log centralizado de `transaction_id` usando el
+    índice por segmento (solo disponible con el escritor asíncrono).
+    """
+    vaciar_logs()
+    return buscar_lineas_transaccion(os.path.join(BASE_LOG_DIR, "sistema_completo.log"), transaction_id)
+
+
+def obtener_metricas_logs():
+    if not LOG_CONFIG["asincrono"]:
+        return {"asincrono": False, "omitidas_muestreo": _omitidas_muestreo}
+    return {"asincrono": True, "omitidas_muestreo": _omitidas_muestreo, **obtener_escritor().metricas()}
+
+
+@atexit.register
+def _detener_escritor():
+    if _escritor is not None and _escritor_pid == os.getpid():
+        _escritor.detener()
 
 
 def generar_transaction_id():
@@ -46,7 +313,50 @@ def generar_transaction_id():
     """
     timestamp = datetime.now().strftime("%Y%m%d%H%M%S")
     unique = str(uuid.uuid4())[:8]
-    return f"TXN-{timestamp}-{unique}"
+    transaction_id = f"TXN-{timestamp}-{unique}"
+    # La primera transacción de la request queda asociada a sus logs
+    if has_request_context() and g.get("transaction_id") is None:
+        g.transaction_id = transaction_id
+    return transaction_id
+
+
+def obtener_transaction_id():
+    """
+    Retorna el transaction id de la request actual: el recibido en el header
+    X-Transaction-ID (si otro servicio inició la transacción) o uno nuevo.
+    Fuera de una request retorna None.
+    """
+    if not has_request_context():
+        return None
+    transaction_id = g.get("transaction_id")
+    if transaction_id is None:
+        recibido = request.headers.get("X-Transaction-ID")
+        if recibido and _PATRON_TRANSACCION.match(recibido):
+            g.transaction_id = transaction_id = recibido
+        else:
+            transaction_id = generar_transaction_id()
+    return transaction_id
+
+
+def registrar_span(tipo: str, nombre: str, inicio: float, duracion_ms: float, **atributos):
+    """
+    Registra un span de la traza de la transacción actual en el módulo
+    "trazas", sin importar el nivel mínimo ni el muestreo de LOG_CONFIG.
+    `inicio` es el instante (epoch en segundos) en que empezó.
+    Las líneas quedan indexadas por transaction id y utils/trazas.py las
+    reconstruye como una traza entre servicios.
+    """
+    if obtener_transaction_id() is None:
+        return
+    span = {
+        "tipo": tipo,
+        "nombre": nombre,
+        "inicio": round(inicio, 6),
+        "duracion_ms": round(duracion_ms, 3),
+        "pid": os.getpid(),
+        **atributos
+    }
+    registrar_log(MODULO_TRAZAS, "INFO", "SPAN " + json.dumps(span, ensure_ascii=False, default=str))
 
 
 def obtener_request_id():
@@ -84,12 +394,17 @@ def obtener_datos_request():
     """
     try:
         if request:
-            return {
-                "metodo": request.method,
-                "uri": request.path,
-                "ip": obtener_ip_cliente(),
-                "request_id": obtener_request_id()
-            }
+            # Se calculan una vez por request y se reutilizan en cada log
+            datos = g.get("_datos_log")
+            if datos is None:
+                datos = {
+                    "metodo": request.method,
+                    "uri": request.path,
+                    "ip": obtener_ip_cliente(),
+                    "request_id": obtener_request_id()
+                }
+                g._datos_log = datos
+            return datos
         return {
             "metodo": "CLI",
             "uri": "/",
@@ -105,6 +420,66 @@ def obtener_datos_request():
         }
 
 
+# Nombre base del archivo por objeto de código (se calcula una sola vez)
+_archivos_por_codigo = {}
+
+# Timestamp formateado del segundo actual; solo se recalculan los milisegundos.
+# Es una tupla inmutable (segundo, texto) que se reemplaza en una sola
+# asignación, así ningún thread lee un segundo con el texto de otro.
+_segundo_cache = (None, "")
+
+
+def _timestamp_utc():
+    global _segundo_cache
+    ahora = time.time()
+    segundo = int(ahora)
+    cache = _segundo_cache
+    if cache[0] != segundo:
+        cache = _segundo_cache = (segundo, time.strftime("%Y-%m-%dT%H:%M:%S", time.gmtime(segundo)))
+    return f"{cache[1]}.{int((ahora - segundo) * 1000):03d}Z"
+
+
+def nivel_habilitado(nivel: str):
+    """Indica si un log de este nivel se escribiría con la configuración actual."""
+    return NIVELES.get(nivel, 20) >= _NIVEL_MINIMO
+
+
+def _incluir_en_muestreo(modulo, request_id):
+    """
+    Decide si los INFO de esta request se escriben para `modulo`.
+    Depende solo del hash del request id, así que una request muestreada
+    conserva todas sus líneas y una omitida no deja líneas sueltas.
+    """
+    umbral = _UMBRALES_MUESTREO.get(modulo)
+    if umbral is None or umbral >= 10000 or request_id == "SYSTEM":
+        return True
+    return zlib.crc32(request_id.encode()) % 10000 < umbral
+
+
+def _linea_json(timestamp, nivel, modulo, request_data, caller_filename, caller_lineno,
+                caller_function, pid, thread_id, duracion_ms, transaction_id, mensaje, extras):
+    evento = {
+        "timestamp": timestamp,
+        "nivel": nivel,
+        "modulo": modulo,
+        "request_id": request_data["request_id"],
+        "transaction_id": transaction_id,
+        "archivo": caller_filename,
+        "linea": caller_lineno,
+        "funcion": caller_function,
+        "pid": pid,
+        "thread": thread_id,
+        "ip": request_data["ip"],
+        "metodo": request_data["metodo"],
+        "uri": request_data["uri"],
+        "duracion_ms": duracion_ms,
+        "mensaje": mensaje
+    }
+    if extras:
+        evento.update(extras)
+    return json.dumps(evento, ensure_ascii=False, default=str) + "\n"
+
+
 def registrar_log(modulo: str, nivel: str, mensaje: str, **kwargs):
     """
     Registra un log con TODOS los metadatos requeridos por el PDF.
@@ -116,76 +491,102 @@ def registrar_log(modulo: str, nivel: str, mensaje: str, **kwargs):
         **kwargs: Datos adicionales opcionales
     
     Formato del log:
-    [TIMESTAMP] [NIVEL] [REQUEST_ID] [MODULO] [FILENAME:LINENO] [FUNC]
+    [TIMESTAMP] [NIVEL] [REQUEST_ID] [TRANSACTION_ID] [MODULO] [FILENAME:LINENO] [FUNC]
     [PID:123] [THREAD:456] [IP:127.0.0.1] [GET /api/alumnos] [DURACION] MENSAJE
+
+    Con LOG_CONFIG["formato"] = "json" cada evento se escribe como un objeto
+    JSON por línea (los kwargs se agregan como campos).
+
+    Los niveles por debajo de LOG_CONFIG["nivel_minimo"] se descartan antes
+    de reunir cualquier metadato, y los INFO de los módulos listados en
+    LOG_CONFIG["muestreo_info"] solo se escriben para una fracción de las
+    requests. Los spans (módulo MODULO_TRAZAS) se escriben siempre.
     """
+    global _omitidas_muestreo
+    filtrar = modulo != MODULO_TRAZAS
+    valor_nivel = NIVELES.get(nivel, 20)
+    if filtrar and valor_nivel < _NIVEL_MINIMO:
+        return
     
     # Obtener datos de la request
     request_data = obtener_datos_request()
     
-    # Timestamp ISO 8601 UTC
-    timestamp = datetime.now(timezone.utc).strftime("%Y-%m-%dT%H:%M:%S.%f")[:-3] + "Z"
+    if filtrar and valor_nivel == 20 and modulo in _UMBRALES_MUESTREO and \
+            not _incluir_en_muestreo(modulo, request_data["request_id"]):
+        _omitidas_muestreo += 1
+        return
     
     # Obtener información del caller (archivo, línea, función)
-    import inspect
-    frame = inspect.currentframe()
-    caller_frame = frame.f_back
-    caller_filename = os.path.basename(caller_frame.f_code.co_filename)
+    caller_frame = sys._getframe(1)
+    codigo = caller_frame.f_code
+    caller_filename = _archivos_por_codigo.get(codigo)
+    if caller_filename is None:
+        caller_filename = os.path.basename(codigo.co_filename)
+        _archivos_por_codigo[codigo] = caller_filename
     caller_lineno = caller_frame.f_lineno
-    caller_function = caller_frame.f_code.co_name
+    caller_function = codigo.co_name
+    
+    # Timestamp ISO 8601 UTC
+    timestamp = _timestamp_utc()
     
     # PID y Thread ID
     pid = os.getpid()
-    import threading
     thread_id = threading.get_ident()
     
-    # Calcular duración si existe
-    duracion_str = ""
-    request_id = request_data["request_id"]
-    if request_id in tiempos_inicio:
-        duracion = (time.time() - tiempos_inicio[request_id]) * 1000
-        duracion_str = f"[{duracion:.2f}ms]"
-    
-    # Construir línea de log con TODOS los metadatos
-    linea_log = (
-        f"[{timestamp}] "
-        f"[{nivel:5}] "
-        f"[{request_data['request_id']}] "
-        f"[{modulo:15}] "
-        f"[{caller_filename}:{caller_lineno:3}] "
-        f"[{caller_function:20}] "
-        f"[PID:{pid}] "
-        f"[Thread:{thread_id}] "
-        f"[IP:{request_data['ip']:15}] "
-        f"[{request_data['metodo']:6} {request_data['uri']:40}] "
-        f"{duracion_str:12} "
-        f"→ {mensaje}\n"
-    )
+    # Calcular duración si la request está siendo medida
+    duracion_ms = None
+    transaction_id = None
+    if has_request_context():
+        transaction_id = g.get("transaction_id")
+        inicio = g.get("inicio_request")
+        if inicio is not None:
+            duracion_ms = round((time.perf_counter() - inicio) * 1000, 2)
     
-    # Guardar en archivo del módulo
-    ruta_modulo = os.path.join(BASE_LOG_DIR, modulo)
-    os.makedirs(ruta_modulo, exist_ok=True)
-    ruta_log = os.path.join(ruta_modulo, f"{modulo}.log")
-    
-    with open(ruta_log, "a", encoding="utf-8") as file:
-        file.write(linea_log)
+    if _FORMATO_JSON:
+        linea_log = _linea_json(
+            timestamp, nivel, modulo, request_data, caller_filename, caller_lineno,
+            caller_function, pid, thread_id, duracion_ms, transaction_id, mensaje, kwargs
+        )
+    else:
+        duracion_str = f"[{duracion_ms:.2f}ms]" if duracion_ms is not None else ""
+        
+        # Construir línea de log con TODOS los metadatos
+        linea_log = (
+            f"[{timestamp}] "
+            f"[{nivel:5}] "
+            f"[{request_data['request_id']}] "
+            f"[{transaction_id or '-'}] "
+            f"[{modulo:15}] "
+            f"[{caller_filename}:{caller_lineno:3}] "
+            f"[{caller_function:20}] "
+            f"[PID:{pid}] "
+            f"[Thread:{thread_id}] "
+            f"[IP:{request_data['ip']:15}] "
+            f"[{request_data['metodo']:6} {request_data['uri']:40}] "
+            f"{duracion_str:12} "
+            f"→ {mensaje}\n"
+        )
     
-    # Guardar en log centralizado
-    log_centralizado = os.path.join(BASE_LOG_DIR, "sistema_completo.log")
-    with open(log_centralizado, "a", encoding="utf-8") as file:
-        file.write(linea_log)
+    # Guardar en archivo del módulo y en el log centralizado
+    if LOG_CONFIG["asincrono"]:
+        obtener_escritor().encolar(modulo, linea_log, transaction_id)
+    else:
+        _escribir_sincrono(modulo, linea_log)
 
 
 def iniciar_medicion():
     """
     Inicia el contador de tiempo para la request actual.
-    Se llama al inicio de cada endpoint.
+    Se ejecuta automáticamente en before_request (ver configurar_medicion).
     """
     try:
-        request_data = obtener_datos_request()
-        request_id = request_data["request_id"]
-        tiempos_inicio[request_id] = time.time()
+        if g.get("inicio_request") is not None:
+            return
+        g.inicio_request = time.perf_counter()
+        g.inicio_request_epoch = time.time()
+        obtener_transaction_id()
         
+        request_data = obtener_datos_request()
         registrar_log(
             "system",
             "INFO",
@@ -195,27 +596,64 @@ def iniciar_medicion():
         print(f"Error al iniciar medición: {e}")
 
 
-def finalizar_medicion():
+def finalizar_medicion(error=None):
     """
     Finaliza el contador de tiempo y registra el tiempo total.
-    Se llama al final de cada endpoint.
+    Se ejecuta automáticamente en teardown_request, una sola vez por request,
+    aunque el endpoint haya lanzado una excepción.
     """
     try:
-        request_data = obtener_datos_request()
-        request_id = request_data["request_id"]
+        inicio = g.get("inicio_request")
+        if inicio is None or g.get("medicion_finalizada"):
+            return
+        g.medicion_finalizada = True
         
-        if request_id in tiempos_inicio:
-            duracion = (time.time() - tiempos_inicio[request_id]) * 1000
+        duracion = (time.perf_counter() - inicio) * 1000
+        g.duracion_request_ms = duracion
+        if error is not None:
+            registrar_log(
+                "system",
+                "ERROR",
+                f"=== FIN REQUEST CON EXCEPCIÓN ({error!r}): Tiempo total: {duracion:.2f}ms ==="
+            )
+        else:
             registrar_log(
                 "system",
                 "INFO",
                 f"=== FIN REQUEST: Tiempo total: {duracion:.2f}ms ==="
             )
-            del tiempos_inicio[request_id]
+        
+        servicio = request.blueprint[:-3] if request.blueprint and request.blueprint.endswith("_bp") \
+            else (request.blueprint or "app")
+        registrar_span(
+            "request", f"{request.method} {request.path}", g.inicio_request_epoch, duracion,
+            servicio=servicio,
+            estado=500 if error is not None else g.get("estado_respuesta")
+        )
     except Exception as e:
         print(f"Error al finalizar medición: {e}")
 
 
+def _agregar_header_transaccion(respuesta):
+    transaction_id = g.get("transaction_id")
+    if transaction_id:
+        respuesta.headers["X-Transaction-ID"] = transaction_id
+    g.estado_respuesta = respuesta.status_code
+    return respuesta
+
+
+def configurar_medicion(app):
+    """
+    Registra los hooks que miden cada request de la aplicación y
+    devuelven su transaction id en el header X-Transaction-ID.
+    El tiempo vive en flask.g, así que no se comparte entre threads ni
+    queda pendiente si el endpoint falla.
+    """
+    app.before_request(iniciar_medicion)
+    app.after_request(_agregar_header_transaccion)
+    app.teardown_request(finalizar_medicion)
+
+
 def log_decorator(modulo: str):
     """
     Decorador para logging automático de funciones.
@@ -229,19 +667,16 @@ def log_decorator(modulo: str):
     def decorator(func):
         @wraps(func)
         def wrapper(*args, **kwargs):
-            iniciar_medicion()
             registrar_log(modulo, "INFO", f"Ejecutando {func.__name__}")
             
             try:
                 resultado = func(*args, **kwargs)
                 registrar_log(modulo, "INFO", f"{func.__name__} ejecutado exitosamente")
-                finalizar_medicion()
                 return resultado
                 
             except Exception as e:
                 registrar_log(modulo, "ERROR", f"Excepción en {func.__name__}: {str(e)}")
-                finalizar_medicion()
                 raise
         
         return wrapper
-    return decorator
\ No newline at end of file
+    return decorator
@@ -0,0 +1,291 @@
+"""
+Métricas en proceso (formato de exposición de Prometheus)
+
+Cada thread acumula sus contadores e histogramas en su propio fragmento
+(threading.local), de modo que registrar una observación no toma ningún
+lock compartido. Al consultar /metrics se suman los fragmentos de los
+threads vivos y un acumulado de retirados: cuando un thread termina (el
+servidor de desarrollo crea uno por request) su fragmento se suma a ese
+acumulado y se descarta, así la memoria no crece con cada thread.
+
+Métricas expuestas:
+- http_requests_total{ruta,metodo,estado}
+- http_request_duracion_segundos{ruta,metodo} (histograma + cuantiles p50/p95/p99 estimados)
+- db_consultas_por_request{ruta} y db_tiempo_por_request_segundos{ruta} (histogramas)
+- db_consultas_total / db_tiempo_consultas_segundos_total
+- servicio_llamada_duracion_segundos{servicio,operacion,modo} (histograma)
+- pool_conexiones_* (gauges del pool de db.py)
+- logs_* (cola del escritor de logs)
+- cache_* (aciertos, fallos, invalidaciones y expulsiones de utils/cache.py)
+"""
+
+import bisect
+import threading
+import time
+import weakref
+
+from flask import g, request, has_request_context
+
+# Límites superiores de los buckets de latencia (segundos)
+BUCKETS_LATENCIA = (0.001, 0.0025, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0)
+
+# Límites de los buckets de número de consultas por request
+BUCKETS_CONSULTAS = (0, 1, 2, 3, 5, 8, 13, 21, 34, 55, 100)
+
+CUANTILES = (0.5, 0.95, 0.99)
+
+HISTOGRAMAS = {
+    "http_request_duracion_segundos": ("Latencia de las requests HTTP por ruta", BUCKETS_LATENCIA),
+    "db_consultas_por_request": ("Consultas SQL ejecutadas por request", BUCKETS_CONSULTAS),
+    "db_tiempo_por_request_segundos": ("Tiempo en consultas SQL por request", BUCKETS_LATENCIA),
+    "servicio_llamada_duracion_segundos": ("Latencia de llamadas entre servicios", BUCKETS_LATENCIA),
+}
+
+CONTADORES = {
+    "http_requests_total": "Requests HTTP atendidas por ruta y código de estado",
+    "db_consultas_total": "Consultas SQL ejecutadas",
+    "db_tiempo_consultas_segundos_total": "Tiempo acumulado en consultas SQL",
+}
+
+
+# ============================
+# FRAGMENTOS POR THREAD
+# ============================
+class _Fragmento:
+    """Datos de un solo thread; solo ese thread escribe en él."""
+
+    __slots__ = ("contadores", "histogramas")
+
+    def __init__(self):
+        self.contadores = {}      # (nombre, etiquetas) -> valor
+        self.histogramas = {}     # (nombre, etiquetas) -> [conteos por bucket..., suma, total]
+
+
+class _Dueno:
+    """Vive solo en el threading.local: se libera cuando el thread termina."""
+
+    __slots__ = ("fragmento", "__weakref__")
+
+    def __init__(self, fragmento):
+        self.fragmento = fragmento
+
+
+_local = threading.local()
+_fragmentos = set()             # fragmentos de threads vivos
+_retirados = _Fragmento()       # suma de los fragmentos de threads terminados
+_lock_fragmentos = threading.Lock()
+
+
+def _sumar_fragmento(contadores, histogramas, fragmento):
+    """Suma los datos de `fragmento` en los dicts `contadores` e `histogramas`."""
+    # list() copia de forma atómica frente al thread dueño del fragmento
+    for clave, valor in list(fragmento.contadores.items()):
+        contadores[clave] = contadores.get(clave, 0) + valor
+    for clave, datos in list(fragmento.histogramas.items()):
+        datos = list(datos)
+        acumulado = histogramas.get(clave)
+        if acumulado is None:
+            histogramas[clave] = datos
+        else:
+            for i, valor in enumerate(datos):
+                acumulado[i] += valor
+
+
+def _retirar(fragmento):
+    """Llamado al terminar el thread dueño de `fragmento` (ya nadie escribe en él)."""
+    with _lock_fragmentos:
+        _fragmentos.discard(fragmento)
+        _sumar_fragmento(_retirados.contadores, _retirados.histogramas, fragmento)
+
+
+def _fragmento():
+    dueno = getattr(_local, "dueno", None)
+    if dueno is None:
+        fragmento = _Fragmento()
+        dueno = _local.dueno = _Dueno(fragmento)
+        weakref.finalize(dueno, _retirar, fragmento)
+        with _lock_fragmentos:
+            _fragmentos.add(fragmento)
+    return dueno.fragmento
+
+
+def incrementar(nombre, etiquetas=(), valor=1):
+    """Suma `valor` al contador `nombre`. `etiquetas` es una tupla de pares (clave, valor)."""
+    contadores = _fragmento().contadores
+    clave = (nombre, etiquetas)
+    contadores[clave] = contadores.get(clave, 0) + valor
+
+
+def observar(nombre, valor, etiquetas=()):
+    """Registra `valor` en el histograma `nombre`."""
+    buckets = HISTOGRAMAS[nombre][1]
+    histogramas = _fragmento().histogramas
+    clave = (nombre, etiquetas)
+    datos = histogramas.get(clave)
+    if datos is None:
+        # Un conteo por bucket, uno para +Inf, la suma y el total
+        datos = histogramas[clave] = [0] * (len(buckets) + 1) + [0.0, 0]
+    datos[bisect.bisect_left(buckets, valor)] += 1
+    datos[-2] += valor
+    datos[-1] += 1
+
+
+# ============================
+# HOOKS DE REQUEST / BD / SERVICIOS
+# ============================
+def registrar_consulta(duracion):
+    """Llamado por el cursor del pool tras cada execute/executemany."""
+    incrementar("db_consultas_total")
+    incrementar("db_tiempo_consultas_segundos_total", valor=duracion)
+    if has_request_context():
+        g.db_consultas = g.get("db_consultas", 0) + 1
+        g.db_tiempo = g.get("db_tiempo", 0.0) + duracion
+
+
+def registrar_llamada_servicio(servicio, operacion, modo, duracion):
+    observar(
+        "servicio_llamada_duracion_segundos", duracion,
+        (("servicio", servicio), ("operacion", operacion), ("modo", modo))
+    )
+
+
+def _guardar_estado(respuesta):
+    g.estado_respuesta = respuesta.status_code
+    return respuesta
+
+
+def _registrar_request(error=None):
+    inicio = g.get("inicio_request")
+    if inicio is None or g.get("metricas_registradas"):
+        return
+    g.metricas_registradas = True
+
+    duracion = time.perf_counter() - inicio
+    ruta = request.url_rule.rule if request.url_rule is not None else "sin_ruta"
+    estado = 500 if error is not None else g.get("estado_respuesta", 500)
+
+    etiquetas = (("ruta", ruta), ("metodo", request.method))
+    incrementar("http_requests_total", etiquetas + (("estado", str(estado)),))
+    observar("http_request_duracion_segundos", duracion, etiquetas)
+    observar("db_consultas_por_request", g.get("db_consultas", 0), (("ruta", ruta),))
+    observar("db_tiempo_por_request_segundos", g.get("db_tiempo", 0.0), (("ruta", ruta),))
+
+
+def configurar_metricas(app):
+    """
+    Registra los hooks que alimentan las métricas HTTP.
+    Usa el instante de inicio que guarda utils.logger.iniciar_medicion en g,
+    por lo que debe llamarse junto con configurar_medicion(app).
+    """
+    app.after_request(_guardar_estado)
+    app.teardown_request(_registrar_request)
+
+
+# ============================
+# AGREGACIÓN Y EXPOSICIÓN
+# ============================
+def _agregar():
+    contadores = {}
+    histogramas = {}
+    with _lock_fragmentos:
+        # Vivos y retirados se toman juntos: un fragmento que se retira
+        # después no se cuenta dos veces
+        fragmentos = list(_fragmentos)
+        _sumar_fragmento(contadores, histogramas, _retirados)
+
+    for fragmento in fragmentos:
+        _sumar_fragmento(contadores, histogramas, fragmento)
+    return contadores, histogramas
+
+
+def estimar_cuantil(buckets, conteos, cuantil):
+    """
+    Estima el cuantil interpolando linealmente dentro del bucket que lo
+    contiene (mismo criterio que histogram_quantile de Prometheus).
+    """
+    total = sum(conteos)
+    if total == 0:
+        return None
+    objetivo = cuantil * total
+    acumulado = 0
+    for i, conteo in enumerate(conteos):
+        if acumulado + conteo >= objetivo and conteo > 0:
+            if i == len(buckets):
+                return buckets[-1]
+            inferior = buckets[i - 1] if i > 0 else 0.0
+            return inferior + (buckets[i] - inferior) * (objetivo - acumulado) / conteo
+        acumulado += conteo
+    return buckets[-1]
+
+
+def _etiquetas_texto(etiquetas):
+    if not etiquetas:
+        return ""
+    partes = []
+    for clave, valor in etiquetas:
+        valor = str(valor).replace("\\", "\\\\").replace('"', '\\"').replace("\n", "\\n")
+        partes.append(f'{clave}="{valor}"')
+    return "{" + ",".join(partes) + "}"
+
+
+def _numero(valor):
+    return repr(float(valor)) if isinstance(valor, float) else str(valor)
+
+
+def exportar_prometheus(metricas_pool=None, metricas_logs=None, metricas_caches=None):
+    """Genera el texto de /metrics."""
+    contadores, histogramas = _agregar()
+    lineas = []
+
+    for nombre, ayuda in CONTADORES.items():
+        lineas.append(f"# HELP {nombre} {ayuda}")
+        lineas.append(f"# TYPE {nombre} counter")
+        for (metrica, etiquetas), valor in sorted(contadores.items()):
+            if metrica == nombre:
+                lineas.append(f"{nombre}{_etiquetas_texto(etiquetas)} {_numero(valor)}")
+
+    for nombre, (ayuda, buckets) in HISTOGRAMAS.items():
+        series = sorted((e, d) for (m, e), d in histogramas.items() if m == nombre)
+        lineas.append(f"# HELP {nombre} {ayuda}")
+        lineas.append(f"# TYPE {nombre} histogram")
+        for etiquetas, datos in series:
+            conteos = datos[:-2]
+            acumulado = 0
+            for limite, conteo in zip(list(buckets) + ["+Inf"], conteos):
+                acumulado += conteo
+                le = "+Inf" if limite == "+Inf" else _numero(limite)
+                lineas.append(f"{nombre}_bucket{_etiquetas_texto(etiquetas + (('le', le),))} {acumulado}")
+            lineas.append(f"{nombre}_sum{_etiquetas_texto(etiquetas)} {_numero(datos[-2])}")
+            lineas.append(f"{nombre}_count{_etiquetas_texto(etiquetas)} {datos[-1]}")
+
+        if nombre == "http_request_duracion_segundos" and series:
+            lineas.append(f"# HELP {nombre}_cuantil Cuantiles estimados a partir del histograma")
+            lineas.append(f"# TYPE {nombre}_cuantil gauge")
+            for etiquetas, datos in series:
+                for cuantil in CUANTILES:
+                    valor = estimar_cuantil(buckets, datos[:-2], cuantil)
+                    if valor is not None:
+                        texto = _etiquetas_texto(etiquetas + (("quantile", str(cuantil)),))
+                        lineas.append(f"{nombre}_cuantil{texto} {_numero(valor)}")
+
+    if metricas_pool:
+        for clave, valor in metricas_pool.items():
+            lineas.append(f"# TYPE pool_conexiones_{clave} gauge")
+            lineas.append(f"pool_conexiones_{clave} {_numero(valor)}")
+
+    if metricas_logs:
+        for clave, valor in metricas_logs.items():
+            if isinstance(valor, bool):
+                valor = int(valor)
+            lineas.append(f"# TYPE logs_{clave} gauge")
+            lineas.append(f"logs_{clave} {_numero(valor)}")
+
+    if metricas_caches:
+        for clave in ("entradas", "aciertos", "fallos", "invalidaciones", "expulsiones"):
+            tipo = "gauge" if clave == "entradas" else "counter"
+            nombre = f"cache_{clave}" if clave == "entradas" else f"cache_{clave}_total"
+            lineas.append(f"# TYPE {nombre} {tipo}")
+            for cache, datos in sorted(metricas_caches.items()):
+                lineas.append(f"{nombre}{_etiquetas_texto((('cache', cache),))} {datos[clave]}")
+
+    return "\n".join(lineas) + "\n"
@@ -0,0 +1,107 @@
+"""
+Paginación por cursor (keyset) para los endpoints de listado.
+
+Parámetros de query:
+    limit=N     tamaño de página (por defecto PAGINACION_CONFIG["limite_defecto"])
+    after=XYZ   cursor devuelto como next_cursor por la página anterior
+    todos=1     sin paginación: devuelve la lista completa como antes
+
+Respuesta paginada:
+    {"data": [...], "next_cursor": "..." | null, "limit": N}
+
+El cursor codifica los valores de las columnas de orden de la última fila,
+de modo que la siguiente página se obtiene con un WHERE sobre columnas
+indexadas en lugar de un OFFSET.
+"""
+
+import base64
+import json
+from datetime import date, datetime
+
+from flask import request
+
+from config import PAGINACION_CONFIG
+
+
+class ErrorPaginacion(ValueError):
+    """Parámetros limit/after inválidos."""
+
+
+def paginacion_solicitada() -> bool:
+    """False si el cliente pidió explícitamente la lista completa (?todos=1)."""
+    return request.args.get("todos", "").lower() not in ("1", "true", "si")
+
+
+def codificar_cursor(valores: list) -> str:
+    valores = [
+        v.isoformat(sep=" ") if isinstance(v, datetime)
+        else v.isoformat() if isinstance(v, date)
+        else v
+        for v in valores
+    ]
+    texto = json.dumps(valores, separators=(",", ":"), default=str)
+    return base64.urlsafe_b64encode(texto.encode("utf-8")).decode("ascii").rstrip("=")
+
+
+def decodificar_cursor(cursor: str) -> list:
+    try:
+        relleno = "=" * (-len(cursor) % 4)
+        valores = json.loads(base64.urlsafe_b64decode(cursor + relleno).decode("utf-8"))
+    except (ValueError, UnicodeDecodeError):
+        raise ErrorPaginacion("El parámetro after no es un cursor válido")
+    if not isinstance(valores, list):
+        raise ErrorPaginacion("El parámetro after no es un cursor válido")
+    return valores
+
+
+def leer_parametros(num_columnas: int):
+    """
+    Lee limit y after de la request.
+
+    Returns:
+        (limite, valores_after | None)
+    """
+    try:
+        limite = int(request.args.get("limit", PAGINACION_CONFIG["limite_defecto"]))
+    except ValueError:
+        raise ErrorPaginacion("El parámetro limit debe ser un número")
+    if limite < 1 or limite > PAGINACION_CONFIG["limite_maximo"]:
+        raise ErrorPaginacion(f"El parámetro limit debe estar entre 1 y {PAGINACION_CONFIG['limite_maximo']}")
+
+    after = request.args.get("after")
+    if not after:
+        return limite, None
+
+    valores = decodificar_cursor(after)
+    if len(valores) != num_columnas:
+        raise ErrorPaginacion("El parámetro after no corresponde a este listado")
+    return limite, valores
+
+
+def condicion_keyset(columnas: list, valores: list, descendente: bool = False):
+    """
+    Arma la condición "(c1, c2, ...) > (v1, v2, ...)" expandida en ORs
+    para que MySQL la resuelva como rango sobre el índice.
+
+    Returns:
+        (sql, params)
+    """
+    operador = "<" if descendente else ">"
+    partes = []
+    params = []
+    for i, columna in enumerate(columnas):
+        condiciones = [f"{c} = %s" for c in columnas[:i]] + [f"{columna} {operador} %s"]
+        partes.append("(" + " AND ".join(condiciones) + ")")
+        params.extend(valores[:i + 1])
+    return "(" + " OR ".join(partes) + ")", params
+
+
+def armar_pagina(filas: list, limite: int, claves: list) -> dict:
+    """
+    Construye la respuesta paginada. `filas` debe traer hasta limite + 1
+    registros: el extra solo indica que hay una página siguiente.
+    """
+    hay_mas = len(filas) > limite
+    filas = filas[:limite]
+    next_cursor = codificar_cursor([filas[-1][k] for k in claves]) if hay_mas else None
+    return {"data": filas, "next_cursor": next_cursor, "limit": limite}
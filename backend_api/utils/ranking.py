@@ -0,0 +1,264 @@
+"""
+Orden de mérito por ciclo de matrícula.
+
+El mérito de un alumno en un ciclo es su promedio ponderado por créditos
+de las notas de ese ciclo. Por ciclo se mantiene en memoria:
+
+- por alumno: suma de nota * créditos, créditos evaluados y su casilla;
+- un árbol de Fenwick con la cantidad de alumnos por casilla, donde la
+  casilla es el promedio cuantizado a centésimas (0.00 - 20.00), ordenado
+  de mayor a menor.
+
+Así la posición de un alumno es 1 + alumnos en casillas mejores (O(log n)),
+un cambio de nota mueve al alumno de casilla con dos actualizaciones del
+árbol (O(log n)) y el top-k recorre solo las casillas ocupadas del inicio,
+sin reordenar. Alumnos con el mismo promedio (a la centésima) comparten
+posición.
+
+Cada ranking se construye la primera vez que se consulta su ciclo y queda
+asociado a las versiones de evaluaciones, cursos y alumnos
+(utils/versiones.py), leídas en la misma instantánea que las sumas. Las
+escrituras de notas de este proceso lo actualizan con
+registrar_cambio_nota(); cualquier otro cambio de versión (p. ej. una nota
+registrada por otro proceso) hace que se reconstruya en la siguiente
+consulta. Solo participan los alumnos activos.
+"""
+
+import threading
+
+from db import get_connection
+from utils.versiones import obtener_version
+
+ESCALA = 100                    # casillas por punto de nota (centésimas)
+CASILLAS = 20 * ESCALA + 1      # promedios 0.00 a 20.00
+
+TABLAS_RANKING = ("evaluaciones", "cursos", "alumnos")
+
+
+# ============================
+# ÁRBOL DE FENWICK
+# ============================
+class _Fenwick:
+    """Conteos por posición 1..n con suma de prefijos y búsqueda del k-ésimo en O(log n)."""
+
+    def __init__(self, conteos):
+        # Construcción lineal a partir de los conteos (índice 0 sin usar)
+        self.n = len(conteos) - 1
+        self.arbol = list(conteos)
+        for i in range(1, self.n + 1):
+            padre = i + (i & -i)
+            if padre <= self.n:
+                self.arbol[padre] += self.arbol[i]
+
+    def sumar(self, i, delta):
+        while i <= self.n:
+            self.arbol[i] += delta
+            i += i & -i
+
+    def prefijo(self, i):
+        total = 0
+        while i > 0:
+            total += self.arbol[i]
+            i -= i & -i
+        return total
+
+    def buscar(self, k):
+        """Menor i con prefijo(i) >= k (k entre 1 y el total)."""
+        posicion = 0
+        paso = 1 << self.n.bit_length()
+        while paso:
+            siguiente = posicion + paso
+            if siguiente <= self.n and self.arbol[siguiente] < k:
+                posicion = siguiente
+                k -= self.arbol[siguiente]
+            paso >>= 1
+        return posicion + 1
+
+
+# ============================
+# RANKING DE UN CICLO
+# ============================
+def _casilla(suma, creditos):
+    return int(round(suma / creditos * ESCALA))
+
+
+def _indice(casilla):
+    # Índice del árbol: la casilla más alta (20.00) es la 1
+    return CASILLAS - casilla
+
+
+class RankingCiclo:
+
+    def __init__(self, ciclo, sumas, version):
+        """`sumas`: {id_alumno: (suma nota * créditos, créditos)}."""
+        self.ciclo = ciclo
+        self.version = version
+        self.alumnos = {}           # id_alumno -> [suma, créditos, casilla]
+        self.por_casilla = {}       # casilla -> set de id_alumno
+
+        conteos = [0] * (CASILLAS + 1)
+        for id_alumno, (suma, creditos) in sumas.items():
+            if creditos <= 0:
+                continue
+            casilla = _casilla(suma, creditos)
+            self.alumnos[id_alumno] = [suma, creditos, casilla]
+            self.por_casilla.setdefault(casilla, set()).add(id_alumno)
+            conteos[_indice(casilla)] += 1
+        self.arbol = _Fenwick(conteos)
+
+    def __len__(self):
+        return len(self.alumnos)
+
+    def _quitar(self, id_alumno, casilla):
+        ids = self.por_casilla[casilla]
+        ids.discard(id_alumno)
+        if not ids:
+            del self.por_casilla[casilla]
+        self.arbol.sumar(_indice(casilla), -1)
+
+    def _poner(self, id_alumno, casilla):
+        self.por_casilla.setdefault(casilla, set()).add(id_alumno)
+        self.arbol.sumar(_indice(casilla), 1)
+
+    def actualizar(self, id_alumno, delta_suma, delta_creditos):
+        """Aplica el cambio de una nota del alumno en este ciclo."""
+        datos = self.alumnos.get(id_alumno)
+        if datos is None:
+            datos = self.alumnos[id_alumno] = [0.0, 0, None]
+        else:
+            self._quitar(id_alumno, datos[2])
+
+        datos[0] += delta_suma
+        datos[1] += delta_creditos
+        if datos[1] <= 0:
+            del self.alumnos[id_alumno]
+            return
+        datos[2] = _casilla(datos[0], datos[1])
+        self._poner(id_alumno, datos[2])
+
+    def _fila(self, posicion, id_alumno):
+        suma, creditos, _ = self.alumnos[id_alumno]
+        return {
+            "posicion": posicion,
+            "id_alumno": id_alumno,
+            "promedio_ponderado": round(suma / creditos, 2),
+            "creditos": creditos,
+        }
+
+    def posicion(self, id_alumno):
+        """Fila del alumno con su posición, o None si no tiene notas en el ciclo."""
+        datos = self.alumnos.get(id_alumno)
+        if datos is None:
+            return None
+        return self._fila(self.arbol.prefijo(_indice(datos[2]) - 1) + 1, id_alumno)
+
+    def top(self, k):
+        """Los primeros `k` alumnos (los empates en la casilla k-ésima se incluyen completos)."""
+        resultado = []
+        total = len(self.alumnos)
+        while len(resultado) < min(k, total):
+            posicion = len(resultado) + 1
+            casilla = CASILLAS - self.arbol.buscar(posicion)
+            for id_alumno in sorted(self.por_casilla[casilla]):
+                resultado.append(self._fila(posicion, id_alumno))
+        return resultado
+
+
+# ============================
+# RANKINGS POR CICLO (construcción diferida)
+# ============================
+_rankings = {}      # ciclo -> RankingCiclo
+_lock = threading.Lock()
+
+
+def _version_actual():
+    return tuple(obtener_version(tabla) for tabla in TABLAS_RANKING)
+
+
+def cargar_sumas_ciclo(ciclo):
+    """
+    Retorna ({id_alumno: (suma nota * créditos, créditos)} de los alumnos
+    activos evaluados en el ciclo, versión). La versión (tupla de
+    TABLAS_RANKING) se lee en la misma transacción REPEATABLE READ que las
+    sumas, así corresponde exactamente a los datos cargados.
+    """
+    conn = get_connection()
+    if conn is None:
+        raise ConnectionError("Error de conexión a la base de datos")
+    try:
+        conn.start_transaction(consistent_snapshot=True, isolation_level="REPEATABLE READ", readonly=True)
+        cursor = conn.cursor()
+        placeholders = ','.join(['%s'] * len(TABLAS_RANKING))
+        cursor.execute(
+            f"SELECT tabla, version FROM versiones_tablas WHERE tabla IN ({placeholders})", TABLAS_RANKING
+        )
+        versiones = {tabla: int(version) for tabla, version in cursor.fetchall()}
+        cursor.execute("""
+            SELECT m.id_alumno, SUM(e.nota * c.creditos), SUM(c.creditos)
+            FROM evaluaciones e
+            JOIN matriculas m ON m.id = e.id_matricula
+            JOIN cursos c ON c.id = m.id_curso
+            JOIN alumnos a ON a.id = m.id_alumno AND a.activo = 1
+            WHERE m.ciclo_matricula = %s
+            GROUP BY m.id_alumno
+        """, (ciclo,))
+        sumas = {fila[0]: (float(fila[1]), int(fila[2])) for fila in cursor.fetchall()}
+        cursor.close()
+        conn.commit()
+        return sumas, tuple(versiones.get(tabla) for tabla in TABLAS_RANKING)
+    finally:
+        conn.close()
+
+
+def _ranking_vigente(ciclo):
+    """Retorna el ranking del ciclo, construyéndolo si no existe o si cambió alguna versión."""
+    version = _version_actual()
+    with _lock:
+        ranking = _rankings.get(ciclo)
+        if ranking is not None and ranking.version == version and None not in version:
+            return ranking
+
+    # La versión del ranking nuevo es la de su instantánea, no la leída arriba:
+    # una nota confirmada entre ambas lecturas no se aplica dos veces
+    sumas, version = cargar_sumas_ciclo(ciclo)
+    ranking = RankingCiclo(ciclo, sumas, version)
+    with _lock:
+        _rankings[ciclo] = ranking
+    return ranking
+
+
+def top_ciclo(ciclo, k):
+    """{"ciclo", "total_alumnos", "data": [...]} con los primeros k del ciclo."""
+    ranking = _ranking_vigente(ciclo)
+    with _lock:
+        return {"ciclo": ciclo, "total_alumnos": len(ranking), "data": ranking.top(k)}
+
+
+def posicion_alumno(ciclo, id_alumno):
+    """Fila del alumno con su posición y el total del ciclo, o None si no tiene notas en él."""
+    ranking = _ranking_vigente(ciclo)
+    with _lock:
+        fila = ranking.posicion(id_alumno)
+        if fila is not None:
+            fila["total_alumnos"] = len(ranking)
+        return fila
+
+
+def registrar_cambio_nota(ciclo, id_alumno, delta_suma, delta_creditos, version_evaluaciones, activo):
+    """
+    Llamar después del commit de una escritura de notas de este proceso.
+    `version_evaluaciones` es la versión de evaluaciones que dejó esa
+    transacción (leer_version) y `activo` el estado del alumno leído en
+    ella. Los rankings construidos sobre la versión inmediatamente anterior
+    avanzan a esta aplicando el cambio (los alumnos inactivos no están en el
+    ranking, solo avanza la versión); los demás se descartan porque les
+    falta alguna escritura.
+    """
+    with _lock:
+        for c, ranking in list(_rankings.items()):
+            if ranking.version[0] != version_evaluaciones - 1:
+                del _rankings[c]
+                continue
+            if c == ciclo and activo:
+                ranking.actualizar(id_alumno, delta_suma, delta_creditos)
+            ranking.version = (version_evaluaciones,) + ranking.version[1:]
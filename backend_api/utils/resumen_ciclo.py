@@ -0,0 +1,246 @@
+"""
+Resumen materializado por ciclo (tabla resumen_ciclo).
+
+Guarda, por ciclo_matricula, los totales del reporte alumnos_ciclo
+(alumnos distintos, matrículas, aprobados, desaprobados y créditos), de
+modo que el reporte lee una fila por ciclo en vez de agrupar toda la tabla
+de matrículas.
+
+- Las funciones registrar_* / quitar_* / ajustar_* aplican deltas; se
+  llaman dentro de la transacción que modifica matrículas, evaluaciones o
+  créditos de un curso, antes del commit. Quien inserta o borra matrículas
+  debe llamar antes a versiones.bloquear_alumno(): así dos transacciones
+  del mismo alumno no deciden a la vez si es nuevo en el ciclo.
+- verificar_resumen_ciclo(): compara la tabla con el cálculo completo.
+- reconstruir_resumen_ciclo(): recalcula toda la tabla. Uso desde backend_api/:
+      python -m utils.resumen_ciclo                 (solo verifica)
+      python -m utils.resumen_ciclo --reconstruir   (verifica y reconstruye)
+"""
+
+import sys
+
+from utils.versiones import confirmar, incrementar_version
+
+CAMPOS_RESUMEN = ("total_alumnos", "total_matriculas", "aprobados", "desaprobados", "creditos")
+
+SQL_CALCULO_COMPLETO = """
+    SELECT m.ciclo_matricula as ciclo,
+           COUNT(DISTINCT m.id_alumno) as total_alumnos,
+           COUNT(*) as total_matriculas,
+           COALESCE(SUM(e.aprobado = 1), 0) as aprobados,
+           COALESCE(SUM(e.aprobado = 0), 0) as desaprobados,
+           COALESCE(SUM(c.creditos), 0) as creditos
+    FROM matriculas m
+    JOIN cursos c ON c.id = m.id_curso
+    LEFT JOIN evaluaciones e ON e.id_matricula = m.id
+    GROUP BY m.ciclo_matricula
+"""
+
+
+# ============================
+# DELTAS (dentro de la transacción del llamador)
+# ============================
+def aplicar_delta_resumen(conn, ciclo, total_alumnos=0, total_matriculas=0,
+                          aprobados=0, desaprobados=0, creditos=0):
+    """Suma los deltas a la fila del ciclo (la crea si no existe). No hace commit."""
+    cursor = conn.cursor()
+    try:
+        cursor.execute("""
+            INSERT INTO resumen_ciclo (ciclo, total_alumnos, total_matriculas, aprobados, desaprobados, creditos)
+            VALUES (%s, %s, %s, %s, %s, %s)
+            ON DUPLICATE KEY UPDATE
+                total_alumnos = total_alumnos + VALUES(total_alumnos),
+                total_matriculas = total_matriculas + VALUES(total_matriculas),
+                aprobados = aprobados + VALUES(aprobados),
+                desaprobados = desaprobados + VALUES(desaprobados),
+                creditos = creditos + VALUES(creditos)
+        """, (ciclo, total_alumnos, total_matriculas, aprobados, desaprobados, creditos))
+    finally:
+        cursor.close()
+
+
+def _matriculas_en_ciclo(conn, id_alumno, ciclo):
+    # Lectura con bloqueo: ve lo confirmado por otras transacciones, no la
+    # instantánea de esta (que en REPEATABLE READ puede ser anterior)
+    cursor = conn.cursor()
+    try:
+        cursor.execute(
+            "SELECT COUNT(*) FROM matriculas WHERE id_alumno = %s AND ciclo_matricula = %s FOR SHARE",
+            (id_alumno, ciclo)
+        )
+        return cursor.fetchone()[0]
+    finally:
+        cursor.close()
+
+
+def _creditos_de_cursos(conn, ids_cursos):
+    # Lectura con bloqueo compartido: los créditos son los confirmados, y un
+    # cambio de créditos del curso (ajustar_creditos_en_resumen) espera a
+    # esta transacción
+    placeholders = ','.join(['%s'] * len(ids_cursos))
+    cursor = conn.cursor()
+    try:
+        cursor.execute(
+            f"SELECT COALESCE(SUM(creditos), 0) FROM cursos WHERE id IN ({placeholders}) FOR SHARE",
+            tuple(ids_cursos)
+        )
+        return int(cursor.fetchone()[0])
+    finally:
+        cursor.close()
+
+
+def registrar_matriculas_en_resumen(conn, id_alumno, ciclo, ids_cursos):
+    """
+    Llamar después de insertar las matrículas del alumno en el ciclo, una
+    por curso de `ids_cursos` (sin repetidos). Los créditos se leen de la
+    tabla cursos en esta transacción, no del catálogo en caché. El alumno
+    cuenta como nuevo en el ciclo si no tenía otras matrículas en él.
+    """
+    cantidad = len(ids_cursos)
+    creditos = _creditos_de_cursos(conn, ids_cursos)
+    nuevo = 1 if _matriculas_en_ciclo(conn, id_alumno, ciclo) == cantidad else 0
+    aplicar_delta_resumen(
+        conn, ciclo, total_alumnos=nuevo, total_matriculas=cantidad, creditos=creditos
+    )
+
+
+def quitar_matricula_de_resumen(conn, id_alumno, ciclo, creditos, aprobado=None):
+    """
+    Llamar después de borrar una matrícula. `aprobado` es el de su
+    evaluación (borrada en cascada), o None si no tenía.
+    """
+    sin_matriculas = 1 if _matriculas_en_ciclo(conn, id_alumno, ciclo) == 0 else 0
+    aplicar_delta_resumen(
+        conn, ciclo,
+        total_alumnos=-sin_matriculas,
+        total_matriculas=-1,
+        aprobados=-1 if aprobado == 1 else 0,
+        desaprobados=-1 if aprobado == 0 else 0,
+        creditos=-creditos
+    )
+
+
+def registrar_evaluacion_en_resumen(conn, ciclo, aprobado_anterior, aprobado_nuevo):
+    """
+    Mueve la matrícula entre aprobados/desaprobados. None significa "sin
+    evaluación": (None, x) al crear, (x, y) al editar y (x, None) al eliminar.
+    """
+    aprobados = (aprobado_nuevo == 1) - (aprobado_anterior == 1)
+    desaprobados = (aprobado_nuevo == 0) - (aprobado_anterior == 0)
+    if aprobados or desaprobados:
+        aplicar_delta_resumen(conn, ciclo, aprobados=aprobados, desaprobados=desaprobados)
+
+
+def ajustar_creditos_en_resumen(conn, id_curso, creditos_nuevos):
+    """
+    Llamar antes de actualizar los créditos del curso, con su fila ya
+    bloqueada (SELECT ... FOR UPDATE): corrige los créditos de cada ciclo
+    según las matrículas que tiene el curso.
+    """
+    cursor = conn.cursor()
+    try:
+        cursor.execute("""
+            UPDATE resumen_ciclo r
+            JOIN (
+                SELECT m.ciclo_matricula, COUNT(*) as cantidad, c.creditos
+                FROM matriculas m
+                JOIN cursos c ON c.id = m.id_curso
+                WHERE m.id_curso = %s
+                GROUP BY m.ciclo_matricula, c.creditos
+            ) d ON d.ciclo_matricula = r.ciclo
+            SET r.creditos = r.creditos + d.cantidad * (%s - d.creditos)
+            WHERE d.creditos <> %s
+        """, (id_curso, creditos_nuevos, creditos_nuevos))
+    finally:
+        cursor.close()
+
+
+# ============================
+# LECTURA, VERIFICACIÓN Y RECONSTRUCCIÓN
+# ============================
+def obtener_resumen_ciclos(conn):
+    """Filas del resumen con al menos una matrícula, ordenadas por ciclo."""
+    cursor = conn.cursor(dictionary=True)
+    try:
+        cursor.execute(f"""
+            SELECT ciclo, {', '.join(CAMPOS_RESUMEN)}
+            FROM resumen_ciclo
+            WHERE total_matriculas > 0
+            ORDER BY ciclo
+        """)
+        return cursor.fetchall()
+    finally:
+        cursor.close()
+
+
+def verificar_resumen_ciclo(conn):
+    """
+    Compara la tabla con el cálculo completo sobre matrículas.
+    Retorna la lista de diferencias [{ciclo, campo, resumen, real}].
+    """
+    cursor = conn.cursor(dictionary=True)
+    try:
+        cursor.execute(f"SELECT ciclo, {', '.join(CAMPOS_RESUMEN)} FROM resumen_ciclo")
+        resumen = {fila["ciclo"]: fila for fila in cursor.fetchall()}
+        cursor.execute(SQL_CALCULO_COMPLETO)
+        real = {fila["ciclo"]: fila for fila in cursor.fetchall()}
+    finally:
+        cursor.close()
+
+    diferencias = []
+    for ciclo in sorted(set(resumen) | set(real)):
+        for campo in CAMPOS_RESUMEN:
+            valor_resumen = int(resumen.get(ciclo, {}).get(campo, 0))
+            valor_real = int(real.get(ciclo, {}).get(campo, 0))
+            if valor_resumen != valor_real:
+                diferencias.append({
+                    "ciclo": ciclo, "campo": campo,
+                    "resumen": valor_resumen, "real": valor_real
+                })
+    return diferencias
+
+
+def reconstruir_resumen_ciclo(conn):
+    """
+    Recalcula toda la tabla en una transacción.
+    Retorna la cantidad de ciclos generados.
+    """
+    cursor = conn.cursor()
+    try:
+        cursor.execute("DELETE FROM resumen_ciclo")
+        cursor.execute(f"""
+            INSERT INTO resumen_ciclo (ciclo, {', '.join(CAMPOS_RESUMEN)})
+            {SQL_CALCULO_COMPLETO}
+        """)
+        filas = cursor.rowcount
+        incrementar_version(cursor, "resumen_ciclo")
+        confirmar(conn)
+        return filas
+    except Exception:
+        conn.rollback()
+        raise
+    finally:
+        cursor.close()
+
+
+if __name__ == "__main__":
+    from db import get_connection
+
+    conn = get_connection()
+    if conn is None:
+        print("❌ No se pudo conectar a MySQL")
+        sys.exit(1)
+    try:
+        diferencias = verificar_resumen_ciclo(conn)
+        if not diferencias:
+            print("✅ resumen_ciclo es consistente")
+        for d in diferencias:
+            print(f"⚠ Ciclo {d['ciclo']}: {d['campo']} = {d['resumen']} (real {d['real']})")
+
+        if "--reconstruir" in sys.argv[1:]:
+            print("Reconstruyendo resumen_ciclo...")
+            print(f"✅ {reconstruir_resumen_ciclo(conn)} ciclos generados")
+        elif diferencias:
+            sys.exit(1)
+    finally:
+        conn.close()
@@ -0,0 +1,333 @@
+"""
+Rotación, compresión e índice de transacciones de los archivos de log
+
+Los archivos se escriben por segmentos. El segmento activo conserva el
+nombre de siempre (p. ej. logs/sistema_completo.log) y su identificador se
+guarda en <archivo>.segmento. Al superar `max_mb` o al cambiar el día, el
+segmento se renombra a <archivo>.<id>, se comprime a <archivo>.<id>.gz en
+un hilo aparte y se conservan como máximo `max_segmentos` segmentos rotados.
+
+Para los archivos indexados (el log centralizado) se mantiene un índice por
+segmento, <archivo>.<id>.idx, con una línea por transacción y volcado:
+
+    TXN-...<TAB>offset:longitud,offset:longitud,...
+
+Los offsets son posiciones en bytes del segmento sin comprimir, así que
+buscar una transacción solo lee los índices y las líneas exactas, sin
+recorrer los logs completos.
+
+Cada archivo tiene un único escritor, que es quien lo rota. Con varios
+procesos sobre el mismo directorio de logs, cada uno reserva una ranura con
+reservar_ranura() (un archivo de lock por ranura que se libera al terminar
+el proceso): la ranura 0 usa los nombres de siempre y la ranura n escribe
+<nombre>.<n>.log (p. ej. logs/sistema_completo.1.log), con sus propios
+segmentos e índices. buscar_lineas_transaccion() recorre todas las ranuras.
+"""
+
+import glob
+import gzip
+import os
+import queue
+import shutil
+import threading
+import time
+from datetime import datetime
+
+try:
+    import fcntl
+except ImportError:     # Windows
+    fcntl = None
+    import msvcrt
+
+
+# ============================
+# RANURAS DE ESCRITOR (un escritor por archivo)
+# ============================
+def _bloquear(archivo):
+    """Lock exclusivo sin espera sobre `archivo`; False si otro proceso lo tiene."""
+    try:
+        if fcntl is not None:
+            fcntl.flock(archivo.fileno(), fcntl.LOCK_EX | fcntl.LOCK_NB)
+        else:
+            archivo.seek(0)
+            msvcrt.locking(archivo.fileno(), msvcrt.LK_NBLCK, 1)
+        return True
+    except OSError:
+        return False
+
+
+def reservar_ranura(directorio):
+    """
+    Reserva la primera ranura de escritor libre de `directorio` para este
+    proceso. Retorna (ranura, archivo de lock); el lock dura mientras el
+    archivo siga abierto, y el sistema lo libera si el proceso termina.
+    """
+    os.makedirs(directorio, exist_ok=True)
+    ranura = 0
+    while True:
+        archivo = open(os.path.join(directorio, f".escritor-{ranura}.lock"), "a+b")
+        if _bloquear(archivo):
+            return ranura, archivo
+        archivo.close()
+        ranura += 1
+
+
+def ruta_de_ranura(ruta, ranura):
+    """Ruta que escribe la ranura: la misma para la 0, <nombre>.<ranura>.log para las demás."""
+    if not ranura:
+        return ruta
+    raiz, extension = os.path.splitext(ruta)
+    return f"{raiz}.{ranura}{extension}"
+
+
+def rutas_de_ranuras(ruta):
+    """`ruta` y las rutas de las demás ranuras que existan en disco."""
+    raiz, extension = os.path.splitext(ruta)
+    ranuras = []
+    for candidato in glob.glob(glob.escape(raiz) + ".*" + glob.escape(extension)):
+        ranura = candidato[len(raiz) + 1:len(candidato) - len(extension)]
+        if ranura.isdigit():
+            ranuras.append(int(ranura))
+    return [ruta] + [ruta_de_ranura(ruta, ranura) for ranura in sorted(ranuras)]
+
+
+# ============================
+# ARCHIVO CON ROTACIÓN
+# ============================
+class ArchivoRotativo:
+    """Archivo de log en modo append binario con rotación por tamaño y por día."""
+
+    def __init__(self, ruta, max_mb=50, rotacion_diaria=True, indexar=False, compresor=None):
+        self.ruta = ruta
+        self.max_bytes = int(max_mb * 1024 * 1024) if max_mb else None
+        self.rotacion_diaria = rotacion_diaria
+        self.indexar = indexar
+        self.compresor = compresor
+
+        self._archivo = None
+        self._indice = None
+        self.tamano = 0
+        self.dia = None
+        self.segmento = None
+        self._abrir()
+
+    # ----------------------------
+    # Apertura / rotación
+    # ----------------------------
+    def _nuevo_segmento(self):
+        base = datetime.now().strftime("%Y%m%d-%H%M%S")
+        segmento, n = base, 1
+        while glob.glob(glob.escape(f"{self.ruta}.{segmento}") + "*"):
+            n += 1
+            segmento = f"{base}-{n}"
+        with open(self.ruta + ".segmento", "w", encoding="utf-8") as archivo:
+            archivo.write(segmento)
+        return segmento
+
+    def _abrir(self):
+        os.makedirs(os.path.dirname(self.ruta), exist_ok=True)
+        self._archivo = open(self.ruta, "ab")
+        self.tamano = self._archivo.tell()
+
+        if self.tamano:
+            # Un archivo de un día anterior se rota en la primera escritura
+            self.dia = time.strftime("%Y%m%d", time.localtime(os.path.getmtime(self.ruta)))
+        else:
+            self.dia = time.strftime("%Y%m%d")
+
+        try:
+            with open(self.ruta + ".segmento", encoding="utf-8") as archivo:
+                self.segmento = archivo.read().strip() or None
+        except OSError:
+            self.segmento = None
+        if self.segmento is None:
+            self.segmento = self._nuevo_segmento()
+
+        if self.indexar:
+            self._indice = open(f"{self.ruta}.{self.segmento}.idx", "a", encoding="utf-8")
+
+    def _debe_rotar(self, bytes_nuevos):
+        if self.tamano == 0:
+            return False
+        if self.rotacion_diaria and time.strftime("%Y%m%d") != self.dia:
+            return True
+        return self.max_bytes is not None and self.tamano + bytes_nuevos > self.max_bytes
+
+    def rotar(self):
+        self.cerrar()
+        rotado = f"{self.ruta}.{self.segmento}"
+        os.replace(self.ruta, rotado)
+        try:
+            os.remove(self.ruta + ".segmento")
+        except OSError:
+            pass
+        if self.compresor is not None:
+            self.compresor.encolar(rotado, self.ruta)
+        self._abrir()
+
+    # ----------------------------
+    # Escritura
+    # ----------------------------
+    def escribir(self, lineas):
+        """
+        Escribe un lote de (línea, transaction_id) y actualiza el índice.
+        """
+        bloques = [linea.encode("utf-8") for linea, _ in lineas]
+        total = sum(len(b) for b in bloques)
+        if self._debe_rotar(total):
+            self.rotar()
+
+        if self.indexar:
+            posiciones = {}
+            offset = self.tamano
+            for (_, transaction_id), bloque in zip(lineas, bloques):
+                if transaction_id:
+                    posiciones.setdefault(transaction_id, []).append(f"{offset}:{len(bloque)}")
+                offset += len(bloque)
+
+        self._archivo.write(b"".join(bloques))
+        self._archivo.flush()
+        self.tamano += total
+
+        if self.indexar and posiciones:
+            self._indice.write("".join(
+                f"{txn}\t{','.join(pos)}\n" for txn, pos in posiciones.items()
+            ))
+            self._indice.flush()
+
+    def cerrar(self):
+        if self._archivo is not None:
+            self._archivo.close()
+            self._archivo = None
+        if self._indice is not None:
+            self._indice.close()
+            self._indice = None
+
+
+# ============================
+# COMPRESIÓN Y RETENCIÓN (hilo aparte)
+# ============================
+def segmentos_rotados(ruta):
+    """Segmentos rotados de `ruta` (comprimidos o no), del más antiguo al más reciente."""
+    try:
+        with open(ruta + ".segmento", encoding="utf-8") as archivo:
+            activo = archivo.read().strip()
+    except OSError:
+        activo = None
+
+    segmentos = set()
+    for candidato in glob.glob(glob.escape(ruta) + ".*"):
+        sufijo = candidato[len(ruta) + 1:]
+        if sufijo == "segmento":
+            continue
+        for extension in (".gz", ".idx"):
+            if sufijo.endswith(extension):
+                sufijo = sufijo[:-len(extension)]
+        if sufijo != activo and not sufijo.endswith(".tmp"):
+            segmentos.add(sufijo)
+    return sorted(segmentos)
+
+
+class CompresorLogs:
+    """Comprime los segmentos rotados y aplica la retención fuera del hilo escritor."""
+
+    def __init__(self, max_segmentos=30, comprimir=True):
+        self.max_segmentos = max_segmentos
+        self.comprimir = comprimir
+        self._cola = queue.Queue()
+        self._hilo = threading.Thread(target=self._ejecutar, name="compresor-logs", daemon=True)
+        self._hilo.start()
+
+    def encolar(self, rotado, ruta_base):
+        self._cola.put((rotado, ruta_base))
+
+    def detener(self, timeout=10):
+        self._cola.put(None)
+        self._hilo.join(timeout)
+
+    def _comprimir(self, rotado):
+        with open(rotado, "rb") as origen, gzip.open(rotado + ".gz.tmp", "wb") as destino:
+            shutil.copyfileobj(origen, destino)
+        os.replace(rotado + ".gz.tmp", rotado + ".gz")
+        os.remove(rotado)
+
+    def _aplicar_retencion(self, ruta_base):
+        if not self.max_segmentos:
+            return
+        segmentos = segmentos_rotados(ruta_base)
+        for segmento in segmentos[:-self.max_segmentos]:
+            for extension in ("", ".gz", ".idx"):
+                try:
+                    os.remove(f"{ruta_base}.{segmento}{extension}")
+                except OSError:
+                    pass
+
+    def _ejecutar(self):
+        while True:
+            item = self._cola.get()
+            if item is None:
+                return
+            rotado, ruta_base = item
+            try:
+                if self.comprimir:
+                    self._comprimir(rotado)
+                self._aplicar_retencion(ruta_base)
+            except OSError as e:
+                print(f"🔥 ERROR COMPRIMIENDO LOG {rotado}: {e}")
+
+
+# ============================
+# BÚSQUEDA POR TRANSACCIÓN
+# ============================
+def _abrir_segmento(ruta, segmento, segmento_activo):
+    if segmento == segmento_activo:
+        return open(ruta, "rb")
+    if os.path.exists(f"{ruta}.{segmento}"):
+        return open(f"{ruta}.{segmento}", "rb")
+    if os.path.exists(f"{ruta}.{segmento}.gz"):
+        return gzip.open(f"{ruta}.{segmento}.gz", "rb")
+    return None
+
+
+def buscar_lineas_transaccion(ruta, transaction_id):
+    """
+    Retorna las líneas de `transaction_id` en el log `ruta` y en los de las
+    demás ranuras de escritor (con sus versiones rotadas), usando los
+    índices. Dentro de cada archivo quedan en orden de escritura.
+    """
+    lineas = []
+    for ruta_ranura in rutas_de_ranuras(ruta):
+        lineas.extend(_buscar_en_archivo(ruta_ranura, transaction_id))
+    return lineas
+
+
+def _buscar_en_archivo(ruta, transaction_id):
+    try:
+        with open(ruta + ".segmento", encoding="utf-8") as archivo:
+            segmento_activo = archivo.read().strip()
+    except OSError:
+        segmento_activo = None
+
+    prefijo = transaction_id + "\t"
+    lineas = []
+    for ruta_indice in sorted(glob.glob(glob.escape(ruta) + ".*.idx")):
+        segmento = ruta_indice[len(ruta) + 1:-len(".idx")]
+        posiciones = []
+        with open(ruta_indice, encoding="utf-8") as indice:
+            for entrada in indice:
+                if entrada.startswith(prefijo):
+                    for par in entrada[len(prefijo):].strip().split(","):
+                        offset, longitud = par.split(":")
+                        posiciones.append((int(offset), int(longitud)))
+        if not posiciones:
+            continue
+
+        archivo = _abrir_segmento(ruta, segmento, segmento_activo)
+        if archivo is None:
+            continue
+        with archivo:
+            # Lectura en orden creciente: en .gz el seek solo avanza
+            for offset, longitud in sorted(posiciones):
+                archivo.seek(offset)
+                lineas.append(archivo.read(longitud).decode("utf-8").rstrip("\n"))
+    return lineas
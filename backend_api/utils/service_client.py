@@ -0,0 +1,153 @@
+"""
+Cliente de Servicios - Arquitectura Orientada a Servicios (SOA)
+
+Punto único para que un servicio consulte a otro (alumnos, cursos, matrículas).
+Según SERVICIOS_CONFIG["modo"]:
+
+- "local":  si el servicio destino está registrado en este proceso, se llama
+            directamente a su función de servicio (sin HTTP ni JSON).
+- "remoto": se consulta por HTTP a la URL configurada del servicio.
+
+Cada módulo de rutas registra sus funciones de servicio con
+registrar_servicio_local(); si un servicio no está registrado (porque corre
+en otro proceso), el cliente usa HTTP aunque el modo sea "local".
+
+En modo remoto las llamadas reutilizan una sesión HTTP por host destino con
+conexiones keep-alive, por lo que no se abre una conexión TCP por consulta.
+"""
+
+import threading
+import time
+from collections import namedtuple
+from urllib.parse import urlsplit
+
+import requests
+from requests.adapters import HTTPAdapter
+from urllib3.util.retry import Retry
+
+from config import SERVICIOS_CONFIG
+from utils.logger import obtener_transaction_id, registrar_span
+from utils.metricas import registrar_llamada_servicio
+
+# Rutas HTTP de cada operación, relativas a la URL del servicio
+RUTAS_OPERACIONES = {
+    "obtener": "/{id}",
+    "validar": "/validar/{id}",
+    "validar_lote": "/validar?ids={id}"
+}
+
+RespuestaServicio = namedtuple("RespuestaServicio", ["status_code", "datos"])
+
+_servicios_locales = {}
+
+_sesiones = {}
+_lock_sesiones = threading.Lock()
+
+
+def registrar_servicio_local(servicio: str, operacion: str, funcion):
+    """
+    Registra la función que atiende `operacion` del `servicio` en este proceso.
+    La función recibe el ID de la entidad (o la lista de IDs en operaciones
+    de lote) y retorna el mismo cuerpo que
+    devolvería el endpoint HTTP, o None si la entidad no existe.
+    """
+    _servicios_locales[(servicio, operacion)] = funcion
+
+
+def _llamar_local(funcion, id_entidad):
+    datos = funcion(id_entidad)
+    if datos is None:
+        return RespuestaServicio(404, None)
+    return RespuestaServicio(200, datos)
+
+
+def _crear_sesion():
+    reintentos = Retry(
+        total=SERVICIOS_CONFIG["reintentos"],
+        backoff_factor=SERVICIOS_CONFIG["backoff"],
+        status_forcelist=(502, 503, 504),
+        allowed_methods=frozenset(["GET"]),
+        raise_on_status=False
+    )
+    adaptador = HTTPAdapter(
+        pool_connections=1,
+        pool_maxsize=SERVICIOS_CONFIG["pool_maxsize"],
+        max_retries=reintentos,
+        pool_block=False
+    )
+    sesion = requests.Session()
+    sesion.mount("http://", adaptador)
+    sesion.mount("https://", adaptador)
+    return sesion
+
+
+def obtener_sesion(url: str) -> requests.Session:
+    """
+    Retorna la sesión HTTP compartida del host de `url`, creándola la primera vez.
+    El pool de conexiones de cada sesión es seguro entre hilos.
+    """
+    partes = urlsplit(url)
+    host = f"{partes.scheme}://{partes.netloc}"
+    sesion = _sesiones.get(host)
+    if sesion is None:
+        with _lock_sesiones:
+            sesion = _sesiones.get(host)
+            if sesion is None:
+                sesion = _sesiones[host] = _crear_sesion()
+    return sesion
+
+
+def cerrar_sesiones():
+    """Cierra las conexiones keep-alive abiertas (p. ej. al apagar el proceso)."""
+    with _lock_sesiones:
+        for sesion in _sesiones.values():
+            sesion.close()
+        _sesiones.clear()
+
+
+def _llamar_remoto(servicio, operacion, id_entidad, transaction_id):
+    if isinstance(id_entidad, (list, tuple)):
+        id_entidad = ",".join(str(i) for i in id_entidad)
+    url = SERVICIOS_CONFIG["urls"][servicio] + RUTAS_OPERACIONES[operacion].format(id=id_entidad)
+    transaction_id = transaction_id or obtener_transaction_id()
+    headers = {"X-Transaction-ID": transaction_id} if transaction_id else {}
+
+    respuesta = obtener_sesion(url).get(url, headers=headers, timeout=SERVICIOS_CONFIG["timeout"])
+    datos = respuesta.json() if respuesta.status_code == 200 else None
+    return RespuestaServicio(respuesta.status_code, datos)
+
+
+def llamar_servicio(servicio: str, operacion: str, id_entidad, transaction_id: str = None) -> RespuestaServicio:
+    """
+    Ejecuta `operacion` sobre el `servicio` indicado.
+
+    Returns:
+        RespuestaServicio(status_code, datos): datos es el cuerpo de la
+        respuesta si status_code == 200, None en otro caso.
+
+    Las excepciones de red (requests.exceptions.*) o de la función local
+    se propagan al llamador.
+
+    Cada llamada se registra como un span de la transacción actual; en modo
+    remoto el transaction id viaja en el header X-Transaction-ID.
+    """
+    funcion = _servicios_locales.get((servicio, operacion))
+    local = SERVICIOS_CONFIG["modo"] == "local" and funcion is not None
+    modo = "local" if local else "remoto"
+    inicio_epoch = time.time()
+    inicio = time.perf_counter()
+    estado = None
+    try:
+        if local:
+            respuesta = _llamar_local(funcion, id_entidad)
+        else:
+            respuesta = _llamar_remoto(servicio, operacion, id_entidad, transaction_id)
+        estado = respuesta.status_code
+        return respuesta
+    finally:
+        duracion = time.perf_counter() - inicio
+        registrar_llamada_servicio(servicio, operacion, modo, duracion)
+        registrar_span(
+            "llamada_servicio", f"{servicio}.{operacion}", inicio_epoch, duracion * 1000,
+            servicio=servicio, modo=modo, estado=estado
+        )
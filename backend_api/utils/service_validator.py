@@ -5,11 +5,19 @@ Este módulo implementa validaciones entre servicios sin acceso directo a BD.
 Según el laboratorio: "Los servicios no deben consumir repositorios de otros servicios"
 """
 
+import contextvars
+from concurrent.futures import ThreadPoolExecutor, wait
+
 import requests
+from config import VALIDACION_CONFIG
 from utils.logger import registrar_log
+from utils.service_client import llamar_servicio
 
-# URL base de la API (ajustar según tu configuración)
-API_BASE_URL = "http://127.0.0.1:5000/api"
+# Executor compartido y acotado para las validaciones remotas
+_executor = ThreadPoolExecutor(
+    max_workers=VALIDACION_CONFIG["max_workers"],
+    thread_name_prefix="service_validator"
+)
 
 
 def validar_alumno_existe(alumno_id: int) -> dict:
@@ -23,11 +31,10 @@ def validar_alumno_existe(alumno_id: int) -> dict:
         registrar_log("service_validator", "INFO", 
                      f"Validando existencia del alumno ID={alumno_id} mediante servicio")
         
-        url = f"{API_BASE_URL}/alumnos/{alumno_id}"
-        response = requests.get(url, timeout=5)
+        response = llamar_servicio("alumnos", "obtener", alumno_id)
         
         if response.status_code == 200:
-            alumno_data = response.json()
+            alumno_data = response.datos
             registrar_log("service_validator", "INFO", 
                          f"Alumno ID={alumno_id} existe: {alumno_data.get('nombre')} {alumno_data.get('apellido')}")
             return {
@@ -60,7 +67,7 @@ def validar_alumno_existe(alumno_id: int) -> dict:
             "mensaje": "Timeout en servicio de alumnos",
             "data": None
         }
-    except requests.exceptions.RequestException as e:
+    except (requests.exceptions.RequestException, ConnectionError) as e:
         registrar_log("service_validator", "ERROR", 
                      f"Excepción al validar alumno: {str(e)}")
         return {
@@ -81,11 +88,10 @@ def validar_curso_existe(curso_id: int) -> dict:
         registrar_log("service_validator", "INFO", 
                      f"Validando existencia del curso ID={curso_id} mediante servicio")
         
-        url = f"{API_BASE_URL}/cursos/{curso_id}"
-        response = requests.get(url, timeout=5)
+        response = llamar_servicio("cursos", "obtener", curso_id)
         
         if response.status_code == 200:
-            curso_data = response.json()
+            curso_data = response.datos
             registrar_log("service_validator", "INFO", 
                          f"Curso ID={curso_id} existe: {curso_data.get('codigo')} - {curso_data.get('nombre')}")
             return {
@@ -118,7 +124,7 @@ def validar_curso_existe(curso_id: int) -> dict:
             "mensaje": "Timeout en servicio de cursos",
             "data": None
         }
-    except requests.exceptions.RequestException as e:
+    except (requests.exceptions.RequestException, ConnectionError) as e:
         registrar_log("service_validator", "ERROR", 
                      f"Excepción al validar curso: {str(e)}")
         return {
@@ -139,11 +145,10 @@ def validar_matricula_existe(matricula_id: int) -> dict:
         registrar_log("service_validator", "INFO", 
                      f"Validando existencia de matrícula ID={matricula_id} mediante servicio")
         
-        url = f"{API_BASE_URL}/matriculas/{matricula_id}"
-        response = requests.get(url, timeout=5)
+        response = llamar_servicio("matriculas", "obtener", matricula_id)
         
         if response.status_code == 200:
-            matricula_data = response.json()
+            matricula_data = response.datos
             registrar_log("service_validator", "INFO", 
                          f"Matrícula ID={matricula_id} existe")
             return {
@@ -176,7 +181,7 @@ def validar_matricula_existe(matricula_id: int) -> dict:
             "mensaje": "Timeout en servicio de matrículas",
             "data": None
         }
-    except requests.exceptions.RequestException as e:
+    except (requests.exceptions.RequestException, ConnectionError) as e:
         registrar_log("service_validator", "ERROR", 
                      f"Excepción al validar matrícula: {str(e)}")
         return {
@@ -186,28 +191,77 @@ def validar_matricula_existe(matricula_id: int) -> dict:
         }
 
 
+def _validar_concurrente(validaciones: dict, plazo: float) -> dict:
+    """
+    Ejecuta las validaciones en el executor compartido y espera a lo sumo
+    `plazo` segundos por el conjunto completo.
+    
+    Args:
+        validaciones: {nombre: (funcion, argumento)}
+    
+    Returns:
+        dict: {nombre: resultado}; las que no terminan a tiempo o fallan
+        retornan {"existe": False, ...} con el motivo.
+    """
+    # Cada tarea corre en una copia del contexto para conservar la request de Flask
+    futuros = {
+        nombre: _executor.submit(contextvars.copy_context().run, funcion, argumento)
+        for nombre, (funcion, argumento) in validaciones.items()
+    }
+    terminados, _ = wait(futuros.values(), timeout=plazo)
+    
+    resultados = {}
+    for nombre, futuro in futuros.items():
+        if futuro not in terminados:
+            futuro.cancel()
+            registrar_log("service_validator", "ERROR", 
+                         f"Validación de {nombre} excedió el plazo de {plazo}s")
+            resultados[nombre] = {
+                "existe": False,
+                "mensaje": f"Plazo de validación excedido ({plazo}s)",
+                "data": None
+            }
+        elif futuro.exception() is not None:
+            registrar_log("service_validator", "ERROR", 
+                         f"Excepción al validar {nombre}: {str(futuro.exception())}")
+            resultados[nombre] = {
+                "existe": False,
+                "mensaje": f"Error al validar {nombre}: {str(futuro.exception())}",
+                "data": None
+            }
+        else:
+            resultados[nombre] = futuro.result()
+    return resultados
+
+
 def validar_datos_matricula(alumno_id: int, curso_id: int) -> dict:
     """
     Valida en paralelo que alumno y curso existan antes de crear matrícula.
     Implementa SOA: no accede directamente a BD, usa servicios.
     
+    Ambas consultas corren a la vez con un plazo total común, por lo que la
+    latencia es la de la validación más lenta y no la suma de ambas.
+    
     Returns:
         dict: {"valido": bool, "mensaje": str, "errores": list}
     """
     registrar_log("service_validator", "INFO", 
                  f"Validando datos para matrícula: Alumno={alumno_id}, Curso={curso_id}")
     
+    resultados = _validar_concurrente({
+        "alumno": (validar_alumno_existe, alumno_id),
+        "curso": (validar_curso_existe, curso_id)
+    }, VALIDACION_CONFIG["plazo_total"])
+    
     errores = []
     
     # Validar alumno
-    resultado_alumno = validar_alumno_existe(alumno_id)
-    if not resultado_alumno["existe"]:
-        errores.append(f"Alumno inválido: {resultado_alumno['mensaje']}")
+    if not resultados["alumno"]["existe"]:
+        errores.append(f"Alumno inválido: {resultados['alumno']['mensaje']}")
     
     # Validar curso
-    resultado_curso = validar_curso_existe(curso_id)
-    if not resultado_curso["existe"]:
-        errores.append(f"Curso inválido: {resultado_curso['mensaje']}")
+    if not resultados["curso"]["existe"]:
+        errores.append(f"Curso inválido: {resultados['curso']['mensaje']}")
     
     if errores:
         registrar_log("service_validator", "WARN", 
@@ -224,4 +278,4 @@ def validar_datos_matricula(alumno_id: int, curso_id: int) -> dict:
         "valido": True,
         "mensaje": "Datos válidos",
         "errores": []
-    }
\ No newline at end of file
+    }
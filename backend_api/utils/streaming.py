@@ -0,0 +1,79 @@
+"""
+Respuestas JSON en streaming para exportaciones grandes.
+
+La consulta se lee con un cursor sin buffer (las filas permanecen en el
+servidor MySQL hasta que se piden) y se emite por lotes mediante un
+generador, de modo que ni las filas ni el JSON completo se materializan en
+memoria: el consumo se mantiene constante sin importar la cantidad de filas.
+
+Formatos (parámetro ?stream=):
+    json    -> un único arreglo JSON: [{...},{...}]
+    ndjson  -> un objeto JSON por línea (application/x-ndjson)
+"""
+
+from flask import Response, current_app, jsonify, request, stream_with_context
+
+FORMATOS_STREAMING = ("json", "ndjson")
+
+TAM_LOTE = 500
+
+
+def formato_streaming_solicitado():
+    """
+    Retorna "json" o "ndjson" si la request pidió streaming, None si no.
+    Lanza ValueError si el formato no es válido.
+    """
+    formato = request.args.get("stream")
+    if not formato:
+        return None
+    formato = formato.lower()
+    if formato not in FORMATOS_STREAMING:
+        raise ValueError(f"Formato de streaming inválido: {formato} (use json o ndjson)")
+    return formato
+
+
+def respuesta_streaming(conn, sql: str, params: tuple = (), formato: str = "json"):
+    """
+    Ejecuta `sql` y devuelve una Response que emite las filas por lotes.
+    Toma posesión de `conn`: la cierra (la devuelve al pool) al cerrarse la
+    respuesta, incluso si el cliente corta la descarga o si el cuerpo nunca
+    se recorre (p. ej. en una request HEAD, donde el generador no arranca).
+    """
+    if conn is None:
+        return jsonify({"error": "Error de conexión a la base de datos"}), 500
+
+    dumps = current_app.json.dumps
+
+    def generar():
+        cursor = conn.cursor(dictionary=True, buffered=False)
+        try:
+            cursor.execute(sql, params)
+            primero = True
+            if formato == "json":
+                yield "["
+            while True:
+                filas = cursor.fetchmany(TAM_LOTE)
+                if not filas:
+                    break
+                if formato == "ndjson":
+                    yield "".join(dumps(fila) + "\n" for fila in filas)
+                else:
+                    bloque = ",".join(dumps(fila) for fila in filas)
+                    yield bloque if primero else "," + bloque
+                primero = False
+            if formato == "json":
+                yield "]"
+        finally:
+            try:
+                cursor.close()
+            except Exception:
+                # Descarga cortada: quedan filas sin leer en el servidor.
+                # El pool descarta la conexión en vez de leerlas.
+                pass
+            conn.close()
+
+    mimetype = "application/x-ndjson" if formato == "ndjson" else "application/json"
+    respuesta = Response(stream_with_context(generar()), mimetype=mimetype)
+    # ConexionPool.close() es idempotente: si el generador ya la devolvió, no hace nada
+    respuesta.call_on_close(conn.close)
+    return respuesta
@@ -0,0 +1,120 @@
+"""
+Reconstrucción de trazas por transaction id
+
+Lee las líneas de una transacción desde el índice de los logs
+(utils/rotacion_logs.py) de este servicio y de los directorios listados en
+TRAZAS_CONFIG["directorios_logs"], extrae los spans registrados con
+registrar_span y los ordena en el tiempo, anidando cada span dentro del que
+lo contiene.
+
+Uso por consola (desde backend_api/):
+    python -m utils.trazas TXN-20241204103015-a1b2c3d4 [directorio_logs ...]
+"""
+
+import json
+import os
+import sys
+
+from config import TRAZAS_CONFIG
+from utils.logger import BASE_LOG_DIR, vaciar_logs
+from utils.rotacion_logs import buscar_lineas_transaccion
+
+
+def _mensaje(linea):
+    if linea.startswith("{"):
+        try:
+            return json.loads(linea).get("mensaje", "")
+        except ValueError:
+            return ""
+    partes = linea.split("→ ", 1)
+    return partes[1] if len(partes) == 2 else ""
+
+
+def parsear_span(linea):
+    """Retorna el span de una línea de log, o None si la línea no es un span."""
+    mensaje = _mensaje(linea)
+    if not mensaje.startswith("SPAN "):
+        return None
+    try:
+        return json.loads(mensaje[5:])
+    except ValueError:
+        return None
+
+
+def reconstruir_traza(transaction_id, directorios=None, incluir_lineas=False):
+    """
+    Reconstruye la traza de `transaction_id`.
+
+    Returns:
+        dict con los spans ordenados (inicio relativo, duración, profundidad
+        y span padre), o None si la transacción no aparece en los logs.
+    """
+    vaciar_logs()
+    if directorios is None:
+        directorios = [BASE_LOG_DIR] + list(TRAZAS_CONFIG["directorios_logs"])
+
+    lineas = []
+    for directorio in directorios:
+        ruta = os.path.join(directorio, "sistema_completo.log")
+        lineas.extend(buscar_lineas_transaccion(ruta, transaction_id))
+    if not lineas:
+        return None
+
+    spans = [span for span in map(parsear_span, lineas) if span is not None]
+    # El contenedor va antes que lo que contiene si empiezan a la vez
+    spans.sort(key=lambda s: (s["inicio"], -s["duracion_ms"]))
+
+    inicio_traza = spans[0]["inicio"] if spans else None
+    fin_traza = inicio_traza
+    pila = []   # índices de spans abiertos
+    for i, span in enumerate(spans):
+        fin = span["inicio"] + span["duracion_ms"] / 1000
+        while pila and spans[pila[-1]]["_fin"] < span["inicio"]:
+            pila.pop()
+        span["_fin"] = fin
+        span["padre"] = pila[-1] if pila else None
+        span["profundidad"] = len(pila)
+        span["inicio_relativo_ms"] = round((span["inicio"] - inicio_traza) * 1000, 3)
+        fin_traza = max(fin_traza, fin)
+        pila.append(i)
+    for span in spans:
+        del span["_fin"]
+
+    traza = {
+        "transaction_id": transaction_id,
+        "inicio": inicio_traza,
+        "duracion_total_ms": round((fin_traza - inicio_traza) * 1000, 3) if spans else None,
+        "total_lineas": len(lineas),
+        "spans": spans
+    }
+    if incluir_lineas:
+        traza["lineas"] = lineas
+    return traza
+
+
+def _imprimir(traza):
+    print(f"Transacción {traza['transaction_id']} - {traza['total_lineas']} líneas de log")
+    if not traza["spans"]:
+        print("  (sin spans registrados)")
+        return
+    print(f"Duración total: {traza['duracion_total_ms']:.2f}ms\n")
+    for span in traza["spans"]:
+        sangria = "  " * span["profundidad"]
+        estado = f" [{span['estado']}]" if span.get("estado") is not None else ""
+        print(
+            f"{span['inicio_relativo_ms']:10.2f}ms {span['duracion_ms']:10.2f}ms  "
+            f"{sangria}{span['tipo']}: {span['nombre']} ({span.get('servicio', '-')}, PID {span['pid']}){estado}"
+        )
+
+
+if __name__ == "__main__":
+    if len(sys.argv) < 2:
+        print("Uso: python -m utils.trazas TRANSACTION_ID [directorio_logs ...]")
+        sys.exit(2)
+
+    directorios = sys.argv[2:] or None
+    traza = reconstruir_traza(sys.argv[1], directorios)
+    if traza is None:
+        print(f"No se encontraron logs de la transacción {sys.argv[1]}")
+        sys.exit(1)
+    _imprimir(traza)
@@ -0,0 +1,153 @@
+"""
+Versiones de tablas (tabla versiones_tablas)
+
+Cada escritura incrementa la versión de la tabla afectada dentro de su
+propia transacción, con incrementar_version(), y hace commit con
+confirmar(), que además obliga a este proceso a releer las versiones
+en la próxima consulta. Las lecturas de versión se
+reutilizan durante VERSIONES_CONFIG["intervalo_lectura"] segundos, de modo
+que comprobar si una caché sigue vigente no cuesta una consulta por request
+y, aun así, un cambio hecho por otro proceso se detecta en ese intervalo.
+
+Los datos de un solo alumno (historial académico) llevan además una versión
+por alumno en versiones_alumnos, incrementada con incrementar_version_alumno()
+por las escrituras de matrículas y evaluaciones. Esa versión se lee en cada
+consulta (búsqueda por clave primaria).
+"""
+
+import threading
+import time
+
+from config import VERSIONES_CONFIG
+from db import get_connection
+
+_versiones = {}          # tabla -> versión leída
+_leido_en = 0.0          # instante (monotonic) de la última lectura
+_generacion = 0          # aumenta con cada marcar_desactualizadas()
+_lock = threading.Lock()             # protege _leido_en y _generacion
+_lock_lectura = threading.Lock()     # una sola lectura de versiones a la vez
+
+
+def incrementar_version(cursor, *tablas):
+    """
+    Incrementa la versión de cada tabla de `tablas`. No hace commit: forma
+    parte de la transacción del llamador.
+    """
+    placeholders = ','.join(['%s'] * len(tablas))
+    cursor.execute(
+        f"UPDATE versiones_tablas SET version = version + 1 WHERE tabla IN ({placeholders})", tablas
+    )
+
+
+def confirmar(conn):
+    """
+    Commit de una escritura que incrementó versiones. Recién después del
+    commit se fuerza la relectura: antes, otro thread podría volver a leer
+    (y guardar por todo el intervalo) la versión anterior.
+    """
+    conn.commit()
+    marcar_desactualizadas()
+
+
+def leer_version(cursor, tabla):
+    """
+    Versión de `tabla` dentro de la transacción del llamador. Tras
+    incrementar_version la fila queda bloqueada, así que el valor es
+    exactamente el que deja esta transacción.
+    """
+    cursor.execute("SELECT version FROM versiones_tablas WHERE tabla = %s", (tabla,))
+    return int(cursor.fetchone()[0])
+
+
+def marcar_desactualizadas():
+    """Fuerza a releer las versiones en la próxima consulta."""
+    global _leido_en, _generacion
+    with _lock:
+        _generacion += 1
+        _leido_en = 0.0
+
+
+def _leer_versiones():
+    conn = get_connection()
+    if conn is None:
+        return None
+    try:
+        cursor = conn.cursor()
+        cursor.execute("SELECT tabla, version FROM versiones_tablas")
+        versiones = {tabla: int(version) for tabla, version in cursor.fetchall()}
+        cursor.close()
+        return versiones
+    except Exception as e:
+        print("🔥 ERROR LEYENDO VERSIONES DE TABLAS:", e)
+        return None
+    finally:
+        conn.close()
+
+
+def obtener_version(tabla):
+    """
+    Retorna la versión actual de `tabla`, o None si no se pudo leer
+    (en ese caso las cachés dependen solo de su TTL).
+    """
+    global _versiones, _leido_en
+    ahora = time.monotonic()
+    if ahora - _leido_en >= VERSIONES_CONFIG["intervalo_lectura"]:
+        with _lock_lectura:
+            if ahora - _leido_en >= VERSIONES_CONFIG["intervalo_lectura"]:
+                generacion = _generacion
+                versiones = _leer_versiones()
+                # Si la lectura falla se reintenta tras el mismo intervalo
+                _versiones = versiones if versiones is not None else {}
+                with _lock:
+                    # Una escritura confirmada durante la lectura puede no
+                    # estar incluida: entonces se relee en la próxima consulta
+                    if generacion == _generacion:
+                        _leido_en = time.monotonic()
+    return _versiones.get(tabla)
+
+
+# ============================
+# VERSIÓN POR ALUMNO
+# ============================
+def incrementar_version_alumno(cursor, id_alumno):
+    """
+    Incrementa la versión de los datos académicos del alumno. No hace
+    commit: forma parte de la transacción del llamador.
+    """
+    cursor.execute("""
+        INSERT INTO versiones_alumnos (id_alumno, version) VALUES (%s, 1)
+        ON DUPLICATE KEY UPDATE version = version + 1
+    """, (id_alumno,))
+
+
+def bloquear_alumno(cursor, id_alumno):
+    """
+    Bloquea la fila del alumno en versiones_alumnos (la crea si no existe)
+    sin cambiar su versión, hasta el fin de la transacción del llamador.
+    Serializa las escrituras de matrículas de un mismo alumno.
+    """
+    cursor.execute("""
+        INSERT INTO versiones_alumnos (id_alumno, version) VALUES (%s, 0)
+        ON DUPLICATE KEY UPDATE version = version
+    """, (id_alumno,))
+
+
+def obtener_version_alumno(id_alumno):
+    """
+    Retorna la versión de los datos académicos del alumno (0 si nunca se
+    modificaron), o None si no se pudo leer.
+    """
+    conn = get_connection()
+    if conn is None:
+        return None
+    try:
+        cursor = conn.cursor()
+        cursor.execute("SELECT version FROM versiones_alumnos WHERE id_alumno = %s", (id_alumno,))
+        fila = cursor.fetchone()
+        cursor.close()
+        return int(fila[0]) if fila else 0
+    except Exception as e:
+        print("🔥 ERROR LEYENDO VERSIÓN DE ALUMNO:", e)
+        return None
+    finally:
+        conn.close()
@@ -0,0 +1,78 @@
+"""
+Verificación de índices (EXPLAIN) para /api/matriculas/cursos-disponibles.
+
+Ejecuta EXPLAIN sobre las consultas reales del servicio de matrículas y
+comprueba que cada tabla use el índice esperado (migraciones/*.sql).
+Sale con código 1 si alguna tabla no usa su índice, para usarse como
+prueba de regresión tras cambiar las consultas o el esquema.
+
+Uso (desde backend_api/, con la BD migrada y datos representativos):
+    python verificar_indices.py [alumno_id] [ciclo]
+"""
+
+import sys
+
+from db import get_connection
+from routes.matriculas.matriculas_routes import SQL_CURSOS_JALADOS, SQL_CURSOS_DISPONIBLES
+
+IDX_MATRICULAS = "idx_matriculas_alumno_curso_ciclo_estado"
+IDX_CURSOS = "idx_cursos_ciclo_activo"
+IDX_ESTADO_ACADEMICO = "idx_estado_academico_alumno_aprobado"
+
+# alias de tabla en la consulta -> índice que debe usar
+CONSULTAS = [
+    ("cursos jalados", SQL_CURSOS_JALADOS, lambda alumno, ciclo: (alumno,), {
+        "ea": IDX_ESTADO_ACADEMICO,
+        "c": "PRIMARY"
+    }),
+    ("cursos disponibles", SQL_CURSOS_DISPONIBLES, lambda alumno, ciclo: (alumno, ciclo), {
+        "c": IDX_CURSOS,
+        "m": IDX_MATRICULAS
+    })
+]
+
+
+def verificar(cursor, nombre, sql, params, esperados):
+    cursor.execute("EXPLAIN " + sql, params)
+    plan = {fila["table"]: fila for fila in cursor.fetchall()}
+
+    errores = []
+    for alias, indice in esperados.items():
+        fila = plan.get(alias)
+        if fila is None:
+            errores.append(f"{alias}: no aparece en el plan")
+        elif fila["key"] != indice:
+            errores.append(f"{alias}: usa {fila['key']} (type={fila['type']}), se esperaba {indice}")
+
+    if errores:
+        print(f"❌ {nombre}")
+        for error in errores:
+            print(f"   - {error}")
+    else:
+        print(f"✅ {nombre}: todas las tablas usan su índice")
+    return not errores
+
+
+def main():
+    alumno_id = int(sys.argv[1]) if len(sys.argv) > 1 else 1
+    ciclo = int(sys.argv[2]) if len(sys.argv) > 2 else 1
+
+    conn = get_connection()
+    if conn is None:
+        print("❌ No se pudo conectar a MySQL")
+        sys.exit(1)
+
+    try:
+        cursor = conn.cursor(dictionary=True)
+        resultados = [
+            verificar(cursor, nombre, sql, params(alumno_id, ciclo), esperados)
+            for nombre, sql, params, esperados in CONSULTAS
+        ]
+    finally:
+        conn.close()
+
+    sys.exit(0 if all(resultados) else 1)
+
+
+if __name__ == "__main__":
+    main()
@@ -15,16 +15,34 @@ const correoInput = document.getElementById("correo");
 const telefonoInput = document.getElementById("telefono");
 const cicloInput = document.getElementById("ciclo");
 
+const btnCargarMas = document.getElementById("btnCargarMas");
+
+// Paginación por cursor del listado
+const TAM_PAGINA = 50;
+let registrosCargados = [];
+let siguienteCursor = null;
+
 let alumnoIdEditar = null; // Variable clave
 
 // ==========================================
 //  LISTAR
 // ==========================================
-async function cargarAlumnos() {
-  tbody.innerHTML = '<tr><td colspan="8" class="text-center">Cargando...</td></tr>';
+async function cargarAlumnos(masPaginas = false) {
+  if (!masPaginas) {
+    tbody.innerHTML = '<tr><td colspan="8" class="text-center">Cargando...</td></tr>';
+    registrosCargados = [];
+    siguienteCursor = null;
+  }
   try {
-    const res = await fetch(API);
-    const data = await res.json();
+    let url = `${API}?limit=${TAM_PAGINA}`;
+    if (siguienteCursor) url += `&after=${encodeURIComponent(siguienteCursor)}`;
+    const res = await fetch(url);
+    const pagina = await res.json();
+
+    registrosCargados = registrosCargados.concat(pagina.data);
+    siguienteCursor = pagina.next_cursor;
+    btnCargarMas.classList.toggle("d-none", !siguienteCursor);
+    const data = registrosCargados;
     
     if (!data.length) {
       tbody.innerHTML = '<tr><td colspan="8" class="text-center text-muted">No hay alumnos</td></tr>';
@@ -133,4 +151,5 @@ window.eliminarAlumno = async (id) => {
   } catch (e) { alert("Error al eliminar"); }
 };
 
+btnCargarMas.addEventListener("click", () => cargarAlumnos(true));
 cargarAlumnos();
\ No newline at end of file
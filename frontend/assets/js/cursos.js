@@ -22,7 +22,7 @@ async function cargarCursos() {
   tbody.innerHTML = '<tr><td colspan="6" class="text-center py-3">Cargando...</td></tr>';
   
   try {
-    const res = await fetch(API);
+    const res = await fetch(`${API}?todos=1`);
     const data = await res.json();
 
     if (!data.length) {
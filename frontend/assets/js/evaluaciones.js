@@ -12,16 +12,34 @@ const inputNota = document.getElementById("inputNota");
 const previewEstado = document.getElementById("previewEstado");
 const textoEstado = document.getElementById("textoEstado");
 
+const btnCargarMas = document.getElementById("btnCargarMas");
+
+// Paginación por cursor del listado
+const TAM_PAGINA = 50;
+let registrosCargados = [];
+let siguienteCursor = null;
+
 let evaluacionIdEditar = null;
 
 // ==========================================
 //  LISTAR EVALUACIONES AGRUPADAS: CICLO → ALUMNO → CURSOS
 // ==========================================
-async function cargarEvaluaciones() {
-  tbody.innerHTML = '<tr><td colspan="7" class="text-center">Cargando...</td></tr>';
+async function cargarEvaluaciones(masPaginas = false) {
+  if (!masPaginas) {
+    tbody.innerHTML = '<tr><td colspan="7" class="text-center">Cargando...</td></tr>';
+    registrosCargados = [];
+    siguienteCursor = null;
+  }
   try {
-    const res = await fetch(API);
-    const data = await res.json();
+    let url = `${API}?limit=${TAM_PAGINA}`;
+    if (siguienteCursor) url += `&after=${encodeURIComponent(siguienteCursor)}`;
+    const res = await fetch(url);
+    const pagina = await res.json();
+
+    registrosCargados = registrosCargados.concat(pagina.data);
+    siguienteCursor = pagina.next_cursor;
+    btnCargarMas.classList.toggle("d-none", !siguienteCursor);
+    const data = registrosCargados;
     
     if(!data.length) {
       tbody.innerHTML = '<tr><td colspan="7" class="text-center text-muted">No hay evaluaciones registradas</td></tr>';
@@ -314,4 +332,5 @@ window.eliminarEvaluacion = async (id) => {
 // ==========================================
 //  CARGAR AL INICIO
 // ==========================================
+btnCargarMas.addEventListener("click", () => cargarEvaluaciones(true));
 cargarEvaluaciones();
\ No newline at end of file
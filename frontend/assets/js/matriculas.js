@@ -22,17 +22,35 @@ const btnGuardar = document.getElementById("btnGuardarMatricula");
 const btnTexto = document.getElementById("btnTexto");
 const btnSpinner = document.getElementById("btnSpinner");
 
+const btnCargarMas = document.getElementById("btnCargarMas");
+
+// Paginación por cursor del listado
+const TAM_PAGINA = 50;
+let registrosCargados = [];
+let siguienteCursor = null;
+
 let cursosJaladosIds = [];
 let cursosDisponiblesData = [];
 
 // ==========================================
 //  LISTAR MATRÍCULAS AGRUPADAS: CICLO → ALUMNO → CURSOS
 // ==========================================
-async function cargarMatriculas() {
-  tbody.innerHTML = '<tr><td colspan="8" class="text-center">Cargando...</td></tr>';
+async function cargarMatriculas(masPaginas = false) {
+  if (!masPaginas) {
+    tbody.innerHTML = '<tr><td colspan="8" class="text-center">Cargando...</td></tr>';
+    registrosCargados = [];
+    siguienteCursor = null;
+  }
   try {
-    const res = await fetch(API);
-    const data = await res.json();
+    let url = `${API}?limit=${TAM_PAGINA}`;
+    if (siguienteCursor) url += `&after=${encodeURIComponent(siguienteCursor)}`;
+    const res = await fetch(url);
+    const pagina = await res.json();
+
+    registrosCargados = registrosCargados.concat(pagina.data);
+    siguienteCursor = pagina.next_cursor;
+    btnCargarMas.classList.toggle("d-none", !siguienteCursor);
+    const data = registrosCargados;
     
     if(!data.length) {
       tbody.innerHTML = '<tr><td colspan="8" class="text-center text-muted">No hay matrículas registradas</td></tr>';
@@ -126,7 +144,7 @@ function getColor(estado) {
 // ==========================================
 async function cargarAlumnosCombo() {
     try {
-        const res = await fetch(API_ALUMNOS);
+        const res = await fetch(`${API_ALUMNOS}?todos=1`);
         const data = await res.json();
         selectAlumno.innerHTML = '<option value="">-- Seleccione un alumno --</option>' + 
             data.map(a => `
@@ -399,4 +417,5 @@ window.eliminarMatricula = async (id) => {
 // ==========================================
 //  CARGAR AL INICIO
 // ==========================================
+btnCargarMas.addEventListener("click", () => cargarMatriculas(true));
 cargarMatriculas();
@@ -22,7 +22,7 @@ async function cargarComboAlumnos() {
   ];
   
   try {
-    const res = await fetch(API_ALUMNOS);
+    const res = await fetch(`${API_ALUMNOS}?todos=1`);
     const alumnos = await res.json();
     
     if (!alumnos.length) {